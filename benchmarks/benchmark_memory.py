@@ -0,0 +1,70 @@
+"""Measure the memory held by the results of a run, with and without records.
+
+Usage: python benchmarks/benchmark_memory.py [sbol_file] [max_constructs]
+"""
+import gc
+import os
+import sys
+import tracemalloc
+from dnaweaver_synbiocad import get_assembly_plan_from_sbol
+from dnaweaver_synbiocad.compute_all_construct_quotes import (
+    compute_all_construct_quotes,
+)
+
+this_directory = os.path.dirname(os.path.realpath(__file__))
+LYCOPENE_PATH = os.path.join(
+    this_directory, "..", "tests", "data", "input", "lycopene.xml"
+)
+
+
+def benchmark_memory(path=LYCOPENE_PATH, max_constructs=None, assembly_method="any_method"):
+    """Return the memory (in MB) held by the results of a run, per mode.
+
+    The memory held is measured with tracemalloc, as the memory freed when
+    the results (quotes, primers, fragments, errors) are deleted. The peak
+    memory of the run is also given.
+
+    :param path: Path to the SBOL file (Default: lycopene.xml of the tests)
+    :param max_constructs: Maximal number of constructs (Default: None)
+    :param assembly_method: The assembly method (Default: any_method)
+
+    :type path: str
+    :type max_constructs: int
+    :type assembly_method: str
+
+    :rtype: list
+    :return: A list [(mode, n_constructs, held_memory, peak_memory)] where
+      mode is either "records" or "full quotes".
+    """
+    part_sequences, construct_parts, construct_sequences = (
+        get_assembly_plan_from_sbol(path=path)
+    )
+    results = []
+    for mode, compact_results in [("full quotes", False), ("records", True)]:
+        gc.collect()
+        tracemalloc.start()
+        run_results = compute_all_construct_quotes(
+            construct_sequences=construct_sequences,
+            part_sequences=part_sequences,
+            assembly_method=assembly_method,
+            logger=None,
+            max_constructs=max_constructs,
+            compact_results=compact_results,
+        )
+        n_constructs = len(run_results[0]) + len(run_results[3])
+        gc.collect()
+        held, peak = tracemalloc.get_traced_memory()
+        del run_results
+        gc.collect()
+        remaining, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results.append((mode, n_constructs, (held - remaining) / 1e6, peak / 1e6))
+    return results
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else LYCOPENE_PATH
+    max_constructs = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    print("mode\tconstructs\tresults (MB)\tpeak (MB)")
+    for mode, n_constructs, held, peak in benchmark_memory(path, max_constructs):
+        print("%s\t%d\t%.2f\t%.1f" % (mode, n_constructs, held, peak))
@@ -0,0 +1,62 @@
+"""Time the fragment-to-part lookups of the PCR station vs. number of parts.
+
+Usage: python benchmarks/benchmark_part_lookup.py [max_parts]
+"""
+import sys
+import time
+import dnaweaver as dw
+from dnaweaver_synbiocad.pcr_extraction_station import IndexedPcrExtractionStation
+
+
+def benchmark_part_lookup(parts_numbers, part_length=1000, n_fragments=200):
+    """Return the lookup times (in ms per fragment) for each number of parts.
+
+    :param parts_numbers: The numbers of parts of the collections benchmarked
+    :param part_length: Length of the random parts (Default: 1000)
+    :param n_fragments: Number of fragments looked up (Default: 200)
+
+    :type parts_numbers: list
+    :type part_length: int
+    :type n_fragments: int
+
+    :rtype: list
+    :return: A list [(n_parts, dnaweaver_time, indexed_time)]
+    """
+    parameters = dict(
+        primers_supplier=dw.CommercialDnaOffer(
+            name="oligos", pricing=dw.FixedCostPricing(1)
+        ),
+        homology_selector=dw.TmSegmentSelector(),
+        max_overhang_length=30,
+    )
+    results = []
+    for n_parts in parts_numbers:
+        parts = {
+            "part_%d" % i: dw.random_dna_sequence(part_length, seed=i)
+            for i in range(n_parts)
+        }
+        # Fragments: a part with extensions taken from another part
+        fragments = []
+        for i in range(n_fragments):
+            part = parts["part_%d" % (i % n_parts)]
+            other_part = parts["part_%d" % ((7 * i + 1) % n_parts)]
+            fragments.append(other_part[-20:] + part + other_part[:20])
+        times = []
+        for station_class in [dw.PcrExtractionStation, IndexedPcrExtractionStation]:
+            station = station_class("pcr", sequences=parts, **parameters)
+            t0 = time.time()
+            for fragment in fragments:
+                station._get_hits(fragment)
+            times.append(1000 * (time.time() - t0) / n_fragments)
+        results.append((n_parts, times[0], times[1]))
+    return results
+
+
+if __name__ == "__main__":
+    max_parts = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    parts_numbers = [n for n in [10, 100, 1000, 4000, 10000] if n <= max_parts]
+    print("parts\tdnaweaver (ms)\tindexed (ms)")
+    for n_parts, dnaweaver_time, indexed_time in benchmark_part_lookup(
+        parts_numbers
+    ):
+        print("%d\t%.3f\t%.3f" % (n_parts, dnaweaver_time, indexed_time))
@@ -0,0 +1,105 @@
+"""Compare the time to the first plan and the total time of a pipelined run.
+
+Usage: python benchmarks/benchmark_pipeline.py [sbol_file] [n_jobs] [max_constructs]
+"""
+import os
+import sys
+import tempfile
+import time
+import proglog
+from dnaweaver_synbiocad import (
+    compute_all_construct_quotes,
+    get_assembly_plan_from_sbol,
+)
+from dnaweaver_synbiocad.run_pipeline import run_pipeline
+from dnaweaver_synbiocad.segment_selectors import TM_SEGMENTS_CACHE
+from dnaweaver_synbiocad.streaming_output_writer import StreamingOutputWriter
+
+this_directory = os.path.dirname(os.path.realpath(__file__))
+LYCOPENE_PATH = os.path.join(
+    this_directory, "..", "tests", "data", "input", "lycopene.xml"
+)
+
+
+class FirstPlanLogger(proglog.ProgressBarLogger):
+    """Logger noting the time at which the first plan (or error) is merged."""
+
+    def __init__(self):
+        proglog.ProgressBarLogger.__init__(self)
+        self.first_plan_time = None
+
+    def callback(self, **changes):
+        if ("message" in changes) and (self.first_plan_time is None):
+            self.first_plan_time = time.time()
+
+
+def run_streamed(path, target, n_jobs, max_constructs, logger):
+    """Parse the whole design, then quote it with a streamed output."""
+    part_sequences, construct_parts, construct_sequences = (
+        get_assembly_plan_from_sbol(path=path, streaming=True)
+    )
+    output_writer = StreamingOutputWriter(target)
+    output_writer.write_inputs(part_sequences, construct_parts, construct_sequences)
+    compute_all_construct_quotes(
+        construct_sequences=construct_sequences,
+        part_sequences=part_sequences,
+        assembly_method="any_method",
+        logger=logger,
+        n_jobs=n_jobs,
+        max_constructs=max_constructs,
+        output_writer=output_writer,
+        construct_parts=construct_parts,
+    )
+    output_writer.close()
+
+
+def run_pipelined(path, target, n_jobs, max_constructs, logger):
+    run_pipeline(
+        path,
+        target,
+        assembly_method="any_method",
+        logger=logger,
+        n_jobs=n_jobs,
+        max_constructs=max_constructs,
+        part_boundary_cuts=True,
+    )
+
+
+def benchmark_pipeline(path=LYCOPENE_PATH, n_jobs=1, max_constructs=None):
+    """Return the times (in seconds) to the first plan and to the end, per mode.
+
+    :param path: Path to the SBOL file (Default: lycopene.xml of the tests)
+    :param n_jobs: Number of quoting processes (Default: 1)
+    :param max_constructs: Maximal number of constructs (Default: None)
+
+    :type path: str
+    :type n_jobs: int
+    :type max_constructs: int
+
+    :rtype: list
+    :return: A list [(mode, first_plan_time, total_time)] where mode is either
+      "streamed" or "pipelined".
+    """
+    results = []
+    for mode, run in [("streamed", run_streamed), ("pipelined", run_pipelined)]:
+        # Both runs start without the primers Tm of the other
+        TM_SEGMENTS_CACHE.entries.clear()
+        logger = FirstPlanLogger()
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.time()
+            target = os.path.join(directory, "output.xlsx")
+            run(path, target, n_jobs, max_constructs, logger)
+            end = time.time()
+        results.append((mode, logger.first_plan_time - start, end - start))
+    return results
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else LYCOPENE_PATH
+    n_jobs = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    max_constructs = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    print("mode\tfirst plan (s)\ttotal (s)")
+    for mode, first_plan_time, total_time in benchmark_pipeline(
+        path, n_jobs, max_constructs
+    ):
+        print("%s\t%.2f\t%.2f" % (mode, first_plan_time, total_time))
@@ -0,0 +1,79 @@
+"""Write a synthetic combinatorial library as a SBOL file.
+
+Usage: python benchmarks/generate_synthetic_library.py output.xml [n_parts] [n_constructs]
+"""
+import itertools
+import random
+import sys
+import dnaweaver as dw
+import sbol2 as sbol
+
+
+def generate_synthetic_library(
+    path,
+    n_parts=20,
+    n_constructs=50,
+    n_slots=4,
+    part_lengths=(300, 1500),
+    seed=123,
+):
+    """Write a SBOL file with random parts and combinatorial constructs.
+
+    The parts are distributed in ``n_slots`` slots (e.g. promoter, RBS, CDS,
+    terminator) and each construct has one part per slot, as in the designs
+    of the SynBioCAD pipeline. The part names start with the slot number so
+    that the constructs sequences follow the slots order.
+
+    :param path: Path of the SBOL .xml file to write
+    :param n_parts: Number of parts (at least n_slots)
+    :param n_constructs: Number of constructs (at most the number of combinations)
+    :param n_slots: Number of parts per construct
+    :param part_lengths: Minimal and maximal lengths of the random parts
+    :param seed: Seed of the random generator
+
+    :type path: str
+    :type n_parts: int
+    :type n_constructs: int
+    :type n_slots: int
+    :type part_lengths: tuple
+    :type seed: int
+
+    :rtype: int
+    :return: The number of constructs written
+    """
+    rng = random.Random(seed)
+    sbol.setHomespace("http://examples.org")
+    sbol.Config.setOption("sbol_typed_uris", False)
+    sbol.Config.setOption("validate", False)
+    document = sbol.Document()
+    slots = [[] for _ in range(n_slots)]
+    for i in range(n_parts):
+        slot = i % n_slots
+        name = "S%d_P%03d" % (slot + 1, i)
+        length = rng.randint(*part_lengths)
+        sequence = sbol.Sequence(
+            name + "_seq", dw.random_dna_sequence(length, seed=seed + i)
+        )
+        part = sbol.ComponentDefinition(name)
+        part.sequences = [sequence.identity]
+        document.addSequence(sequence)
+        document.addComponentDefinition(part)
+        slots[slot].append(part)
+    combinations = list(itertools.product(*slots))
+    rng.shuffle(combinations)
+    for i, parts in enumerate(combinations[:n_constructs]):
+        construct = sbol.ComponentDefinition("construct%05d" % (i + 1))
+        for part in parts:
+            component = construct.components.create(part.displayId + "_0")
+            component.definition = part.identity
+        document.addComponentDefinition(construct)
+    document.write(path)
+    return min(n_constructs, len(combinations))
+
+
+if __name__ == "__main__":
+    path = sys.argv[1]
+    n_parts = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    n_constructs = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    n_written = generate_synthetic_library(path, n_parts, n_constructs)
+    print("Wrote %d constructs in %s" % (n_written, path))
@@ -0,0 +1,208 @@
+"""Time the stages of the pipeline, save the results as JSON.
+
+Usage:
+
+    python benchmarks/run_benchmarks.py results.json [--baseline baseline.json]
+
+The parsing, supply network generation, quoting of each construct (with
+each assembly method) and output writing are timed separately, on the test
+SBOL files and on a synthetic combinatorial library. With ``--baseline``,
+the totals are compared with those of a previous results file.
+"""
+from argparse import ArgumentParser
+from collections import OrderedDict
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import dnaweaver
+import sbol2
+from dnaweaver_synbiocad import get_assembly_plan_from_sbol, write_output_spreadsheet
+from dnaweaver_synbiocad.generate_supply_network import (
+    SupplyNetwork,
+    generate_supply_network,
+)
+from dnaweaver_synbiocad.compute_all_construct_quotes import (
+    find_construct_plan,
+    register_quote_products,
+)
+from dnaweaver_synbiocad._version import __version__
+from generate_synthetic_library import generate_synthetic_library
+
+this_directory = os.path.dirname(os.path.realpath(__file__))
+data_directory = os.path.join(this_directory, "..", "tests", "data", "input")
+ASSEMBLY_METHODS = ["gibson", "golden_gate", "any_method"]
+
+
+def timed(function, *args, **kwargs):
+    """Return the result of the function call and its duration in seconds."""
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def benchmark_library(path, max_constructs=None, output_dir=None):
+    """Time all stages of the pipeline on a SBOL file.
+
+    :param path: Path to the SBOL file
+    :param max_constructs: Maximal number of constructs quoted (Default: None, all)
+    :param output_dir: Directory where the spreadsheets are written (Default: None, a temporary directory)
+
+    :type path: str
+    :type max_constructs: int
+    :type output_dir: str
+
+    :rtype: dict
+    :return: A dict of the durations (in seconds) of each stage
+    """
+    if output_dir is None:
+        output_dir = tempfile.mkdtemp()
+    results = OrderedDict()
+    design_data, results["parse_sbol_document"] = timed(
+        get_assembly_plan_from_sbol, path=path
+    )
+    _, results["parse_sbol_streaming"] = timed(
+        get_assembly_plan_from_sbol, path=path, streaming=True
+    )
+    part_sequences, construct_parts, construct_sequences = design_data
+    constructs = list(construct_sequences)[:max_constructs]
+    results["n_parts"] = len(part_sequences)
+    results["n_constructs"] = len(constructs)
+
+    for method in ASSEMBLY_METHODS:
+        method_results = results[method] = OrderedDict()
+        _, method_results["generate_supply_network"] = timed(
+            generate_supply_network,
+            parts_sequences=part_sequences,
+            already_amplified_fragments={},
+            already_ordered_primers={},
+            assembly_method=method,
+        )
+
+        # QUOTE THE CONSTRUCTS ONE BY ONE, AS IN COMPUTE_ALL_CONSTRUCT_QUOTES
+
+        network = SupplyNetwork(parts_sequences=part_sequences, assembly_method=method)
+        quotes, errors = OrderedDict(), OrderedDict()
+        primers, fragments, fragment_quotes = OrderedDict(), OrderedDict(), OrderedDict()
+        quote_times = method_results["quote_times"] = OrderedDict()
+        for i, construct in enumerate(constructs):
+            (quote, error), quote_times[construct] = timed(
+                find_construct_plan,
+                network.main_station,
+                construct_sequences[construct],
+                assembly_method=method,
+                id_prefix="ID_%s" % (i + 1),
+            )
+            if error is not None:
+                errors[construct] = error
+                continue
+            quotes[construct] = quote
+            register_quote_products(
+                quote, network, primers, fragments, fragment_quotes
+            )
+        method_results["quote_total"] = sum(quote_times.values())
+        method_results["quote_mean"] = method_results["quote_total"] / max(
+            1, len(constructs)
+        )
+        method_results["errors"] = len(errors)
+
+        _, method_results["write_output_spreadsheet"] = timed(
+            write_output_spreadsheet,
+            quotes=quotes,
+            primer_sequences=primers,
+            fragment_quotes=fragment_quotes,
+            errors=errors,
+            part_sequences=part_sequences,
+            construct_parts=construct_parts,
+            construct_sequences=construct_sequences,
+            target=os.path.join(output_dir, "%s.xlsx" % method),
+        )
+    return results
+
+
+def flatten_durations(results, prefix=""):
+    """Return {"library/method/stage": duration} for all totals of a results dict."""
+    durations = OrderedDict()
+    for key, value in results.items():
+        if key in ["quote_times", "metadata"]:
+            continue
+        name = prefix + key
+        if isinstance(value, dict):
+            durations.update(flatten_durations(value, name + "/"))
+        elif isinstance(value, float):
+            durations[name] = value
+    return durations
+
+
+def compare_with_baseline(results, baseline):
+    """Print the ratio of every duration to the baseline's."""
+    durations = flatten_durations(results)
+    baseline_durations = flatten_durations(baseline)
+    print("%-60s %10s %10s %8s" % ("stage", "baseline", "current", "ratio"))
+    for name, duration in durations.items():
+        if name not in baseline_durations:
+            continue
+        reference = baseline_durations[name]
+        ratio = duration / reference if reference else float("nan")
+        print("%-60s %10.3f %10.3f %8.2f" % (name, reference, duration, ratio))
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("output", help="Path to the JSON results file")
+    parser.add_argument("--baseline", help="A previous JSON results file")
+    parser.add_argument(
+        "--max-constructs",
+        type=int,
+        default=None,
+        help="Maximal number of constructs quoted per library (default: all)",
+    )
+    parser.add_argument("--synthetic-parts", type=int, default=20)
+    parser.add_argument("--synthetic-constructs", type=int, default=50)
+    parser.add_argument(
+        "--libraries",
+        nargs="+",
+        default=["test", "lycopene", "synthetic"],
+        help="Libraries benchmarked, among test, lycopene and synthetic",
+    )
+    args = parser.parse_args()
+
+    results = OrderedDict()
+    results["metadata"] = OrderedDict(
+        [
+            ("date", datetime.datetime.now().isoformat()),
+            ("dnaweaver_synbiocad", __version__),
+            ("dnaweaver", dnaweaver.__version__),
+            ("sbol2", getattr(sbol2, "__version__", "unknown")),
+            ("python", sys.version.split()[0]),
+            ("platform", platform.platform()),
+            ("max_constructs", args.max_constructs),
+        ]
+    )
+    output_dir = tempfile.mkdtemp()
+    for library in args.libraries:
+        if library == "synthetic":
+            path = os.path.join(output_dir, "synthetic.xml")
+            generate_synthetic_library(
+                path,
+                n_parts=args.synthetic_parts,
+                n_constructs=args.synthetic_constructs,
+            )
+        else:
+            path = os.path.join(data_directory, library + ".xml")
+        print("Benchmarking %s..." % library)
+        results[library] = benchmark_library(
+            path, max_constructs=args.max_constructs, output_dir=output_dir
+        )
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    if args.baseline is not None:
+        with open(args.baseline, "r") as f:
+            compare_with_baseline(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -32,14 +32,94 @@ def add_arguments(parser: ArgumentParser) -> ArgumentParser:
     parser.add_argument(
         'assembly_method',
         type=str,
-        choices=["gibson", "golden_gate", "any_method"],
-        help='If "any_method" is selected, each construct can be built with any method. However, Golden Gate Assembly will have priority over Gibson Assembly'
+        choices=["gibson", "golden_gate", "any_method", "all"],
+        help='If "any_method" is selected, each construct can be built with any method. However, Golden Gate Assembly will have priority over Gibson Assembly. With "all", the plans of the three methods are computed and written next to the output (e.g. output_gibson.xlsx), and the output is a spreadsheet comparing their costs'
     )
     parser.add_argument(
         '--nb_constructs',
         type=int,
         help='Maximum number of constructs to build (only used in tests)'
     )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Number of parallel processes used to quote the constructs, -1 for all CPUs (default: 1)'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        type=str,
+        help='Directory of an on-disk cache of the construct plans and of the parsed SBOL files, reused across runs'
+    )
+    parser.add_argument(
+        '--construct-order',
+        type=str,
+        choices=["document", "reuse"],
+        default="document",
+        help='Order in which the constructs are quoted: as in the SBOL document, or "reuse" to maximize the reuse of primers and fragments between constructs (default: document)'
+    )
+    parser.add_argument(
+        '--deduplicate',
+        action='store_true',
+        help='Quote only once the constructs which are the same circular sequence (up to a rotation or reverse-complement), and give them the same plan'
+    )
+    parser.add_argument(
+        '--stream-output',
+        action='store_true',
+        help='Write the output rows as the constructs are quoted, in constant memory (the primers are then not sorted)'
+    )
+    parser.add_argument(
+        '--output-format',
+        type=str,
+        choices=["xlsx", "csv", "jsonl", "parquet"],
+        default="xlsx",
+        help='Format of the output: a spreadsheet, or a directory with one file per sheet for csv, jsonl and parquet (which are always streamed) (default: xlsx)'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Resume an interrupted run from its journal (the output path followed by .journal), skipping the constructs already quoted'
+    )
+    parser.add_argument(
+        '--streaming-parser',
+        action='store_true',
+        help='Read the SBOL file element by element instead of loading a full SBOL document (for large files)'
+    )
+    parser.add_argument(
+        '--pipeline',
+        action='store_true',
+        help='Quote each construct as soon as it is read from the SBOL file, and write its plan right away from a background thread (streamed output, not compatible with the "all" method, --deduplicate, --resume and --construct-order reuse)'
+    )
+    parser.add_argument(
+        '--compact-sequences',
+        action='store_true',
+        help='Keep the constructs sequences as views over their parts sequences, stored with 2 bits per nucleotide (for large libraries)'
+    )
+    parser.add_argument(
+        '--primer-near-matches',
+        action='store_true',
+        help='Reuse an already ordered primer for a requested primer it ends with (same 3\' end, up to 20 extra 5\' nucleotides), the fragments amplified with it are then written with the longer amplicon made'
+    )
+    parser.add_argument(
+        '--part-boundary-cuts',
+        action='store_true',
+        help='Search the cuts of each construct at its part boundaries first (much faster), and in the whole sequence only if no plan is found'
+    )
+    parser.add_argument(
+        '--construct-timeout',
+        type=float,
+        help='Time budget in seconds for the quoting of each construct. Constructs over budget are quoted again with a coarser search, then get a "timeout" error (default: no limit)'
+    )
+    parser.add_argument(
+        '--shard',
+        type=str,
+        help='Path to a shard file written by the "shard" command: only the constructs of the shard are quoted, with the shard\'s prefix for the primers and fragments ids'
+    )
+    parser.add_argument(
+        '--profile',
+        type=str,
+        help='Path to a JSON file where the time spent per construct and per station is written as a Chrome trace (readable with chrome://tracing or ui.perfetto.dev), a summary table is also printed'
+    )
     parser.add_argument(
         '--version',
         action='version',
@@ -47,3 +127,103 @@ def add_arguments(parser: ArgumentParser) -> ArgumentParser:
         help='show the version number and exit'
     )
     return parser
+
+def build_shard_args_parser(
+    prog: str,
+    description: str = '',
+    epilog: str = ''
+) -> ArgumentParser:
+
+    parser = ArgumentParser(
+        prog = prog,
+        description = description,
+        epilog = epilog
+    )
+    parser.add_argument(
+        'input',
+        type=str,
+        help='Path to an .xml SBOL file containing constructs designs and sequences'
+    )
+    parser.add_argument(
+        'n_shards',
+        type=int,
+        help='Number of shards'
+    )
+    parser.add_argument(
+        'output_dir',
+        type=str,
+        help='Directory where the shard files (shard_1.json, shard_2.json...) are written'
+    )
+    parser.add_argument(
+        '--construct-order',
+        type=str,
+        choices=["document", "reuse"],
+        default="document",
+        help='Order in which the constructs are split: as in the SBOL document, or "reuse" to keep in the same shard the constructs sharing primers and fragments (default: document)'
+    )
+    parser.add_argument(
+        '--streaming-parser',
+        action='store_true',
+        help='Read the SBOL file element by element instead of loading a full SBOL document (for large files)'
+    )
+    return parser
+
+def build_merge_args_parser(
+    prog: str,
+    description: str = '',
+    epilog: str = ''
+) -> ArgumentParser:
+
+    parser = ArgumentParser(
+        prog = prog,
+        description = description,
+        epilog = epilog
+    )
+    parser.add_argument(
+        'output',
+        type=str,
+        help='Path to the merged output spreadsheet'
+    )
+    parser.add_argument(
+        'shard_outputs',
+        type=str,
+        nargs='+',
+        help='Paths to the output spreadsheets of the shards, in the order of the shards'
+    )
+    return parser
+
+def build_service_args_parser(
+    prog: str,
+    description: str = '',
+    epilog: str = ''
+) -> ArgumentParser:
+
+    parser = ArgumentParser(
+        prog = prog,
+        description = description,
+        epilog = epilog
+    )
+    parser.add_argument(
+        '--host',
+        type=str,
+        default='127.0.0.1',
+        help='Host the service listens on (default: 127.0.0.1)'
+    )
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=8080,
+        help='Port the service listens on (default: 8080)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=2,
+        help='Number of worker processes, i.e. of jobs run at the same time (default: 2)'
+    )
+    parser.add_argument(
+        '--jobs-dir',
+        type=str,
+        help='Directory where the uploaded designs and the results are kept (default: a temporary directory)'
+    )
+    return parser
@@ -1,3 +1,47 @@
-from .get_assembly_plan_from_sbol import get_assembly_plan_from_sbol
-from .compute_all_construct_quotes import compute_all_construct_quotes
-from .write_output_spreadsheet import write_output_spreadsheet
\ No newline at end of file
+import importlib
+import sys
+import types
+
+# The public functions, each defined in the module of the same name. They
+# are imported on first use, so that the command line starts (and answers
+# --help or --version) without loading pandas, sbol2 or DNA Weaver.
+_LAZY_FUNCTIONS = [
+    "get_assembly_plan_from_sbol",
+    "compute_all_construct_quotes",
+    "compute_all_methods_quotes",
+    "order_constructs",
+    "shard_constructs",
+    "merge_shard_outputs",
+    "screen_golden_gate_enzymes",
+    "write_output_spreadsheet",
+    "write_methods_comparison",
+]
+
+__all__ = list(_LAZY_FUNCTIONS)
+
+
+class _LazyPackage(types.ModuleType):
+    """The package, importing its public functions on first access."""
+
+    def __getattr__(self, name):
+        if name not in _LAZY_FUNCTIONS:
+            raise AttributeError(
+                "module %r has no attribute %r" % (self.__name__, name)
+            )
+        module = importlib.import_module("%s.%s" % (self.__name__, name))
+        function = getattr(module, name)
+        types.ModuleType.__setattr__(self, name, function)
+        return function
+
+    def __setattr__(self, name, value):
+        # Importing a module sets it as an attribute of the package: the
+        # functions keep the precedence over their modules' names
+        if (name in _LAZY_FUNCTIONS) and isinstance(value, types.ModuleType):
+            return
+        types.ModuleType.__setattr__(self, name, value)
+
+    def __dir__(self):
+        return sorted(set(types.ModuleType.__dir__(self)) | set(_LAZY_FUNCTIONS))
+
+
+sys.modules[__name__].__class__ = _LazyPackage
@@ -1,44 +1,325 @@
-from docopt import docopt
-from . import (
-    get_assembly_plan_from_sbol,
-    compute_all_construct_quotes,
-    write_output_spreadsheet,
+from collections import OrderedDict
+import os
+import sys
+from .Args import (
+    build_args_parser,
+    build_merge_args_parser,
+    build_shard_args_parser,
 )
-from .Args import build_args_parser
+
+# The heavy dependencies (sbol2, DNA Weaver, pandas...) are only imported by
+# the stages which need them, after the command line is parsed
+
+
+def shard_command(arguments):
+    """Split a design's constructs into shard files (see shard_constructs)."""
+    parser = build_shard_args_parser(
+        prog = 'dnaweaver_synbiocad shard',
+        description='Split the constructs of a design into shards, to be quoted independently (with --shard) then merged'
+    )
+    args = parser.parse_args(arguments)
+    if args.n_shards < 1:
+        parser.error("n_shards must be at least 1")
+
+    from . import get_assembly_plan_from_sbol, shard_constructs
+    from .shard_constructs import write_shard
+
+    _, construct_parts, _ = get_assembly_plan_from_sbol(
+        path=args.input, streaming=args.streaming_parser
+    )
+    constructs = list(construct_parts)
+    if args.construct_order == "reuse":
+        from . import order_constructs
+
+        constructs = order_constructs(
+            {name: sorted(parts) for name, parts in construct_parts.items()}
+        )
+    os.makedirs(args.output_dir, exist_ok=True)
+    for shard in shard_constructs(constructs, args.n_shards):
+        path = os.path.join(args.output_dir, "shard_%d.json" % shard["shard"])
+        write_shard(shard, path)
+        print ("%s: %d constructs" % (path, len(shard["constructs"])))
+
+
+def merge_command(arguments):
+    """Merge the outputs of a design's shards (see merge_shard_outputs)."""
+    parser = build_merge_args_parser(
+        prog = 'dnaweaver_synbiocad merge',
+        description='Merge the output spreadsheets of the shards of a design, making the shared primers and fragments only once'
+    )
+    args = parser.parse_args(arguments)
+
+    from . import merge_shard_outputs
+
+    stats = merge_shard_outputs(args.shard_outputs, target=args.output)
+    for name, value in stats.items():
+        print ("%s:" % name, value)
+
+
+def pipeline_command(parser, args):
+    """Parse, quote and write the plans in a pipeline (see run_pipeline)."""
+    if (
+        (args.assembly_method == "all")
+        or args.deduplicate
+        or args.resume
+        or (args.construct_order == "reuse")
+    ):
+        parser.error(
+            "--pipeline quotes the constructs as they are read, and cannot be "
+            "used with assembly_method all, --deduplicate, --resume or "
+            "--construct-order reuse"
+        )
+
+    from .run_pipeline import run_pipeline
+
+    constructs, id_prefix = None, "ID"
+    if args.shard:
+        from .shard_constructs import read_shard
+
+        shard = read_shard(args.shard)
+        constructs, id_prefix = shard["constructs"], shard["id_prefix"]
+    stats = OrderedDict()
+    profiler = None
+    if args.profile:
+        from .run_profiler import RunProfiler
+
+        profiler = RunProfiler()
+    quotes, _, _, _ = run_pipeline(
+        path=args.input,
+        target=args.output,
+        assembly_method=args.assembly_method,
+        output_format=args.output_format,
+        constructs=constructs,
+        max_constructs=args.nb_constructs,
+        part_boundary_cuts=args.part_boundary_cuts,
+        n_jobs=args.workers,
+        stats=stats,
+        cache_dir=args.cache_dir,
+        profiler=profiler,
+        construct_timeout=args.construct_timeout,
+        primer_near_matches=args.primer_near_matches,
+        id_prefix=id_prefix,
+    )
+    print ("Valid plans:", len([q for q in quotes if q is not None]))
+    for name, value in stats.items():
+        print ("%s:" % name, value)
+    if profiler is not None:
+        profiler.write_trace(args.profile)
+        print (profiler.summary_table())
 
 
 if __name__ == "__main__":
 
+    # RUN THE SHARD OR MERGE SUBCOMMAND, IF ANY
+
+    if sys.argv[1:2] == ["shard"]:
+        shard_command(sys.argv[2:])
+        sys.exit(0)
+    if sys.argv[1:2] == ["merge"]:
+        merge_command(sys.argv[2:])
+        sys.exit(0)
+
     # PARSE THE COMMAN LINE PARAMETERS
     parser = build_args_parser(
         prog = 'dnaweaver_synbiocad',
         description='Create an optimized assembly plan for combinatorial designs'
     )
     args = parser.parse_args()
+    if args.assembly_method == "all" and (
+        args.stream_output or (args.output_format != "xlsx") or args.resume
+    ):
+        parser.error(
+            "assembly_method all writes xlsx spreadsheets, and cannot be "
+            "used with --stream-output, --output-format or --resume"
+        )
+
+    # OR PARSE, QUOTE AND WRITE THE PLANS IN A PIPELINE
+
+    if args.pipeline:
+        pipeline_command(parser, args)
+        sys.exit(0)
 
     # PARSE THE SBOL FILE    
-    design_data = get_assembly_plan_from_sbol(path=args.input)
-    part_sequences, construct_parts, construct_sequences = design_data
+    from . import get_assembly_plan_from_sbol
 
-    # COMPUTE ALL QUOTES
-    assembly_strategy_data = compute_all_construct_quotes(
-        construct_sequences=construct_sequences,
-        part_sequences=part_sequences,
-        assembly_method=args.assembly_method,
-        max_constructs=args.nb_constructs
-    )
-    quotes, primer_sequences, fragment_quotes, errors = assembly_strategy_data
-
-    # WRITE THE RESULT
-
-    write_output_spreadsheet(
-        quotes=quotes,
-        primer_sequences=primer_sequences,
-        part_sequences=part_sequences,
-        fragment_quotes=fragment_quotes,
-        construct_parts=construct_parts,
-        construct_sequences=construct_sequences,
-        errors=errors,
-        target=args.output,
+    design_data = get_assembly_plan_from_sbol(
+        path=args.input,
+        streaming=args.streaming_parser,
+        compact=args.compact_sequences,
+        cache_dir=args.cache_dir,
     )
-    print ("Valid plans:", len([q for q in quotes if q is not None]))
+    part_sequences, construct_parts, construct_sequences = design_data
+
+    # KEEP ONLY THE CONSTRUCTS OF THE SHARD, IF ANY
+
+    id_prefix = "ID"
+    if args.shard:
+        from .shard_constructs import read_shard
+
+        shard = read_shard(args.shard)
+        id_prefix = shard["id_prefix"]
+        construct_parts = OrderedDict(
+            (name, construct_parts[name]) for name in shard["constructs"]
+        )
+        construct_sequences = OrderedDict(
+            (name, construct_sequences[name]) for name in shard["constructs"]
+        )
+
+    # ORDER THE CONSTRUCTS
+
+    constructs_order = None
+    if args.construct_order == "reuse":
+        from . import order_constructs
+
+        # The constructs sequences join their parts in the order of the parts
+        # names (see get_assembly_plan_from_sbol)
+        constructs_order = order_constructs(
+            {name: sorted(parts) for name, parts in construct_parts.items()}
+        )
+
+    # SCREEN THE GOLDEN GATE ENZYMES WHICH MAY ASSEMBLE EACH CONSTRUCT
+
+    enzymes_compatibility = None
+    if args.assembly_method in ["golden_gate", "any_method", "all"]:
+        from . import screen_golden_gate_enzymes
+
+        enzymes_compatibility = screen_golden_gate_enzymes(
+            construct_sequences,
+            names=list(constructs_order or construct_sequences)[
+                : args.nb_constructs
+            ],
+        )
+
+    stats = OrderedDict()
+    profiler = None
+    if args.profile:
+        from .run_profiler import RunProfiler
+
+        profiler = RunProfiler()
+
+    if args.assembly_method == "all":
+
+        # COMPUTE ALL QUOTES WITH EACH METHOD, SHARING THE SUB-QUOTES
+
+        from . import (
+            compute_all_methods_quotes,
+            write_output_spreadsheet,
+            write_methods_comparison,
+        )
+
+        methods_results = compute_all_methods_quotes(
+            construct_sequences=construct_sequences,
+            part_sequences=part_sequences,
+            max_constructs=args.nb_constructs,
+            n_jobs=args.workers,
+            stats=stats,
+            cache_dir=args.cache_dir,
+            constructs_order=constructs_order,
+            deduplicate=args.deduplicate,
+            profiler=profiler,
+            construct_timeout=args.construct_timeout,
+            enzymes_compatibility=enzymes_compatibility,
+            primer_near_matches=args.primer_near_matches,
+            id_prefix=id_prefix,
+            construct_parts=construct_parts if args.part_boundary_cuts else None,
+        )
+
+        # WRITE EACH METHOD'S PLAN, AND THE COMPARISON OF THE METHODS
+
+        root, extension = os.path.splitext(args.output)
+        for method, assembly_strategy_data in methods_results.items():
+            quotes, primer_sequences, fragment_quotes, errors = assembly_strategy_data
+            write_output_spreadsheet(
+                quotes=quotes,
+                primer_sequences=primer_sequences,
+                part_sequences=part_sequences,
+                fragment_quotes=fragment_quotes,
+                construct_parts=construct_parts,
+                construct_sequences=construct_sequences,
+                errors=errors,
+                target="%s_%s%s" % (root, method, extension),
+                enzymes_compatibility=(
+                    None if method == "gibson" else enzymes_compatibility
+                ),
+            )
+            print ("Valid plans (%s):" % method, len(quotes))
+        write_methods_comparison(
+            methods_results,
+            constructs=list(constructs_order or construct_sequences)[
+                : args.nb_constructs
+            ],
+            target=args.output,
+        )
+
+    else:
+
+        # START THE STREAMED OUTPUT, IF ANY
+
+        output_writer = None
+        if args.stream_output or (args.output_format != "xlsx"):
+            from .streaming_output_writer import StreamingOutputWriter
+
+            output_writer = StreamingOutputWriter(
+                args.output, output_format=args.output_format
+            )
+            output_writer.write_inputs(
+                part_sequences, construct_parts, construct_sequences
+            )
+            if enzymes_compatibility is not None:
+                output_writer.write_enzymes_compatibility(enzymes_compatibility)
+
+        # COMPUTE ALL QUOTES, JOURNALED UNTIL THE OUTPUT IS WRITTEN
+
+        from . import compute_all_construct_quotes
+
+        journal_path = args.output + ".journal"
+
+        assembly_strategy_data = compute_all_construct_quotes(
+            construct_sequences=construct_sequences,
+            part_sequences=part_sequences,
+            assembly_method=args.assembly_method,
+            max_constructs=args.nb_constructs,
+            n_jobs=args.workers,
+            stats=stats,
+            cache_dir=args.cache_dir,
+            constructs_order=constructs_order,
+            deduplicate=args.deduplicate,
+            output_writer=output_writer,
+            journal_path=journal_path,
+            resume=args.resume,
+            profiler=profiler,
+            construct_timeout=args.construct_timeout,
+            enzymes_compatibility=enzymes_compatibility,
+            primer_near_matches=args.primer_near_matches,
+            id_prefix=id_prefix,
+            construct_parts=construct_parts if args.part_boundary_cuts else None,
+        )
+        quotes, primer_sequences, fragment_quotes, errors = assembly_strategy_data
+
+        # WRITE THE RESULT
+
+        if output_writer is not None:
+            output_writer.close()
+        else:
+            from . import write_output_spreadsheet
+
+            write_output_spreadsheet(
+                quotes=quotes,
+                primer_sequences=primer_sequences,
+                part_sequences=part_sequences,
+                fragment_quotes=fragment_quotes,
+                construct_parts=construct_parts,
+                construct_sequences=construct_sequences,
+                errors=errors,
+                target=args.output,
+                enzymes_compatibility=enzymes_compatibility,
+            )
+        # The run is complete, its journal is no longer needed
+        os.remove(journal_path)
+        print ("Valid plans:", len([q for q in quotes if q is not None]))
+
+    for name, value in stats.items():
+        print ("%s:" % name, value)
+    if profiler is not None:
+        profiler.write_trace(args.profile)
+        print (profiler.summary_table())
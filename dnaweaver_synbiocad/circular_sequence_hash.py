@@ -0,0 +1,44 @@
+import hashlib
+import dnaweaver as dw
+
+
+def circular_sequence_hash(sequence):
+    """Return a hash identifying a circular DNA molecule.
+
+    The sequence is canonicalized as the lexicographically smallest rotation
+    of either strand, so two sequences have the same hash if and only if one
+    is a rotation of the other or of its reverse complement.
+
+    :param sequence: The sequence of a circular construct
+    :type sequence: str
+
+    :rtype: str
+    :return: A hexadecimal SHA-256 digest of the canonical sequence
+    """
+    sequence = str(sequence).upper()
+    canonical = min(
+        _least_rotation(strand)
+        for strand in [sequence, dw.reverse_complement(sequence)]
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _least_rotation(sequence):
+    """Return the lexicographically smallest rotation (Booth's algorithm)."""
+    doubled = sequence + sequence
+    failure = [-1] * len(doubled)
+    k = 0
+    for j in range(1, len(doubled)):
+        char = doubled[j]
+        i = failure[j - k - 1]
+        while i != -1 and char != doubled[k + i + 1]:
+            if char < doubled[k + i + 1]:
+                k = j - i - 1
+            i = failure[i]
+        if char != doubled[k + i + 1]:
+            if char < doubled[k]:
+                k = j
+            failure[j - k] = -1
+        else:
+            failure[j - k] = i + 1
+    return doubled[k : k + len(sequence)]
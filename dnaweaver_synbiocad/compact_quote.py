@@ -0,0 +1,94 @@
+from .detach_quote import SupplierStub
+
+# Metadata of the quotes read by the outputs
+RECORD_METADATA_KEYS = ["subject", "part_name", "match", "amplicon"]
+
+
+class QuoteRecord:
+    """Compact record of an accepted quote, with the fields of the outputs.
+
+    The record has the attributes of a DNA Weaver quote used by
+    ``write_output_spreadsheet``, ``StreamingOutputWriter`` and
+    ``write_methods_comparison``: ``id``, ``source`` (a ``SupplierStub``),
+    ``price``, ``lead_time``, ``sequence``, ``metadata`` and
+    ``assembly_plan``, but keeps nothing of the search which produced the
+    quote. See ``compact_quote``.
+    """
+
+    __slots__ = [
+        "id",
+        "source",
+        "price",
+        "lead_time",
+        "sequence",
+        "metadata",
+        "assembly_plan",
+    ]
+    accepted = True
+
+    def __init__(
+        self, id, source, price, lead_time, sequence, metadata, assembly_plan
+    ):
+        self.id = id
+        self.source = source
+        self.price = price
+        self.lead_time = lead_time
+        self.sequence = sequence
+        self.metadata = metadata
+        self.assembly_plan = assembly_plan
+
+    def __repr__(self):
+        return "QuoteRecord(%s, %s, price=%s)" % (self.id, self.source.name, self.price)
+
+
+def compact_quote(quote, keep_sequence=True):
+    """Return a compact record of a quote and of the first level of its plan.
+
+    The record of a construct or fragment keeps, for each segment of its
+    assembly plan, a record with only the id, source and metadata of the
+    segment's quote (enough to list the fragments or primers used). The
+    deeper levels of the plan and the quotes' sequences are not kept.
+
+    :param quote: An accepted DNA Weaver quote (or record), with its full assembly plan computed
+    :param keep_sequence: If False, the record's sequence is None (Default: True)
+
+    :type quote: dnaweaver.DnaQuote
+    :type keep_sequence: bool
+
+    :rtype: QuoteRecord
+    """
+    if isinstance(quote, QuoteRecord):
+        return quote
+    if quote.assembly_plan is None:
+        assembly_plan = None
+    else:
+        assembly_plan = {
+            segment: _compact_segment_quote(subquote)
+            for segment, subquote in quote.assembly_plan.items()
+        }
+    return QuoteRecord(
+        id=quote.id,
+        source=SupplierStub(quote.source.name, quote.source.operation_type),
+        price=quote.price,
+        lead_time=quote.lead_time,
+        sequence=str(quote.sequence) if keep_sequence else None,
+        metadata=_record_metadata(quote),
+        assembly_plan=assembly_plan,
+    )
+
+
+def _compact_segment_quote(quote):
+    """Return the record of a segment's quote, without sequence nor plan."""
+    return QuoteRecord(
+        id=quote.id,
+        source=SupplierStub(quote.source.name, quote.source.operation_type),
+        price=quote.price,
+        lead_time=quote.lead_time,
+        sequence=None,
+        metadata=_record_metadata(quote),
+        assembly_plan=None,
+    )
+
+
+def _record_metadata(quote):
+    return {k: quote.metadata[k] for k in RECORD_METADATA_KEYS if k in quote.metadata}
@@ -1,7 +1,28 @@
 from collections import OrderedDict
+from collections.abc import Iterator
+from itertools import islice
+from multiprocessing import Pool
+import os
 import proglog
-from dnaweaver import SequenceString
-from .generate_supply_network import generate_supply_network
+from dnaweaver import SequenceString, reverse_complement
+from .circular_sequence_hash import circular_sequence_hash
+from .generate_supply_network import SupplyNetwork
+from .golden_gate_enzymes import GOLDEN_GATE_ENZYMES
+from .plan_origin_shifts import plan_origin_shifts
+from .sequence_store import rotate_sequence
+from .quote_cache import QuoteCache, update_reuse_state
+from .segment_selectors import TM_SEGMENTS_CACHE
+from .compact_quote import compact_quote
+from .part_boundary_assembly_station import (
+    find_part_boundaries,
+    rotate_part_boundaries,
+)
+from .detach_quote import detach_quote
+from .run_journal import RunJournal, compute_constructs_digest
+from .run_profiler import RunProfiler, profile_span
+from .screen_golden_gate_enzymes import screen_golden_gate_enzymes
+from .time_budget import ConstructTimeout, time_budget
+from ._version import __version__
 
 
 def compute_all_construct_quotes(
@@ -10,30 +31,189 @@ def compute_all_construct_quotes(
     assembly_method,
     logger="bar",
     max_constructs=None,
+    n_jobs=1,
+    stats=None,
+    cache_dir=None,
+    constructs_order=None,
+    deduplicate=False,
+    output_writer=None,
+    journal_path=None,
+    resume=False,
+    profiler=None,
+    construct_timeout=None,
+    sub_quote_cache=None,
+    enzymes_compatibility=None,
+    primer_near_matches=False,
+    compact_results=True,
+    id_prefix="ID",
+    construct_parts=None,
 ):
     """Compute the quotes for all the constructs in the assembly plan.
-    
+
     The constructs are considered one after the other and every primer and
     fragment used in a construct are considered as available for free in the
-    next construct assembly.
+    next construct assembly. The supply network is built only once, and these
+    primers and fragments are added to its reuse libraries as they are made.
+
+    When ``n_jobs`` is more than 1, the constructs are quoted in waves of
+    ``n_jobs`` constructs, in parallel processes. All constructs of a wave
+    are quoted with the primers and fragments of the previous waves, and
+    the parts found by the reuse libraries for each quote are recorded (see
+    ``SupplyNetwork.record_library_lookups``). The wave's plans are then
+    merged in the constructs order: if the primers and fragments made by the
+    earlier constructs of the wave change a lookup of a construct's quote,
+    the construct is quoted again in the main process, with the current
+    reuse libraries. The plans are therefore the same as with ``n_jobs=1``
+    (unless a construct goes over ``construct_timeout``), and the number of
+    constructs quoted again is reported as ``requoted_constructs`` in the
+    stats.
+
+    Before quoting a construct, the possible origin positions of the circular
+    sequence are screened (see ``plan_origin_shifts``) and only the promising
+    ones get a full quote. The primer homologies selected by the PCR station
+    are memoized for the whole run, with counters ``tm_cache_hits`` and
+    ``tm_cache_misses`` in the stats.
+
+    If a ``cache_dir`` is provided, the plan of each construct is first looked
+    up in an on-disk cache (see ``QuoteCache``), where it is stored after
+    quoting. The cache key covers the construct sequence, the assembly method
+    and supply network, the construct's position and all the primers and
+    fragments available for reuse: a plan is found again only if the
+    constructs before it are the same, in the same order.
+
+    The reuse of primers and fragments is reported in the stats:
+    ``reused_primers`` and ``reused_fragments`` count the library hits in
+    the plans, ``ordered_primers`` and ``amplified_fragments`` the products
+    made. A ``constructs_order`` (see ``order_constructs``) can increase
+    the reuse.
+
+    With ``deduplicate=True``, constructs which are the same circular
+    molecule as a previous construct (same sequence up to a rotation or
+    reverse-complement, see ``circular_sequence_hash``) are not quoted: they
+    get the plan (or error) of that previous construct. Their number is
+    reported as ``duplicate_constructs`` in the stats.
+
+    If an ``output_writer`` is provided, the plans, primers and fragments are
+    written as soon as each construct is merged, and the plans are not kept
+    in memory: quotes_dict then maps the constructs to None, and
+    amplified_fragments_quotes is returned empty.
+
+    If a ``journal_path`` is provided, the merged plans and errors are
+    appended to a ``RunJournal`` after each construct (or wave). With
+    ``resume=True``, the plans of a previous run's journal are merged again
+    (rebuilding the primers and fragments available for reuse) and only the
+    remaining constructs are quoted, which gives the same result as an
+    uninterrupted run with the same parameters. The journal's header holds
+    the parameters of the run and a digest of its ordered constructs and
+    their sequences: a run with other constructs or parameters is not
+    resumed (a ValueError is raised).
+
+    If a ``RunProfiler`` is provided, the quoting of each construct, each
+    origin shift tried and each call to a station of the supply network
+    (in the worker processes too) are recorded in it. The span of a
+    construct notes whether its plan was cached, and its Tm cache and
+    library hits.
+
+    With a ``construct_timeout``, a construct whose quoting takes longer is
+    quoted again with a degraded network (coarser search for cut positions,
+    fewer origin shifts, see ``find_construct_plan_in_time``), and is
+    counted in the ``degraded_constructs`` stat. If it is still too long,
+    it gets a "timeout" error and is counted in ``timed_out_constructs``.
+    The plans of degraded constructs are not cached.
+
+    A ``SubQuoteCache`` shared between several runs (for instance with
+    different assembly methods, see ``compute_all_methods_quotes``) lets
+    them share their primers and fragments quotes. It is only used by the
+    networks of this process: with ``n_jobs`` > 1, a ValueError is raised.
+
+    With the Golden Gate assembly methods, the enzymes which cannot assemble
+    each construct are found before any quote (see
+    ``screen_golden_gate_enzymes``), and their assembly stations are removed
+    from the network while the construct is quoted. The number of stations
+    removed is reported as ``golden_gate_stations_removed`` in the stats.
+
+    The fragments already amplified are reused for their reverse complement
+    too. With ``primer_near_matches=True``, an ordered primer ending with a
+    requested primer is also reused (see ``IndexedReuseLibrary``): the
+    fragments amplified with it are longer than requested, and are written
+    and offered for reuse with their actual amplicon (see
+    ``register_quote_products``).
+
+    The quotes of the constructs and fragments are replaced by compact
+    ``QuoteRecord`` (see ``compact_quote``) as soon as each construct is
+    merged, so the search trees of the quotes can be freed. The records of
+    the constructs have no sequence. With ``compact_results=False``, the
+    full DNA Weaver quotes are returned instead (for instance to make their
+    reports).
+
+    The primers and fragments of the i-th construct get the ids
+    ``<id_prefix>_<i>_001``, ``<id_prefix>_<i>_002``... A different
+    ``id_prefix`` per shard of a design (see ``shard_constructs``) keeps
+    the ids of independently quoted shards distinct.
+
+    If the ``construct_parts`` are provided, the plan of each construct is
+    first searched with cuts only at the boundaries of its parts (see
+    ``PartBoundaryAssemblyStation``), which is much faster than the search
+    over the whole sequence. The general search is only run if no plan is
+    found this way, and counted in the ``part_boundary_fallbacks`` stat.
 
-    :param construct_sequences: A dict of the form ``{construct_id: "ATGCCC..."}`` of all constructs to be built.
+    The ``constructs_order`` can also be an iterator of construct ids, for
+    instance yielded by a parser as it reads the design (see
+    ``run_pipeline``): each construct is then quoted (and its plan written)
+    as soon as it is yielded, and its Golden Gate enzymes are screened just
+    before (and added to ``enzymes_compatibility``, if provided).
+    ``deduplicate`` and ``resume``, which need all the constructs first,
+    cannot be used with an iterator.
+
+    :param construct_sequences: A dict of the form ``{construct_id: "ATGCCC..."}`` of all constructs to be built (or a mapping computing the sequences on demand).
     :param parts_sequences: A dictionary {part_id: "ATGCGC..."} of the base genetic parts, which will be considered as available for free.
     :param assembly_method: Either "gibson", "golden_gate", or "any_method" (each construct will then be assembled using any method, with a preference for Golden Gate Assembly)
     :param logger: A proglog logger
     :param max_constructs: Maximal number of constructs (Default: None)
+    :param n_jobs: Number of parallel processes used for quoting, -1 for all CPUs (Default: 1)
+    :param stats: A dict in which statistics on the run are accumulated, e.g. ``full_quotes_avoided`` (Default: None)
+    :param cache_dir: Directory of the construct plans cache shared between runs (Default: None, no cache)
+    :param constructs_order: The list (or an iterator) of the construct ids in the order in which they are quoted (Default: None, for the order of ``construct_sequences``)
+    :param deduplicate: If True, quote each circular molecule only once (Default: False)
+    :param output_writer: A StreamingOutputWriter to which the results are written (Default: None)
+    :param journal_path: Path to the journal of the run (Default: None, no journal)
+    :param resume: If True, resume from the journal at ``journal_path`` (Default: False)
+    :param profiler: A RunProfiler recording the time spent per construct and per station (Default: None)
+    :param construct_timeout: Time budget for the quoting of each construct, in seconds (Default: None, no limit)
+    :param sub_quote_cache: A SubQuoteCache of primers and fragments quotes (Default: None)
+    :param enzymes_compatibility: The result of ``screen_golden_gate_enzymes`` for the constructs (Default: None, screened here)
+    :param primer_near_matches: If True, reuse the ordered primers which end with a requested primer (Default: False)
+    :param compact_results: If False, return the full quotes instead of records (Default: True)
+    :param id_prefix: Prefix of the ids of the primers and fragments (Default: "ID")
+    :param construct_parts: A dict {construct_id: [part_id, ...]} of the constructs' parts, to search the cuts at the part boundaries first (Default: None)
 
     :type construct_sequences: dict
     :type parts_sequences: dict
     :type assembly_method: str
     :type logger: str
     :type max_constructs: int
+    :type n_jobs: int
+    :type stats: dict
+    :type cache_dir: str
+    :type constructs_order: list
+    :type deduplicate: bool
+    :type output_writer: StreamingOutputWriter
+    :type journal_path: str
+    :type resume: bool
+    :type profiler: RunProfiler
+    :type construct_timeout: float
+    :type sub_quote_cache: SubQuoteCache
+    :type enzymes_compatibility: dict
+    :type primer_near_matches: bool
+    :type compact_results: bool
+    :type id_prefix: str
+    :type construct_parts: dict
 
     :rtype: tuple
     :return: Tuple of with quotes_dict, ordered_primers, amplified_fragments_quotes and errors
       Data on the optimized DNA manufacturing plan
       - quotes_dict is a dict of the form {quote_id: quote} (where "quote" is
-        a DNA Weaver Quote)
+        a QuoteRecord, or a DNA Weaver Quote if ``compact_results=False``)
       - ordered_primers is a dict {primer_id: "ATGTGC..."} of all primers
         ordered in the whole construction plan.
       - amplified_fragments_quotes is a dict {fragment_id: quote} of DNA Weaver
@@ -47,58 +227,785 @@ def compute_all_construct_quotes(
     amplified_fragments_quotes = OrderedDict()
     quotes_dict = OrderedDict()
     errors = OrderedDict()
-    iterator = list(enumerate(construct_sequences.items()))
+    # Only the names are listed, the sequences may be computed on demand
+    if constructs_order is None:
+        constructs_order = construct_sequences
+    # An iterator of constructs is quoted as it goes, never listed
+    lazy_constructs = isinstance(constructs_order, Iterator)
+    if lazy_constructs and (deduplicate or resume):
+        raise ValueError(
+            "deduplicate and resume need all the constructs first, and cannot "
+            "be used with an iterator of constructs."
+        )
+    iterator = enumerate(constructs_order)
     if max_constructs is not None:
-        iterator = iterator[:max_constructs]
-    for i, (construct, sequence) in logger.iter_bar(construct=iterator):
+        iterator = islice(iterator, max_constructs)
+    if not lazy_constructs:
+        iterator = list(iterator)
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    if (sub_quote_cache is not None) and (n_jobs > 1):
+        raise ValueError(
+            "The sub-quote cache is only used by the networks of this process, "
+            "and cannot be used with n_jobs > 1."
+        )
+    all_constructs = [] if lazy_constructs else [c for i, c in iterator]
+    duplicates = {}
+    if deduplicate:
+        representatives = {}
+        unique_constructs = []
+        for i, construct in iterator:
+            key = circular_sequence_hash(construct_sequences[construct])
+            if key in representatives:
+                duplicates[construct] = representatives[key]
+            else:
+                representatives[key] = construct
+                unique_constructs.append((i, construct))
+        iterator = unique_constructs
+    duplicated_constructs = set(duplicates.values())
+    if stats is None:
+        stats = OrderedDict()
+    for key in [
+        "full_quotes",
+        "full_quotes_avoided",
+        "reused_primers",
+        "reused_fragments",
+    ]:
+        stats.setdefault(key, 0)
+    if construct_timeout is not None:
+        for key in ["degraded_constructs", "timed_out_constructs"]:
+            stats.setdefault(key, 0)
+    if construct_parts is not None:
+        stats.setdefault("part_boundary_fallbacks", 0)
+    if n_jobs > 1:
+        stats.setdefault("requoted_constructs", 0)
+    tm_cache_counts = _tm_cache_counts()
+    if cache_dir is not None:
+        cache = QuoteCache(cache_dir)
+        for key in ["cache_hits", "cache_misses"]:
+            stats.setdefault(key, 0)
+    else:
+        cache = None
+    reuse_state = ""
+
+    # SCREEN THE GOLDEN GATE ENZYMES OF ALL CONSTRUCTS AT ONCE
+
+    if assembly_method in ["golden_gate", "any_method"]:
+        if lazy_constructs:
+            # Screened one construct at a time, see compatible_enzymes
+            if enzymes_compatibility is None:
+                enzymes_compatibility = OrderedDict()
+        elif enzymes_compatibility is None:
+            enzymes_compatibility = screen_golden_gate_enzymes(
+                construct_sequences,
+                names=[construct for i, construct in iterator],
+                n_shifts=N_SHIFTS,
+            )
+        stats.setdefault("golden_gate_stations_removed", 0)
+    else:
+        enzymes_compatibility = None
+
+    def compatible_enzymes(construct):
+        """Return the Golden Gate enzymes kept for a construct (None for all)."""
+        if lazy_constructs and (enzymes_compatibility is not None):
+            if construct not in enzymes_compatibility:
+                enzymes_compatibility.update(
+                    screen_golden_gate_enzymes(
+                        construct_sequences, names=[construct], n_shifts=N_SHIFTS
+                    )
+                )
+        if (enzymes_compatibility is None) or (
+            construct not in enzymes_compatibility
+        ):
+            return None
+        compatibility = enzymes_compatibility[construct]
+        enzymes = [e for e in GOLDEN_GATE_ENZYMES if compatibility.get(e, True)]
+        stats["golden_gate_stations_removed"] += len(GOLDEN_GATE_ENZYMES) - len(
+            enzymes
+        )
+        return enzymes
 
-        # CREATE THE SUPPLY NETWORK
+    def construct_part_boundaries(construct, sequence):
+        """Return the part boundaries of a construct (None if not searched)."""
+        if construct_parts is None:
+            return None
+        return find_part_boundaries(
+            construct_parts[construct], part_sequences, sequence
+        )
+
+    network = SupplyNetwork(
+        parts_sequences=part_sequences,
+        assembly_method=assembly_method,
+        primer_near_matches=primer_near_matches,
+    )
+    network_options = ["primer_near_matches"] if primer_near_matches else []
+    if construct_parts is not None:
+        network_options.append("part_boundary_cuts")
+    if profiler is not None:
+        profiler.instrument_network(network.main_station)
+    if sub_quote_cache is not None:
+        sub_quote_cache.share_network(network)
+
+    def merge_construct_plan(construct, quote, error):
+        """Log the plan (or error) of a construct and register its products.
+        """
+        if error is not None:
+            logger(message="Construct %s errored." % construct)
+            errors[construct] = error
+            journal_entry.append((construct, None, error))
+            if output_writer is not None:
+                output_writer.write_construct(construct, error=error)
+            return
+        nonlocal reuse_state
+        logger(message="Construct %s processed succesfully." % construct)
+        new_products = register_quote_products(
+            quote,
+            network=network,
+            ordered_primers=ordered_primers,
+            amplified_fragments=amplified_fragments,
+            amplified_fragments_quotes=amplified_fragments_quotes,
+        )
+        quotes_dict[construct] = quote
+        reuse_state = update_reuse_state(reuse_state, new_products)
+        if journal is not None:
+            journal_entry.append((construct, detach_quote(quote), None))
+        if output_writer is not None:
+            write_construct_plan(construct, quote, new_products)
+        for library_name, hits in count_library_hits(quote).items():
+            stats[REUSE_STATS_NAMES[library_name]] += hits
+        if compact_results:
+            compact_construct_plan(construct, new_products)
 
-        main_station = generate_supply_network(
-            parts_sequences=part_sequences,
-            already_amplified_fragments=amplified_fragments,
-            already_ordered_primers=ordered_primers,
+    def compact_construct_plan(construct, new_products):
+        """Replace the quotes of a construct and its new fragments by records."""
+        if quotes_dict.get(construct) is not None:
+            quotes_dict[construct] = compact_quote(
+                quotes_dict[construct], keep_sequence=False
+            )
+        for library_name, product_id, sequence in new_products:
+            if product_id in amplified_fragments_quotes:
+                amplified_fragments_quotes[product_id] = compact_quote(
+                    amplified_fragments_quotes[product_id]
+                )
+
+    def write_construct_plan(construct, quote, new_products):
+        """Write a plan and its new products, forget them if possible."""
+        for library_name, product_id, sequence in new_products:
+            if library_name == "already_ordered_primers":
+                output_writer.write_primer(product_id, sequence)
+            else:
+                fragment_quote = amplified_fragments_quotes.pop(product_id)
+                output_writer.write_fragment(product_id, fragment_quote)
+        output_writer.write_construct(construct, quote)
+        if construct not in duplicated_constructs:
+            quotes_dict[construct] = None
+
+    def write_journal_entry():
+        """Append the constructs merged since the last entry to the journal."""
+        if journal is not None:
+            journal.write_entry(list(journal_entry))
+        del journal_entry[:]
+
+    def cache_key(sequence, id_prefix):
+        return QuoteCache.compute_key(
+            sequence, assembly_method, id_prefix, reuse_state, network_options
+        )
+
+    def get_cached_plan(key):
+        """Return a cached (quote, error) or None, count hits and misses."""
+        if cache is None:
+            return None
+        cached = cache.get(key)
+        stats["cache_misses" if cached is None else "cache_hits"] += 1
+        return cached
+
+    def quote_construct(i, construct):
+        """Return the (quote, error) of a construct with the current network."""
+        with profile_span(profiler, construct, "construct") as span_args:
+            sequence = construct_sequences[construct]
+            construct_prefix = "%s_%s" % (id_prefix, i + 1)
+            key = cache_key(sequence, construct_prefix)
+            cached = get_cached_plan(key)
+            if cached is not None:
+                quote, error = cached
+            else:
+                construct_tm_counts = _tm_cache_counts()
+                quote, error, degraded = find_construct_plan_in_time(
+                    network,
+                    sequence,
+                    id_prefix=construct_prefix,
+                    timeout=construct_timeout,
+                    stats=stats,
+                    profiler=profiler,
+                    golden_gate_enzymes=compatible_enzymes(construct),
+                    part_boundaries=construct_part_boundaries(construct, sequence),
+                )
+                _add_tm_cache_counts(span_args, construct_tm_counts)
+                span_args["degraded"] = degraded
+                if (cache is not None) and not degraded:
+                    detached = None if quote is None else detach_quote(quote)
+                    cache.put(key, (detached, error))
+            span_args.update(_construct_profile(quote, error, cached))
+        return quote, error
+
+    # MERGE AGAIN THE PLANS OF THE JOURNALED RUN, IF RESUMING
+
+    journal_entry = []
+    journal = None
+    if journal_path is not None:
+        journal = RunJournal(journal_path)
+        header = dict(
+            version=__version__,
             assembly_method=assembly_method,
+            n_jobs=n_jobs,
+            deduplicate=deduplicate,
+            primer_near_matches=primer_near_matches,
+            id_prefix=id_prefix,
+            part_boundary_cuts=construct_parts is not None,
+            max_constructs=max_constructs,
+            construct_timeout=construct_timeout,
+            # The constructs of an iterator are not known yet
+            constructs_digest=None
+            if lazy_constructs
+            else compute_constructs_digest(all_constructs, construct_sequences),
         )
+        journaled = journal.open(header, resume=resume)
+        for construct, quote, error in journaled:
+            merge_construct_plan(construct, quote, error)
+        del journal_entry[:]
+        journaled_constructs = set(record[0] for record in journaled)
+        if journaled_constructs:
+            iterator = [
+                (i, c) for (i, c) in iterator if c not in journaled_constructs
+            ]
+        stats["resumed_constructs"] = len(journaled)
+
+    if lazy_constructs:
+        # The bars of iterators of unknown length must be started explicitly
+        logger(**{("construct" if n_jobs == 1 else "wave") + "__total": None})
+    if n_jobs == 1:
+        for i, construct in logger.iter_bar(construct=iterator):
+
+            # FIND AN ASSEMBLY PLAN, LOG THE QUOTE AND ITS PRODUCTS
+
+            quote, error = quote_construct(i, construct)
+            merge_construct_plan(construct, quote, error)
+            write_journal_entry()
+    else:
+        if lazy_constructs:
+            waves = iter(lambda: list(islice(iterator, n_jobs)), [])
+        else:
+            waves = [
+                iterator[start : start + n_jobs]
+                for start in range(0, len(iterator), n_jobs)
+            ]
+        with Pool(
+            n_jobs,
+            initializer=_init_worker,
+            initargs=(
+                part_sequences,
+                assembly_method,
+                profiler is not None,
+                construct_timeout,
+                primer_near_matches,
+            ),
+        ) as pool:
+            for wave in logger.iter_bar(wave=waves):
+                wave = [
+                    (i, (construct, construct_sequences[construct]))
+                    for i, construct in wave
+                ]
+
+                # QUOTE THE CONSTRUCTS OF THE WAVE IN PARALLEL (IF NOT CACHED)
+
+                wave_reuse_state = reuse_state
+                keys = [
+                    cache_key(sequence, "%s_%s" % (id_prefix, i + 1))
+                    for i, (construct, sequence) in wave
+                ]
+                results = [(get_cached_plan(key), {}, None) for key in keys]
+                tasks = [
+                    (
+                        construct,
+                        sequence,
+                        "%s_%s" % (id_prefix, i + 1),
+                        dict(ordered_primers),
+                        dict(amplified_fragments),
+                        compatible_enzymes(construct),
+                        construct_part_boundaries(construct, sequence),
+                    )
+                    for (i, (construct, sequence)), (cached, _, _) in zip(
+                        wave, results
+                    )
+                    if cached is None
+                ]
+                computed = iter(pool.map(_find_construct_plan_in_worker, tasks))
+                for index, (cached, _, _) in enumerate(results):
+                    if cached is None:
+                        quote, error, construct_stats, records, lookups = next(
+                            computed
+                        )
+                        results[index] = ((quote, error), construct_stats, lookups)
+                        if profiler is not None:
+                            profiler.merge(records)
+
+                # MERGE THE PLANS IN THE CONSTRUCTS ORDER, QUOTE AGAIN THE
+                # PLANS CHANGED BY THE EARLIER CONSTRUCTS OF THE WAVE
+
+                for (i, (construct, sequence)), result in zip(wave, results):
+                    (quote, error), construct_stats, lookups = result
+                    for stat, value in construct_stats.items():
+                        stats[stat] = stats.get(stat, 0) + value
+                    # Cached and degraded plans have no recorded lookups
+                    if (reuse_state != wave_reuse_state) and (
+                        (lookups is None) or network.library_lookups_changed(lookups)
+                    ):
+                        stats["requoted_constructs"] += 1
+                        quote, error = quote_construct(i, construct)
+                    elif (cache is not None) and (lookups is not None):
+                        # Stored under the key of the current reuse state
+                        cache.put(
+                            cache_key(sequence, "%s_%s" % (id_prefix, i + 1)),
+                            (quote, error),
+                        )
+                    merge_construct_plan(construct, quote, error)
+                write_journal_entry()
+
+    if cache is not None:
+        cache.close()
+    if journal is not None:
+        journal.close()
+    # With parallel waves, the constructs quoted again in this process
+    _add_tm_cache_counts(stats, tm_cache_counts)
+    if deduplicate:
+        stats["duplicate_constructs"] = len(duplicates)
+
+    # GIVE THE DUPLICATE CONSTRUCTS THE PLAN OF THEIR REPRESENTATIVE
+
+    if duplicates:
+        all_quotes, all_errors = OrderedDict(), OrderedDict()
+        for construct in all_constructs:
+            representative = duplicates.get(construct, construct)
+            if representative in quotes_dict:
+                all_quotes[construct] = quotes_dict[representative]
+            else:
+                all_errors[construct] = errors[representative]
+            if (output_writer is not None) and (construct in duplicates):
+                output_writer.write_construct(
+                    construct,
+                    quote=all_quotes.get(construct),
+                    error=all_errors.get(construct),
+                )
+        quotes_dict, errors = all_quotes, all_errors
+        if output_writer is not None:
+            for construct in duplicated_constructs:
+                if construct in quotes_dict:
+                    quotes_dict[construct] = None
+    stats["ordered_primers"] = len(ordered_primers)
+    stats["amplified_fragments"] = len(amplified_fragments)
+
+    # RETURN THE COMPILED DATA
+
+    return (quotes_dict, ordered_primers, amplified_fragments_quotes, errors)
+
+
+N_SHIFTS = 5
+N_DEGRADED_SHIFTS = 2
+
+
+def find_construct_plan(
+    main_station,
+    sequence,
+    assembly_method,
+    id_prefix,
+    stats=None,
+    profiler=None,
+    n_shifts=N_SHIFTS,
+    golden_gate_enzymes=GOLDEN_GATE_ENZYMES,
+    part_boundaries=None,
+):
+    """Find an assembly plan for a circular construct.
+
+    :param main_station: The main station of the supply network
+    :param sequence: The construct's sequence (a string or a ``ConstructSequence``)
+    :param assembly_method: The assembly method of the supply network
+    :param id_prefix: Prefix of the ids given to the plan's primers and fragments
+    :param stats: A dict in which the numbers of ``full_quotes`` run and ``full_quotes_avoided`` are incremented (Default: None)
+    :param profiler: A RunProfiler recording each origin shift tried (Default: None)
+    :param n_shifts: Number of origin positions tried at most (Default: 5)
+    :param golden_gate_enzymes: The enzymes of the Golden Gate stations of the network (Default: BsmBI, BsaI and BbsI)
+    :param part_boundaries: The positions of the parts' starts in the sequence (see ``find_part_boundaries``). If provided, the cuts are first searched at these boundaries only, then in the whole sequence if no plan is found (Default: None)
 
-        # FIND AN ASSEMBLY PLAN, ABORT IF ERRORS OR REJECTION
+    :type main_station: dnaweaver.DnaSuppliersComparator
+    :type sequence: str
+    :type assembly_method: str
+    :type id_prefix: str
+    :type stats: dict
+    :type profiler: RunProfiler
+    :type n_shifts: int
+    :type golden_gate_enzymes: list
+    :type part_boundaries: list
 
-        try:
-            for shift in range(5):
-                # In DNA weaver, the sequence's 0 position is always considered
-                # a cut site. In the unlucky case where this cut site is
-                # invalid (e.g. it has a palyndromic sequence preventing
-                # Golden Gate assembly), we rotate the sequence a bit to find
-                # a better position 0
-                rotated_sequence = sequence[shift:] + sequence[:shift]
+    :rtype: tuple
+    :return: Either ``(quote, None)`` for an accepted quote with its full
+      assembly plan computed, or ``(None, "Error message")``
+    """
+    if stats is None:
+        stats = {}
+    for key in ["full_quotes", "full_quotes_avoided"]:
+        stats.setdefault(key, 0)
+    # In DNA weaver, the sequence's 0 position is always considered
+    # a cut site. In the unlucky case where this cut site is
+    # invalid (e.g. it has a palyndromic sequence preventing
+    # Golden Gate assembly), we rotate the sequence a bit to find
+    # a better position 0. The rotations which would be rejected anyway
+    # are screened out beforehand.
+    planned_shifts = plan_origin_shifts(
+        sequence, assembly_method, n_shifts, enzymes=golden_gate_enzymes
+    )
+    # The search at the part boundaries (if any) comes first
+    searched_boundaries = [None]
+    if part_boundaries is not None:
+        searched_boundaries.insert(0, part_boundaries)
+        stats.setdefault("part_boundary_fallbacks", 0)
+    quote = None
+    try:
+        for boundaries in searched_boundaries:
+            if (quote is not None) and quote.accepted:
+                break
+            if (boundaries is None) and (part_boundaries is not None):
+                stats["part_boundary_fallbacks"] += 1
+            for shift in range(min(n_shifts, len(sequence))):
+                if shift not in planned_shifts:
+                    stats["full_quotes_avoided"] += 1
+                    continue
+                stats["full_quotes"] += 1
+                metadata = {"topology": "circular"}
+                if boundaries is not None:
+                    metadata["part_boundaries"] = rotate_part_boundaries(
+                        boundaries, shift, len(sequence)
+                    )
+                # Compact sequences are only decoded here, for DNA Weaver
                 rotated_sequence = SequenceString(
-                    rotated_sequence, metadata={"topology": "circular"}
+                    str(rotate_sequence(sequence, shift)), metadata=metadata
                 )
-                main_station.prepare_network_on_sequence(rotated_sequence)
-                quote = main_station.get_quote(rotated_sequence)
+                with profile_span(
+                    profiler, "shift %d" % shift, "shift"
+                ) as span_args:
+                    main_station.prepare_network_on_sequence(rotated_sequence)
+                    quote = main_station.get_quote(rotated_sequence)
+                    span_args["accepted"] = quote.accepted
                 if quote.accepted:
                     break
-        except Exception as err:
-            logger(message="Construct %s errored." % construct)
-            errors[construct] = str(err)
-            continue
-        if not quote.accepted:
-            logger(message="Construct %s: no valid plan found." % construct)
-            errors[construct] = "No assembly plan found: %s" % quote.message
+    except ConstructTimeout:
+        raise
+    except Exception as err:
+        return None, str(err)
+    if quote is None:
+        return None, (
+            "No assembly plan found: no origin position passes the Golden "
+            "Gate screening (palindromic overhang or internal enzyme site)"
+        )
+    if not quote.accepted:
+        return None, "No assembly plan found: %s" % quote.message
+    quote.compute_full_assembly_plan(id_prefix=id_prefix, id_digits=3)
+    return quote, None
+
+
+def find_construct_plan_in_time(
+    network,
+    sequence,
+    id_prefix,
+    timeout=None,
+    stats=None,
+    profiler=None,
+    golden_gate_enzymes=None,
+    part_boundaries=None,
+):
+    """Find an assembly plan for a construct within a time budget.
+
+    If the quote takes longer than ``timeout``, the construct is quoted again
+    with the network's degraded network (see
+    ``SupplyNetwork.get_degraded_network``), trying fewer origin shifts, with
+    the same time budget. If this also takes too long, a "timeout" error is
+    returned.
+
+    :param network: The supply network
+    :param sequence: The construct's sequence
+    :param id_prefix: Prefix of the ids given to the plan's primers and fragments
+    :param timeout: Time budget of each attempt, in seconds (Default: None, no limit)
+    :param stats: A dict in which ``degraded_constructs`` and ``timed_out_constructs`` are incremented (Default: None)
+    :param profiler: A RunProfiler (Default: None)
+    :param golden_gate_enzymes: The enzymes whose Golden Gate stations are used for this construct (Default: None, all enzymes)
+    :param part_boundaries: The positions of the parts' starts in the sequence, where the cuts are searched first (Default: None)
+
+    :type network: SupplyNetwork
+    :type sequence: str
+    :type id_prefix: str
+    :type timeout: float
+    :type stats: dict
+    :type profiler: RunProfiler
+    :type golden_gate_enzymes: list
+    :type part_boundaries: list
+
+    :rtype: tuple
+    :return: ``(quote, error, degraded)`` where ``(quote, error)`` is as
+      returned by ``find_construct_plan`` and ``degraded`` is True if the
+      first attempt went over the time budget.
+    """
+    if stats is None:
+        stats = {}
+    network.select_golden_gate_enzymes(golden_gate_enzymes)
+    result = None
+    try:
+        with time_budget(timeout):
+            result = find_construct_plan(
+                network.main_station,
+                sequence,
+                assembly_method=network.assembly_method,
+                id_prefix=id_prefix,
+                stats=stats,
+                profiler=profiler,
+                golden_gate_enzymes=network.golden_gate_enzymes,
+                part_boundaries=part_boundaries,
+            )
+    except ConstructTimeout:
+        pass
+    # An alarm right after the search ended does not discard its plan
+    if result is not None:
+        quote, error = result
+        return quote, error, False
+
+    # QUOTE AGAIN WITH A COARSER SEARCH AND FEWER ORIGIN SHIFTS
+
+    stats["degraded_constructs"] = stats.get("degraded_constructs", 0) + 1
+    degraded_network = network.get_degraded_network()
+    degraded_network.select_golden_gate_enzymes(golden_gate_enzymes)
+    if profiler is not None:
+        profiler.instrument_network(degraded_network.main_station)
+    try:
+        with time_budget(timeout):
+            result = find_construct_plan(
+                degraded_network.main_station,
+                sequence,
+                assembly_method=network.assembly_method,
+                id_prefix=id_prefix,
+                stats=stats,
+                profiler=profiler,
+                n_shifts=N_DEGRADED_SHIFTS,
+                golden_gate_enzymes=degraded_network.golden_gate_enzymes,
+                part_boundaries=part_boundaries,
+            )
+    except ConstructTimeout:
+        pass
+    if result is not None:
+        quote, error = result
+        return quote, error, True
+    stats["timed_out_constructs"] = stats.get("timed_out_constructs", 0) + 1
+    return None, (
+        "timeout: no assembly plan found within %s seconds, even with a "
+        "coarser search" % timeout
+    ), True
+
+
+def register_quote_products(
+    quote,
+    network,
+    ordered_primers,
+    amplified_fragments,
+    amplified_fragments_quotes,
+):
+    """Register the primers and PCR fragments created by a construct's plan.
+
+    A PCR fragment whose primers include near matches (ordered primers with
+    a longer 5' end, see ``IndexedReuseLibrary``) is registered with the
+    amplicon actually made (see ``compute_pcr_amplicon``), also noted as
+    ``amplicon`` in its quote's metadata: the requested fragment is never
+    made, so it is not offered for reuse.
+
+    :param quote: The accepted quote of the construct
+    :param network: The supply network whose reuse libraries are updated, or None
+    :param ordered_primers: The dict {primer_id: sequence} to update
+    :param amplified_fragments: The dict {fragment_id: sequence} to update
+    :param amplified_fragments_quotes: The dict {fragment_id: quote} to update
+
+    :type quote: dnaweaver.DnaQuote
+    :type network: SupplyNetwork
+    :type ordered_primers: dict
+    :type amplified_fragments: dict
+    :type amplified_fragments_quotes: dict
+
+    :rtype: list
+    :return: The list of the new (library_name, product_id, sequence)
+    """
+
+    new_products = []
+
+    def register(_quote):
+        if _quote.source.operation_type == "PCR":
+            library_name = "already_amplified_fragments"
+        elif _quote.source.name == "oligo_supplier":
+            library_name = "already_ordered_primers"
+        else:
+            library_name = None
+        if library_name == "already_amplified_fragments":
+            product_sequence = str(_quote.sequence)
+            # Near matches of the primers extend the amplified product
+            amplicon = compute_pcr_amplicon(_quote, ordered_primers)
+            if amplicon != product_sequence:
+                _quote.metadata["amplicon"] = amplicon
+                product_sequence = amplicon
+            new_products.append((library_name, _quote.id, product_sequence))
+            amplified_fragments[_quote.id] = product_sequence
+            amplified_fragments_quotes[_quote.id] = _quote
+            if network is not None:
+                network.add_amplified_fragment(_quote.id, product_sequence)
+        elif library_name == "already_ordered_primers":
+            new_products.append((library_name, _quote.id, _quote.sequence))
+            ordered_primers[_quote.id] = _quote.sequence
+            if network is not None:
+                network.add_ordered_primer(_quote.id, _quote.sequence)
+        if _quote.assembly_plan is not None:
+            for segment, subquote in _quote.assembly_plan.items():
+                register(subquote)
+
+    register(quote)
+    return new_products
+
+
+def compute_pcr_amplicon(quote, primer_sequences):
+    """Return the sequence actually amplified by the PCR of a fragment quote.
+
+    The left primer of the PCR is at the start of the fragment and the right
+    primer (reverse complemented) at its end. A primer reused as a near
+    match has extra 5' nucleotides, which are added to the corresponding
+    end of the amplicon.
+
+    :param quote: The quote of a PCR fragment, with its assembly plan
+    :param primer_sequences: A dict {primer_id: "ATGC..."} of the ordered primers
+
+    :type quote: dnaweaver.DnaQuote
+    :type primer_sequences: dict
+
+    :rtype: str
+    """
+    left_extension, right_extension = "", ""
+    for (start, end), primer_quote in (quote.assembly_plan or {}).items():
+        if primer_quote.metadata.get("match") != "near_match":
             continue
-        logger(message="Construct %s processed succesfully." % construct)
-        # IF SUCCESS, LOG THE QUOTE AND ITS PRODUCTS
-
-        id_prefix = "ID_%s" % (i + 1)
-        quote.compute_full_assembly_plan(id_prefix=id_prefix, id_digits=3)
-        for _quote in quote.tree_as_list():
-            if _quote.source.operation_type == "PCR":
-                amplified_fragments[_quote.id] = _quote.sequence
-                amplified_fragments_quotes[_quote.id] = _quote
-            if _quote.source.name == "oligo_supplier":
-                ordered_primers[_quote.id] = _quote.sequence
-        quotes_dict[construct] = quote
+        ordered_primer = str(primer_sequences[primer_quote.metadata["part_name"]])
+        extension = ordered_primer[: len(ordered_primer) - len(primer_quote.sequence)]
+        if start == 0:
+            left_extension = extension
+        else:
+            right_extension = reverse_complement(extension)
+    return left_extension + str(quote.sequence) + right_extension
 
-    # RETURN THE COMPILED DATA
 
-    return (quotes_dict, ordered_primers, amplified_fragments_quotes, errors)
+REUSE_STATS_NAMES = {
+    "already_ordered_primers": "reused_primers",
+    "already_amplified_fragments": "reused_fragments",
+}
+
+
+def count_library_hits(quote):
+    """Return a dict {library_name: n_hits} of the reuses in a quote's plan."""
+    counts = {library_name: 0 for library_name in REUSE_STATS_NAMES}
+    if quote.source.name in counts:
+        counts[quote.source.name] += 1
+    if quote.assembly_plan is not None:
+        for segment, subquote in quote.assembly_plan.items():
+            for library_name, hits in count_library_hits(subquote).items():
+                counts[library_name] += hits
+    return counts
+
+
+def _construct_profile(quote, error, cached):
+    """Return the details of a construct's quoting noted in its profile."""
+    details = {"accepted": error is None, "cached": cached is not None}
+    if quote is not None:
+        for library_name, hits in count_library_hits(quote).items():
+            details[REUSE_STATS_NAMES[library_name]] = hits
+    return details
+
+
+# PROCESS POOL WORKERS
+
+_worker_data = {}
+
+
+def _init_worker(
+    part_sequences,
+    assembly_method,
+    profile=False,
+    construct_timeout=None,
+    primer_near_matches=False,
+):
+    """Build the supply network shared by all the tasks of a worker process."""
+    _worker_data["network"] = SupplyNetwork(
+        parts_sequences=part_sequences,
+        assembly_method=assembly_method,
+        primer_near_matches=primer_near_matches,
+    )
+    _worker_data["construct_timeout"] = construct_timeout
+    _worker_data["profiler"] = None
+    if profile:
+        _worker_data["profiler"] = RunProfiler()
+        _worker_data["profiler"].instrument_network(
+            _worker_data["network"].main_station
+        )
+
+
+def _find_construct_plan_in_worker(task):
+    """Quote one construct in a worker process, return a picklable result."""
+    (
+        construct,
+        sequence,
+        id_prefix,
+        ordered_primers,
+        amplified_fragments,
+        golden_gate_enzymes,
+        part_boundaries,
+    ) = task
+    network = _worker_data["network"]
+    profiler = _worker_data["profiler"]
+    network.update_reuse_libraries(ordered_primers, amplified_fragments)
+    network.record_library_lookups()
+    stats = {}
+    tm_cache_counts = _tm_cache_counts()
+    with profile_span(profiler, construct, "construct") as span_args:
+        quote, error, degraded = find_construct_plan_in_time(
+            network,
+            sequence,
+            id_prefix=id_prefix,
+            timeout=_worker_data["construct_timeout"],
+            stats=stats,
+            profiler=profiler,
+            golden_gate_enzymes=golden_gate_enzymes,
+            part_boundaries=part_boundaries,
+        )
+        _add_tm_cache_counts(span_args, tm_cache_counts)
+        span_args["degraded"] = degraded
+        span_args.update(_construct_profile(quote, error, cached=None))
+    _add_tm_cache_counts(stats, tm_cache_counts)
+    # The lookups of the degraded network are not recorded
+    lookups = network.pop_library_lookups()
+    if degraded:
+        lookups = None
+    if quote is not None:
+        quote = detach_quote(quote)
+    records = None if profiler is None else profiler.pop_records()
+    return quote, error, stats, records, lookups
+
+
+def _tm_cache_counts():
+    return TM_SEGMENTS_CACHE.hits, TM_SEGMENTS_CACHE.misses
+
+
+def _add_tm_cache_counts(stats, initial_counts):
+    """Add the Tm cache hits and misses since ``initial_counts`` to stats."""
+    hits, misses = _tm_cache_counts()
+    stats["tm_cache_hits"] = stats.get("tm_cache_hits", 0) + hits - initial_counts[0]
+    stats["tm_cache_misses"] = (
+        stats.get("tm_cache_misses", 0) + misses - initial_counts[1]
+    )
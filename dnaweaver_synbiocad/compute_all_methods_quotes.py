@@ -0,0 +1,63 @@
+from collections import OrderedDict
+import os
+from .compute_all_construct_quotes import compute_all_construct_quotes
+from .sub_quote_cache import SubQuoteCache
+
+ASSEMBLY_METHODS = ["gibson", "golden_gate", "any_method"]
+
+
+def compute_all_methods_quotes(
+    construct_sequences,
+    part_sequences,
+    assembly_methods=ASSEMBLY_METHODS,
+    stats=None,
+    **kwargs
+):
+    """Compute the quotes for all the constructs with several assembly methods.
+
+    Each method gets its own run of ``compute_all_construct_quotes``, with
+    its own reuse of primers and fragments, so the plans are the same as with
+    separate runs. When quoting serially (``n_jobs=1``), the runs share a
+    ``SubQuoteCache``: a fragment or primer already quoted by a previous run
+    which reused the same parts for it (or none) is not quoted again. The
+    parallel workers cannot share it, they quote all sequences.
+
+    :param construct_sequences: A dict of the form ``{construct_id: "ATGCCC..."}`` of all constructs to be built.
+    :param part_sequences: A dictionary {part_id: "ATGCGC..."} of the base genetic parts, which will be considered as available for free.
+    :param assembly_methods: The list of the assembly methods (Default: gibson, golden_gate and any_method)
+    :param stats: A dict in which the statistics of each run are accumulated, prefixed with the method (e.g. ``gibson_full_quotes``), with the ``sub_quote_cache_hits`` (Default: None)
+    :param kwargs: Other parameters of ``compute_all_construct_quotes`` (such as ``logger`` or ``max_constructs``)
+
+    :type construct_sequences: dict
+    :type part_sequences: dict
+    :type assembly_methods: list
+    :type stats: dict
+
+    :rtype: dict
+    :return: A dict {assembly_method: (quotes_dict, ordered_primers,
+      amplified_fragments_quotes, errors)} of the results of
+      ``compute_all_construct_quotes`` for each method.
+    """
+    if stats is None:
+        stats = OrderedDict()
+    n_jobs = kwargs.get("n_jobs", 1)
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    sub_quote_cache = SubQuoteCache() if n_jobs == 1 else None
+    results = OrderedDict()
+    for assembly_method in assembly_methods:
+        method_stats = OrderedDict()
+        results[assembly_method] = compute_all_construct_quotes(
+            construct_sequences=construct_sequences,
+            part_sequences=part_sequences,
+            assembly_method=assembly_method,
+            stats=method_stats,
+            sub_quote_cache=sub_quote_cache,
+            **kwargs
+        )
+        for key, value in method_stats.items():
+            stats["%s_%s" % (assembly_method, key)] = value
+    stats["sub_quote_cache_hits"] = (
+        0 if sub_quote_cache is None else sub_quote_cache.hits
+    )
+    return results
@@ -0,0 +1,42 @@
+from collections import namedtuple
+from dnaweaver.DnaQuote import DnaQuote
+
+SupplierStub = namedtuple("SupplierStub", ["name", "operation_type"])
+
+
+def detach_quote(quote):
+    """Return a copy of a quote tree which no longer references the network.
+
+    DNA Weaver quotes point to the stations which issued them, and these
+    stations cannot be pickled (they hold closures). The copy returned here
+    replaces every station by a ``SupplierStub`` with the same name and
+    operation type, so it can be sent between processes, while still
+    providing everything used by ``write_output_spreadsheet``.
+
+    :param quote: A DNA Weaver quote, with its full assembly plan computed.
+
+    :type quote: dnaweaver.DnaQuote
+
+    :rtype: dnaweaver.DnaQuote
+    :return: A picklable copy of the quote tree
+    """
+    if quote.assembly_plan is None:
+        assembly_plan = None
+    else:
+        assembly_plan = {
+            segment: detach_quote(subquote)
+            for segment, subquote in quote.assembly_plan.items()
+        }
+    detached = DnaQuote(
+        source=SupplierStub(quote.source.name, quote.source.operation_type),
+        sequence=str(quote.sequence),
+        price=quote.price,
+        accepted=quote.accepted,
+        lead_time=quote.lead_time,
+        assembly_plan=assembly_plan,
+        metadata={k: v for k, v in quote.metadata.items() if k != "via"},
+        message=quote.message,
+        id=quote.id,
+    )
+    detached.full_assembly_plan_computed = quote.full_assembly_plan_computed
+    return detached
@@ -1,4 +1,14 @@
+from collections import OrderedDict
 import dnaweaver as dw
+from .part_boundary_assembly_station import PartBoundaryAssemblyStation
+from .pcr_extraction_station import IndexedPcrExtractionStation
+from .reuse_library import ReuseLibrary, IndexedReuseLibrary  # noqa: F401
+from .golden_gate_enzymes import GOLDEN_GATE_ENZYMES
+from .segment_selectors import CachedTmSegmentSelector
+
+# Coarse grain of the assembly stations of the degraded networks, used to
+# quote again the constructs whose quoting takes too long
+DEGRADED_COARSE_GRAIN = 1500
 
 
 def generate_supply_network(
@@ -20,89 +30,277 @@ def generate_supply_network(
     :type already_amplified_fragments: dict
     :type already_ordered_primers: dict
     :type assembly_method: str
-    
+
     :rtype: dict
     :return: The methods comparator
     """
-    # PRIMERS SUPPLIERS
-
-    already_ordered_primers_library = dw.PartsLibrary(
-        name="already_ordered_primers", parts_dict=already_ordered_primers,
+    network = SupplyNetwork(
+        parts_sequences=parts_sequences,
+        assembly_method=assembly_method,
+        already_amplified_fragments=already_amplified_fragments,
+        already_ordered_primers=already_ordered_primers,
     )
-    primers_company = dw.CommercialDnaOffer(
-        name="oligo_supplier", pricing=dw.FixedCostPricing(1), lead_time=0,
-        sequence_constraints=(dw.SequenceLengthConstraint(max_length=100),)
+    return network.main_station
 
-    )
 
-    primers_comparator = dw.DnaSuppliersComparator(
-        suppliers=[primers_company, already_ordered_primers_library]
-    )
+class SupplyNetwork:
+    """Supply network built once and reused for all constructs of a run.
 
-    # STATIONS FOR PARTS EXTENSION VIA PCR
+    The stations are created only once. The primers and fragments made for
+    previous assemblies are registered in place in the
+    ``already_ordered_primers`` and ``already_amplified_fragments`` libraries
+    with ``add_ordered_primer`` and ``add_amplified_fragment``.
 
-    primer_homology_selector = dw.TmSegmentSelector(
-        min_size=19, max_size=25, min_tm=50, max_tm=70
-    )
-    parts_pcr_station = dw.PcrExtractionStation(
-        name="pcr_part_extension_station",
-        primers_supplier=primers_comparator,
-        sequences=parts_sequences,
-        max_overhang_length=30,
-        extra_cost=2,
-        homology_selector=primer_homology_selector,
-    )
+    The assembly stations search the cuts only near the part boundaries of
+    the sequences which give them in their metadata (see
+    ``PartBoundaryAssemblyStation``).
 
-    already_amplified_fragments_library = dw.PartsLibrary(
-        name="already_amplified_fragments",
-        parts_dict=already_amplified_fragments,
-    )
-    fragments_comparator = dw.DnaSuppliersComparator(
-        name="fragments_comparator",
-        suppliers=[parts_pcr_station, already_amplified_fragments_library],
-    )
+    :param parts_sequences: A dictionary {part_id: "ATGCGC..."} of the base genetic parts, which will be considered as available for free.
+    :param assembly_method: Either "gibson", "golden_gate", or "any_method" (each construct will then be assembled using any method, with a preference for Golden Gate Assembly)
+    :param already_amplified_fragments: A dictionary {fragment_id: "ATGCTGA"} providing sequences of fragments made for previous assemblies (Default: None)
+    :param already_ordered_primers: A dictionary {primer_id: "ATGCTGA"} providing sequences of primers ordered for previous assemblies (Default: None)
+    :param coarse_grain: Coarse grain of the assembly stations' search for cut positions, in basepairs (Default: 600)
+    :param primer_near_matches: If True, an ordered primer ending with a requested primer (i.e. with a longer 5' end) is reused for it (Default: False)
 
-    # ASSEMBLY STATIONS
+    :type parts_sequences: dict
+    :type assembly_method: str
+    :type already_amplified_fragments: dict
+    :type already_ordered_primers: dict
+    :type coarse_grain: int
+    :type primer_near_matches: bool
+    """
 
-    gibson_assembly_station = dw.DnaAssemblyStation(
-        name="gibson_assembly",
-        supplier=fragments_comparator,
-        assembly_method=dw.GibsonAssemblyMethod(
-            overhang_selector=dw.FixedSizeSegmentSelector(40),
-            cost=50
-        ),
+    def __init__(
+        self,
+        parts_sequences,
+        assembly_method,
+        already_amplified_fragments=None,
+        already_ordered_primers=None,
         coarse_grain=600,
-        fine_grain=None,
-        a_star_factor="auto"
-    )
-    golden_gate_stations_comparator = dw.DnaSuppliersComparator(
-        name="golden_gate_comparator",
-        return_first_accepted_quote=True,
-        suppliers=[
-            dw.DnaAssemblyStation(
-                name="golden_gate_assembly_%s" % enzyme,
-                supplier=fragments_comparator,
-                assembly_method=dw.GoldenGateAssemblyMethod(
-                    enzyme=enzyme
-                ),
-                coarse_grain=600,
-                fine_grain=None,
-                cut_spread_radius=2,
-                a_star_factor="auto"
+        primer_near_matches=False,
+    ):
+        self.parts_sequences = parts_sequences
+        self.assembly_method = assembly_method
+        self.coarse_grain = coarse_grain
+        self.primer_near_matches = primer_near_matches
+        self._degraded_network = None
+
+        # PRIMERS SUPPLIERS
+
+        # Primers are single-stranded: a reverse-complement primer is not
+        # the same primer
+        self.already_ordered_primers_library = IndexedReuseLibrary(
+            name="already_ordered_primers",
+            parts_dict=already_ordered_primers,
+            near_matches=primer_near_matches,
+        )
+        primers_company = dw.CommercialDnaOffer(
+            name="oligo_supplier", pricing=dw.FixedCostPricing(1), lead_time=0,
+            sequence_constraints=(dw.SequenceLengthConstraint(max_length=100),)
+
+        )
+
+        primers_comparator = dw.DnaSuppliersComparator(
+            name="primers_comparator",
+            suppliers=[primers_company, self.already_ordered_primers_library]
+        )
+
+        # STATIONS FOR PARTS EXTENSION VIA PCR
+
+        primer_homology_selector = CachedTmSegmentSelector(
+            min_size=19, max_size=25, min_tm=50, max_tm=70
+        )
+        self.parts_pcr_station = IndexedPcrExtractionStation(
+            name="pcr_part_extension_station",
+            primers_supplier=primers_comparator,
+            sequences=parts_sequences,
+            max_overhang_length=30,
+            extra_cost=2,
+            homology_selector=primer_homology_selector,
+        )
+
+        self.already_amplified_fragments_library = IndexedReuseLibrary(
+            name="already_amplified_fragments",
+            parts_dict=already_amplified_fragments,
+            reverse_complement=True,
+        )
+        fragments_comparator = dw.DnaSuppliersComparator(
+            name="fragments_comparator",
+            suppliers=[
+                self.parts_pcr_station,
+                self.already_amplified_fragments_library
+            ],
+        )
+
+        # ASSEMBLY STATIONS
+
+        self.gibson_assembly_station = PartBoundaryAssemblyStation(
+            name="gibson_assembly",
+            supplier=fragments_comparator,
+            assembly_method=dw.GibsonAssemblyMethod(
+                overhang_selector=dw.FixedSizeSegmentSelector(40),
+                cost=50
+            ),
+            coarse_grain=coarse_grain,
+            fine_grain=None,
+            a_star_factor="auto"
+        )
+        self.golden_gate_stations = OrderedDict(
+            (
+                enzyme,
+                PartBoundaryAssemblyStation(
+                    name="golden_gate_assembly_%s" % enzyme,
+                    supplier=fragments_comparator,
+                    assembly_method=dw.GoldenGateAssemblyMethod(
+                        enzyme=enzyme
+                    ),
+                    coarse_grain=coarse_grain,
+                    fine_grain=None,
+                    cut_spread_radius=2,
+                    a_star_factor="auto"
+                )
             )
-            for enzyme in ["BsmBI", "BsaI", "BbsI"]
-        ]
-    )
+            for enzyme in GOLDEN_GATE_ENZYMES
+        )
+        self.golden_gate_stations_comparator = dw.DnaSuppliersComparator(
+            name="golden_gate_comparator",
+            return_first_accepted_quote=True,
+            suppliers=list(self.golden_gate_stations.values())
+        )
+
+        # SELECT SUPPLIERS DEPENDING ON THE SELECTED ASSEMBLY METHOD
+
+        suppliers = []
+        if assembly_method in ["golden_gate", "any_method"]:
+            suppliers.append(self.golden_gate_stations_comparator)
+        if assembly_method in ["gibson", "any_method"]:
+            suppliers.append(self.gibson_assembly_station)
+
+        # THE METHODS COMPARATOR IS THE NETWORK'S ENTRY POINT
+
+        self.main_station = dw.DnaSuppliersComparator(
+            name="main", suppliers=suppliers
+        )
+        self.golden_gate_enzymes = list(GOLDEN_GATE_ENZYMES)
+
+    def add_ordered_primer(self, primer_id, sequence):
+        """Make a primer ordered for a construct free for the next ones."""
+        self.already_ordered_primers_library.add_part(primer_id, sequence)
+
+    def add_amplified_fragment(self, fragment_id, sequence):
+        """Make a PCR fragment made for a construct free for the next ones."""
+        self.already_amplified_fragments_library.add_part(fragment_id, sequence)
+
+    def update_reuse_libraries(self, ordered_primers, amplified_fragments):
+        """Register all primers and fragments not yet in the libraries.
+
+        :param ordered_primers: A dict {primer_id: "ATGC..."} of ordered primers
+        :param amplified_fragments: A dict {fragment_id: "ATGC..."} of PCR fragments
+
+        :type ordered_primers: dict
+        :type amplified_fragments: dict
+        """
+        primers = self.already_ordered_primers_library.parts_dict
+        for primer_id, sequence in ordered_primers.items():
+            if primer_id not in primers:
+                self.add_ordered_primer(primer_id, sequence)
+        fragments = self.already_amplified_fragments_library.parts_dict
+        for fragment_id, sequence in amplified_fragments.items():
+            if fragment_id not in fragments:
+                self.add_amplified_fragment(fragment_id, sequence)
+
+    def record_library_lookups(self):
+        """Record the parts found by the reuse libraries for each quote.
 
-    # SELECT SUPPLIERS DEPENDING ON THE SELECTED ASSEMBLY METHOD
+        See ``pop_library_lookups`` and ``library_lookups_changed``.
+        """
+        self.already_ordered_primers_library.lookups = {}
+        self.already_amplified_fragments_library.lookups = {}
 
-    suppliers = []
-    if assembly_method in ["golden_gate", "any_method"]:
-        suppliers.append(golden_gate_stations_comparator)
-    if assembly_method in ["gibson", "any_method"]:
-        suppliers.append(gibson_assembly_station)
+    def pop_library_lookups(self):
+        """Stop recording the reuse libraries' lookups, return them.
 
-    # RETURN THE METHODS COMPARATOR
+        :rtype: dict
+        :return: A dict {library_name: {sequence: (part_id, match)}} of the
+          results of ``find_part`` for all the sequences quoted since
+          ``record_library_lookups``.
+        """
+        lookups = {}
+        for library in [
+            self.already_ordered_primers_library,
+            self.already_amplified_fragments_library,
+        ]:
+            lookups[library.name] = library.lookups
+            library.lookups = None
+        return lookups
 
-    main_station = dw.DnaSuppliersComparator(name="main", suppliers=suppliers)
-    return main_station
+    def library_lookups_changed(self, lookups):
+        """Return True if the reuse libraries now find other parts.
+
+        A quote whose lookups (see ``pop_library_lookups``) have not changed
+        is the same as with the current libraries.
+
+        :param lookups: A dict {library_name: {sequence: (part_id, match)}}
+        :type lookups: dict
+
+        :rtype: bool
+        """
+        for library in [
+            self.already_ordered_primers_library,
+            self.already_amplified_fragments_library,
+        ]:
+            for sequence, found in lookups[library.name].items():
+                if library.find_part(sequence) != found:
+                    return True
+        return False
+
+    def select_golden_gate_enzymes(self, enzymes=None):
+        """Keep only the Golden Gate assembly stations of some enzymes.
+
+        This is used to remove from the network, before quoting a construct,
+        the stations of the enzymes which cannot assemble it (see
+        ``screen_golden_gate_enzymes``). The stations keep their order of
+        preference. If no enzyme is kept, the Golden Gate stations comparator
+        is removed from the network.
+
+        :param enzymes: The enzymes whose stations are kept (Default: None, for all enzymes)
+        :type enzymes: list
+        """
+        if enzymes is None:
+            enzymes = GOLDEN_GATE_ENZYMES
+        self.golden_gate_enzymes = [
+            enzyme for enzyme in GOLDEN_GATE_ENZYMES if enzyme in enzymes
+        ]
+        suppliers = []
+        if self.golden_gate_enzymes and (
+            self.assembly_method in ["golden_gate", "any_method"]
+        ):
+            self.golden_gate_stations_comparator.set_suppliers(
+                [self.golden_gate_stations[e] for e in self.golden_gate_enzymes]
+            )
+            suppliers.append(self.golden_gate_stations_comparator)
+        if self.assembly_method in ["gibson", "any_method"]:
+            suppliers.append(self.gibson_assembly_station)
+        # Without Golden Gate stations left, the comparator is removed
+        self.main_station.set_suppliers(suppliers)
+
+    def get_degraded_network(self):
+        """Return a network with a coarser (faster) search for cut positions.
+
+        The degraded network is built once, and its reuse libraries are
+        updated with the primers and fragments of this network at each call.
+
+        :rtype: SupplyNetwork
+        """
+        if self._degraded_network is None:
+            self._degraded_network = SupplyNetwork(
+                parts_sequences=self.parts_sequences,
+                assembly_method=self.assembly_method,
+                coarse_grain=DEGRADED_COARSE_GRAIN,
+                primer_near_matches=self.primer_near_matches,
+            )
+        self._degraded_network.update_reuse_libraries(
+            self.already_ordered_primers_library.parts_dict,
+            self.already_amplified_fragments_library.parts_dict,
+        )
+        return self._degraded_network
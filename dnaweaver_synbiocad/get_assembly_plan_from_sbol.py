@@ -1,20 +1,38 @@
-import sbol2 as sbol
 from collections import OrderedDict
+from .get_assembly_plan_from_sbol_stream import (
+    LazyConstructSequences,
+    get_assembly_plan_from_sbol_stream,
+)
+from .parse_cache import ParseCache
+from .sequence_store import CompactConstructSequences
+
+# sbol2 is only imported to parse a file, not when its parse is cached
+
 
 def id_sort(i: iter):
     """Sort a collection of SBOL objects and/or URIs by identity URI"""
+    import sbol2 as sbol
+
     return sorted(i, key=lambda x: x.identity if isinstance(x, sbol.Identified) else x)
 
 
-def get_assembly_plan_from_sbol(sbol_doc=None, path=None):
+def get_assembly_plan_from_sbol(
+    sbol_doc=None, path=None, streaming=False, compact=False, cache_dir=None
+):
     """Extract an assembly plan from sbol
 
     :param sbol_doc: A PySBOL Document() containing the designs and parts sequences. A path to a SBOL .xml file can be provided instead.
     :param path: A path to a SBOL .xml file
+    :param streaming: If True, the file at ``path`` is read with ``get_assembly_plan_from_sbol_stream``, without building a Document, and the constructs sequences are computed on demand (Default: False)
+    :param compact: If True, the constructs sequences are given as views over their parts' sequences, stored with 2 bits per nucleotide (see ``CompactConstructSequences``) (Default: False)
+    :param cache_dir: Directory of a ``ParseCache``: if the file at ``path`` was already parsed, its parts and constructs are read from the cache instead, and the constructs sequences are computed on demand (Default: None)
 
     :type sbol_doc: sbol.Document
     :type path: str
-    
+    :type streaming: bool
+    :type compact: bool
+    :type cache_dir: str
+
     :rtype: tuple
     :return: Return a tuple with parts_sequences, parts_per_construct and constructs_sequences
       Assembly plan data:
@@ -22,7 +40,37 @@ def get_assembly_plan_from_sbol(sbol_doc=None, path=None):
       - parts_per_constructs is of the form ``{construct_id: [part_id_1,...]}``
       - constructs_sequences is of the form ``{construct_id: "ATGCCC..."}``.
     """
+    if (cache_dir is not None) and (path is not None):
+        parse_cache = ParseCache(cache_dir)
+        key = ParseCache.compute_key(path)
+        cached = parse_cache.get(key)
+        if cached is None:
+            design_data = get_assembly_plan_from_sbol(
+                path=path, streaming=streaming, compact=compact
+            )
+            parse_cache.put(key, design_data[0], design_data[1])
+            return design_data
+        parts_sequences, parts_per_construct = cached
+        if compact:
+            constructs_sequences = CompactConstructSequences(
+                parts_per_construct, parts_sequences
+            )
+        else:
+            constructs_sequences = LazyConstructSequences(
+                parts_per_construct, parts_sequences
+            )
+        return (parts_sequences, parts_per_construct, constructs_sequences)
+    if streaming:
+        design_data = get_assembly_plan_from_sbol_stream(path)
+        parts_sequences, parts_per_construct, constructs_sequences = design_data
+        if compact:
+            constructs_sequences = CompactConstructSequences(
+                parts_per_construct, parts_sequences
+            )
+        return (parts_sequences, parts_per_construct, constructs_sequences)
     if path is not None:
+        import sbol2 as sbol
+
         sbol_doc = sbol.Document()
         sbol_doc.read(path)
 
@@ -37,6 +85,12 @@ def get_assembly_plan_from_sbol(sbol_doc=None, path=None):
         if len(component.components)
     ]
 
+    if compact:
+        parts_per_construct = OrderedDict(parts_per_construct)
+        constructs_sequences = CompactConstructSequences(
+            parts_per_construct, parts_sequences
+        )
+        return (parts_sequences, parts_per_construct, constructs_sequences)
     constructs_sequences = [
         (construct_name, "".join([parts_sequences[part] for part in id_sort(parts)]))
         for construct_name, parts in parts_per_construct
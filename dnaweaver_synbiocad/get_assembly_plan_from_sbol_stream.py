@@ -0,0 +1,138 @@
+from collections import OrderedDict
+from collections.abc import Mapping
+from lxml import etree
+
+SBOL_NS = "{http://sbols.org/v2#}"
+RDF_NS = "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}"
+
+
+class LazyConstructSequences(Mapping):
+    """Read-only mapping {construct_id: "ATGCCC..."} computed on demand.
+
+    The sequence of a construct is only assembled from its parts' sequences
+    when it is requested, so iterating over the constructs (for instance with
+    ``items()``) never holds all construct sequences in memory.
+
+    :param parts_per_construct: A dict {construct_id: [part_id_1,...]}
+    :param parts_sequences: A dict {part_id: "ATTTGTGTGC..."}
+
+    :type parts_per_construct: dict
+    :type parts_sequences: dict
+    """
+
+    def __init__(self, parts_per_construct, parts_sequences):
+        self.parts_per_construct = parts_per_construct
+        self.parts_sequences = parts_sequences
+
+    def __getitem__(self, construct_id):
+        parts = self.parts_per_construct[construct_id]
+        return "".join([self.parts_sequences[part] for part in sorted(parts)])
+
+    def __iter__(self):
+        return iter(self.parts_per_construct)
+
+    def __len__(self):
+        return len(self.parts_per_construct)
+
+
+def get_assembly_plan_from_sbol_stream(path):
+    """Extract an assembly plan from a SBOL file without loading a Document.
+
+    The RDF/XML file is read element by element with ``lxml.etree.iterparse``
+    and each ``Sequence`` and ``ComponentDefinition`` element is discarded
+    once read, so only the parts sequences and the constructs' parts lists
+    are kept in memory. The result is the same as with
+    ``get_assembly_plan_from_sbol``.
+
+    :param path: A path to a SBOL .xml file
+    :type path: str
+
+    :rtype: tuple
+    :return: Return a tuple with parts_sequences, parts_per_construct and constructs_sequences
+      as in ``get_assembly_plan_from_sbol``, except that constructs_sequences
+      is a ``LazyConstructSequences`` mapping.
+    """
+    parts_sequences = {}
+    parts_per_construct = OrderedDict()
+    tags = [SBOL_NS + "Sequence", SBOL_NS + "ComponentDefinition"]
+    for name, element in _iter_sbol_elements(path, tags):
+        if element.tag == SBOL_NS + "Sequence":
+            parts_sequences[name] = _sequence_elements(element)
+        else:
+            parts = _component_parts(element)
+            if parts:
+                parts_per_construct[name] = parts
+    constructs_sequences = LazyConstructSequences(
+        parts_per_construct, parts_sequences
+    )
+    return (parts_sequences, parts_per_construct, constructs_sequences)
+
+
+def stream_sbol_constructs(path):
+    """Read the parts of a SBOL file, then yield its constructs one by one.
+
+    The file is read in two passes with ``lxml.etree.iterparse``. The first
+    pass, done when this function is called, only reads the ``Sequence``
+    elements: all parts sequences are known before any construct is quoted.
+    The second pass reads the ``ComponentDefinition`` elements as the
+    returned generator is consumed, adding each construct to
+    ``parts_per_construct`` before yielding its id, so the first constructs
+    can be quoted (and their plans written) while the rest of the file is
+    read. Once the generator is exhausted, the result is the same as with
+    ``get_assembly_plan_from_sbol_stream``.
+
+    :param path: A path to a SBOL .xml file
+    :type path: str
+
+    :rtype: tuple
+    :return: A tuple with parts_sequences, parts_per_construct (filled as the
+      constructs are yielded), constructs_sequences (a
+      ``LazyConstructSequences`` over parts_per_construct) and the generator
+      of the construct ids.
+    """
+    parts_sequences = {
+        name: _sequence_elements(element)
+        for name, element in _iter_sbol_elements(path, [SBOL_NS + "Sequence"])
+    }
+    parts_per_construct = OrderedDict()
+
+    def constructs():
+        tags = [SBOL_NS + "ComponentDefinition"]
+        for name, element in _iter_sbol_elements(path, tags):
+            parts = _component_parts(element)
+            if parts:
+                parts_per_construct[name] = parts
+                yield name
+
+    constructs_sequences = LazyConstructSequences(
+        parts_per_construct, parts_sequences
+    )
+    return (parts_sequences, parts_per_construct, constructs_sequences, constructs())
+
+
+def _iter_sbol_elements(path, tags):
+    """Yield the (name, element) of the elements of a SBOL file with the tags.
+
+    Each element is cleared once the next one is read, with the elements
+    before it, to free their memory.
+    """
+    for _, element in etree.iterparse(path, events=("end",), tag=tags):
+        yield _clean_name(element.findtext(SBOL_NS + "displayId")), element
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+
+def _sequence_elements(element):
+    return element.findtext(SBOL_NS + "elements").upper()
+
+
+def _component_parts(element):
+    """Return the part ids of the components of a ComponentDefinition."""
+    components = element.findall("%scomponent/%sComponent" % (SBOL_NS, SBOL_NS))
+    components = sorted(components, key=lambda c: c.get(RDF_NS + "about"))
+    return [c.findtext(SBOL_NS + "displayId")[:-2] for c in components]
+
+
+def _clean_name(display_id):
+    return display_id.replace("_sequence", "").replace("_seq", "")
@@ -0,0 +1,3 @@
+# The Golden Gate enzymes of the supply network (see generate_supply_network).
+# Kept without dependencies, so the output writers do not import DNA Weaver.
+GOLDEN_GATE_ENZYMES = ["BsmBI", "BsaI", "BbsI"]
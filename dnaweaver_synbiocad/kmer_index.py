@@ -0,0 +1,52 @@
+from collections import defaultdict
+
+
+class KmerIndex:
+    """Index of the k-mers of a collection of sequences.
+
+    The k-mers starting every ``step`` nucleotides of each sequence are
+    indexed. Any sequence of length ``k + step - 1`` or more contained in an
+    indexed sequence therefore contains one of its indexed k-mers, so
+    ``find_candidates`` returns all the sequences which may contain it after
+    a few dictionary lookups, whatever the size of the collection.
+
+    :param sequences: A dictionary {name: "ATGCGC..."} of the sequences to index
+    :param k: Size of the indexed k-mers (Default: 16)
+    :param step: Distance between two indexed k-mers of a sequence (Default: 8)
+
+    :type sequences: dict
+    :type k: int
+    :type step: int
+    """
+
+    def __init__(self, sequences, k=16, step=8):
+        self.k = k
+        self.step = step
+        self.names = list(sequences)
+        self.index = defaultdict(set)
+        for i, name in enumerate(self.names):
+            sequence = str(sequences[name]).upper()
+            for start in range(0, len(sequence) - k + 1, step):
+                self.index[sequence[start : start + k]].add(i)
+
+    @property
+    def min_query_length(self):
+        return self.k + self.step - 1
+
+    def find_candidates(self, query):
+        """Return the names of the sequences which may contain the query.
+
+        :param query: The sequence searched
+        :type query: str
+
+        :rtype: list
+        :return: The candidate names, in the order of the indexed collection,
+          or None if the query is too short to use the index.
+        """
+        if len(query) < self.min_query_length:
+            return None
+        query = str(query).upper()
+        candidates = set()
+        for start in range(self.step):
+            candidates.update(self.index.get(query[start : start + self.k], ()))
+        return [self.names[i] for i in sorted(candidates)]
@@ -0,0 +1,128 @@
+from collections import OrderedDict
+import pandas
+from .streaming_output_writer import SHEETS_COLUMNS
+
+# Sheets whose ids are merged across shards, the others are concatenated
+MERGED_SHEETS = ["primer_sequences", "fragment_extensions", "assembly_plan"]
+
+
+def merge_shard_outputs(shard_outputs, target="output.xlsx"):
+    """Merge the output spreadsheets of the shards of a design into one.
+
+    The shards (see ``shard_constructs``) are merged in the order given, so
+    the merged output is the same for the same shard outputs. The primers
+    and fragments with the same sequence in several shards are made only
+    once: the ones of the first shard are kept, and the ids of the others
+    are replaced by theirs in the fragments' primers and in the assembly
+    plans. The primers which were only used by the replaced fragments are
+    dropped. The other sheets are concatenated, keeping the first row of
+    each construct or part.
+
+    :param shard_outputs: The paths to the xlsx outputs of the shards (in the format of ``write_output_spreadsheet``)
+    :param target: The path to the merged output spreadsheet
+
+    :type shard_outputs: list
+    :type target: str
+
+    :rtype: dict
+    :return: The merge statistics, a dict with the numbers of
+      ``merged_primers``, ``merged_fragments`` and ``dropped_primers``
+    """
+    sheets_rows = OrderedDict((name, []) for name in SHEETS_COLUMNS)
+    sheets_indices = {name: set() for name in SHEETS_COLUMNS}
+    primer_ids, fragment_ids = {}, {}
+    stats = OrderedDict(
+        [("merged_primers", 0), ("merged_fragments", 0), ("dropped_primers", 0)]
+    )
+    has_enzymes_sheet = False
+
+    def rename_ids(ids, renamed):
+        """Rename the ids of a "ID_1 + ID_2" list of components."""
+        return " + ".join(renamed.get(_id, _id) for _id in ids.split(" + "))
+
+    def add_row(sheet_name, row):
+        """Add a row to a sheet, unless a row with the same index exists."""
+        if row[0] not in sheets_indices[sheet_name]:
+            sheets_indices[sheet_name].add(row[0])
+            sheets_rows[sheet_name].append(row)
+
+    for path in shard_outputs:
+        shard_sheets = pandas.read_excel(
+            path,
+            sheet_name=None,
+            index_col=0,
+            keep_default_na=False,
+            engine="openpyxl",
+        )
+        renamed = {}
+
+        # MERGE THE PRIMERS WITH THE SAME SEQUENCE AS A PREVIOUS SHARD'S
+
+        shard_primers = OrderedDict()
+        for primer, sequence in shard_sheets["primer_sequences"]["sequence"].items():
+            if sequence in primer_ids:
+                renamed[primer] = primer_ids[sequence]
+                stats["merged_primers"] += 1
+            elif primer in sheets_indices["primer_sequences"]:
+                raise ValueError(
+                    "Primer %s of %s has another sequence in a previous shard, "
+                    "were the shards quoted with different id prefixes?"
+                    % (primer, path)
+                )
+            else:
+                primer_ids[sequence] = primer
+                shard_primers[primer] = sequence
+
+        # MERGE THE FRAGMENTS WITH THE SAME SEQUENCE AS A PREVIOUS SHARD'S
+
+        used_primers, replaced_fragments_primers = set(), set()
+        fragments = shard_sheets["fragment_extensions"]
+        for fragment_id, row in fragments.iterrows():
+            primers = rename_ids(row["primers"], renamed)
+            sequence = row["fragment_sequence"]
+            if sequence in fragment_ids:
+                renamed[fragment_id] = fragment_ids[sequence]
+                replaced_fragments_primers.update(primers.split(" + "))
+                stats["merged_fragments"] += 1
+            else:
+                fragment_ids[sequence] = fragment_id
+                used_primers.update(primers.split(" + "))
+                add_row(
+                    "fragment_extensions",
+                    [fragment_id, row["part"], primers, sequence],
+                )
+        for primer, sequence in shard_primers.items():
+            if (primer in replaced_fragments_primers) and (
+                primer not in used_primers
+            ):
+                del primer_ids[sequence]
+                stats["dropped_primers"] += 1
+            else:
+                add_row("primer_sequences", [primer, sequence])
+
+        # CONCATENATE THE PLANS AND THE OTHER SHEETS
+
+        for construct, row in shard_sheets["assembly_plan"].iterrows():
+            fragments = rename_ids(row["fragments"], renamed)
+            add_row("assembly_plan", [construct, row["method"], fragments])
+        for sheet_name, columns in SHEETS_COLUMNS.items():
+            if (sheet_name in MERGED_SHEETS) or (sheet_name not in shard_sheets):
+                continue
+            has_enzymes_sheet |= sheet_name == "golden_gate_enzymes"
+            for index, row in shard_sheets[sheet_name].iterrows():
+                add_row(sheet_name, [index] + [row[c] for c in columns[1:]])
+
+    # WRITE THE MERGED SPREADSHEET
+
+    sheets_rows["primer_sequences"].sort()
+    writer = pandas.ExcelWriter(target)
+    for sheet_name, columns in SHEETS_COLUMNS.items():
+        if (sheet_name == "golden_gate_enzymes") and not has_enzymes_sheet:
+            continue
+        records = [dict(zip(columns, row)) for row in sheets_rows[sheet_name]]
+        dataframe = pandas.DataFrame.from_records(
+            records, index=columns[0], columns=columns
+        )
+        dataframe.to_excel(writer, sheet_name=sheet_name)
+    writer.close()
+    return stats
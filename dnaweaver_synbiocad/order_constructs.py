@@ -0,0 +1,71 @@
+from collections import Counter
+import heapq
+
+
+def order_constructs(parts_per_construct):
+    """Order the constructs so that each one can reuse the plans before it.
+
+    Each construct is described by its part adjacencies (pairs of consecutive
+    parts, the construct being circular), which are where primers and
+    extended fragments are needed. The constructs are chained greedily: the
+    next construct is the one with the most adjacencies already found in the
+    constructs before it (whose primers and fragments are then in the reuse
+    libraries). Ties, and the start of the chain, go to the construct sharing
+    the fewest adjacencies with all the other constructs (its plan is the
+    least reusable, it is quoted first), then to the original order.
+
+    The scores are updated with an index of the constructs of each adjacency
+    when the adjacency is first found in the chain, and the next construct is
+    taken from a heap, so all constructs are ordered in
+    O(N_adjacencies.log(N_constructs)).
+
+    :param parts_per_construct: A dict {construct_id: [part_id_1,...]} with the parts in the order of the construct's sequence
+    :type parts_per_construct: dict
+
+    :rtype: list
+    :return: The list of all construct ids, in the quoting order
+    """
+    constructs = list(parts_per_construct)
+    adjacencies = []
+    for construct in constructs:
+        parts = parts_per_construct[construct]
+        adjacencies.append(
+            set(zip(parts, parts[1:] + parts[:1])) if len(parts) > 1 else set()
+        )
+    counts = Counter(a for adjacencies_set in adjacencies for a in adjacencies_set)
+    shared = [
+        sum(counts[a] - 1 for a in adjacencies_set) for adjacencies_set in adjacencies
+    ]
+
+    # Rank of each construct in the ties: the least shared first, in order
+    ranked = sorted(range(len(constructs)), key=lambda i: shared[i])
+    rank = {i: position for position, i in enumerate(ranked)}
+    # The constructs with each adjacency
+    postings = {}
+    for i in ranked:
+        for adjacency in adjacencies[i]:
+            postings.setdefault(adjacency, []).append(i)
+
+    # Number of adjacencies of each construct already found in the chain. The
+    # heap has an entry (-score, rank, i) per score of each construct, the
+    # entries with an outdated score are skipped
+    scores = [0] * len(constructs)
+    heap = [(0, rank[i], i) for i in ranked]
+    chained = [False] * len(constructs)
+    found_adjacencies = set()
+    order = []
+    while heap:
+        score, _, best = heapq.heappop(heap)
+        if chained[best] or (-score != scores[best]):
+            continue
+        chained[best] = True
+        order.append(best)
+        for adjacency in adjacencies[best]:
+            if adjacency in found_adjacencies:
+                continue
+            found_adjacencies.add(adjacency)
+            for i in postings[adjacency]:
+                if not chained[i]:
+                    scores[i] += 1
+                    heapq.heappush(heap, (-scores[i], rank[i], i))
+    return [constructs[i] for i in order]
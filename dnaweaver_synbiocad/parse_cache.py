@@ -0,0 +1,229 @@
+from collections.abc import Mapping
+import hashlib
+import json
+import mmap
+import os
+import struct
+import numpy as np
+from ._version import __version__
+
+# Start of the snapshot files, with the version of their format
+SNAPSHOT_MAGIC = b"DWSBOL01"
+
+
+class ParseCache:
+    """On-disk cache of the parsed SBOL files, shared between runs.
+
+    The parts sequences and the parts of each construct of a file are stored
+    in a binary snapshot (see ``write_design_snapshot``) in the cache
+    directory, under a key computed with ``compute_key`` from the file's
+    content. A snapshot is read with a memory map (see
+    ``read_design_snapshot``), which is much faster than parsing the SBOL
+    file again.
+
+    :param cache_dir: Path to the cache directory, created if needed
+    :type cache_dir: str
+    """
+
+    def __init__(self, cache_dir):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def compute_key(path):
+        """Return the key of a SBOL file: a digest of its content and the
+        versions of this package and of the snapshot format."""
+        digest = hashlib.sha256()
+        digest.update(SNAPSHOT_MAGIC + __version__.encode())
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(2 ** 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def snapshot_path(self, key):
+        return os.path.join(self.cache_dir, "design_%s.snapshot" % key)
+
+    def get(self, key):
+        """Return the (parts_sequences, parts_per_construct) stored, or None.
+
+        None is also returned for an invalid snapshot (for instance truncated
+        or corrupted), so the SBOL file is parsed again.
+        """
+        path = self.snapshot_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            return read_design_snapshot(path)
+        except (ValueError, KeyError, IndexError, TypeError, struct.error):
+            # json.JSONDecodeError and UnicodeDecodeError are ValueErrors
+            return None
+
+    def put(self, key, parts_sequences, parts_per_construct):
+        """Store the parsed data of a SBOL file under the key."""
+        path = self.snapshot_path(key)
+        # Written aside then renamed, so a snapshot is never read half-written
+        temporary_path = "%s.%d.tmp" % (path, os.getpid())
+        write_design_snapshot(temporary_path, parts_sequences, parts_per_construct)
+        os.replace(temporary_path, path)
+
+
+def write_design_snapshot(path, parts_sequences, parts_per_construct):
+    """Write the parsed data of a design in a memory-mappable binary file.
+
+    The file starts with ``SNAPSHOT_MAGIC``, the length of a JSON header and
+    the header (names of the parts and constructs, location of each
+    section), followed by the sections, 8-byte aligned:
+
+    - ``sequences``: all parts sequences, concatenated (ASCII).
+    - ``sequences_offsets``: the start of each part sequence (int64), and the
+      end of the last one.
+    - ``construct_parts``: the indices of the parts of all constructs, in
+      the constructs order (int32).
+    - ``construct_parts_offsets``: the start of each construct's parts in
+      ``construct_parts`` (int64), and the end of the last one.
+
+    :param path: Path to the snapshot file
+    :param parts_sequences: A dict {part_id: "ATTTGTGTGC..."}
+    :param parts_per_construct: A dict {construct_id: [part_id_1,...]}
+
+    :type path: str
+    :type parts_sequences: dict
+    :type parts_per_construct: dict
+    """
+    part_names = list(parts_sequences)
+    part_indices = {name: i for i, name in enumerate(part_names)}
+    # Parts without a sequence are also indexed, after the others
+    for parts in parts_per_construct.values():
+        for part in parts:
+            if part not in part_indices:
+                part_indices[part] = len(part_names)
+                part_names.append(part)
+    sequences = [str(parts_sequences[name]) for name in parts_sequences]
+    construct_parts = [
+        part_indices[part]
+        for parts in parts_per_construct.values()
+        for part in parts
+    ]
+    sections = [
+        (
+            "sequences",
+            np.frombuffer("".join(sequences).encode("ascii"), dtype=np.uint8),
+        ),
+        (
+            "sequences_offsets",
+            np.cumsum([0] + [len(s) for s in sequences], dtype=np.int64),
+        ),
+        ("construct_parts", np.array(construct_parts, dtype=np.int32)),
+        (
+            "construct_parts_offsets",
+            np.cumsum(
+                [0] + [len(parts) for parts in parts_per_construct.values()],
+                dtype=np.int64,
+            ),
+        ),
+    ]
+    header = dict(
+        part_names=part_names,
+        n_sequences=len(parts_sequences),
+        construct_names=list(parts_per_construct),
+        sections={},
+    )
+    offset = 0
+    for name, array in sections:
+        header["sections"][name] = [offset, array.dtype.str, len(array)]
+        offset += _aligned(array.nbytes)
+    header_data = json.dumps(header).encode()
+    start = _aligned(len(SNAPSHOT_MAGIC) + 8 + len(header_data))
+    with open(path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC + struct.pack("<Q", len(header_data)) + header_data)
+        f.write(b"\0" * (start - f.tell()))
+        for name, array in sections:
+            f.write(array.tobytes())
+            f.write(b"\0" * (_aligned(array.nbytes) - array.nbytes))
+
+
+def read_design_snapshot(path):
+    """Return the (parts_sequences, parts_per_construct) of a snapshot.
+
+    The file is memory-mapped: the parts of the constructs are read from the
+    map when they are requested (see ``SnapshotPartsPerConstruct``).
+
+    :param path: Path to a file written by ``write_design_snapshot``
+    :type path: str
+
+    :rtype: tuple
+    :return: A dict {part_id: "ATTTGTGTGC..."} and a mapping {construct_id:
+      [part_id_1,...]}, or None if the file is not a valid snapshot.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < len(SNAPSHOT_MAGIC) + 8:
+            return None
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic_end = len(SNAPSHOT_MAGIC)
+    if data[:magic_end] != SNAPSHOT_MAGIC:
+        return None
+    (header_length,) = struct.unpack("<Q", data[magic_end : magic_end + 8])
+    header_end = magic_end + 8 + header_length
+    header = json.loads(data[magic_end + 8 : header_end].decode())
+    start = _aligned(header_end)
+    arrays = {
+        name: np.frombuffer(data, dtype=dtype, count=count, offset=start + offset)
+        for name, (offset, dtype, count) in header["sections"].items()
+    }
+    part_names = header["part_names"]
+    sequences_start = start + header["sections"]["sequences"][0]
+    offsets = arrays["sequences_offsets"].tolist()
+    parts_sequences = {
+        name: data[sequences_start + offsets[i] : sequences_start + offsets[i + 1]]
+        .decode("ascii")
+        for i, name in enumerate(part_names[: header["n_sequences"]])
+    }
+    parts_per_construct = SnapshotPartsPerConstruct(
+        construct_names=header["construct_names"],
+        part_names=part_names,
+        construct_parts=arrays["construct_parts"],
+        construct_parts_offsets=arrays["construct_parts_offsets"],
+    )
+    return parts_sequences, parts_per_construct
+
+
+class SnapshotPartsPerConstruct(Mapping):
+    """Read-only mapping {construct_id: [part_id_1,...]} over a snapshot.
+
+    The parts of a construct are read from the snapshot's arrays (which may
+    be memory-mapped) only when requested.
+
+    :param construct_names: The construct ids, in order
+    :param part_names: The part ids, by index
+    :param construct_parts: The parts indices of all constructs
+    :param construct_parts_offsets: The start of each construct's parts in ``construct_parts``, and the end of the last one
+
+    :type construct_names: list
+    :type part_names: list
+    :type construct_parts: numpy.ndarray
+    :type construct_parts_offsets: numpy.ndarray
+    """
+
+    def __init__(
+        self, construct_names, part_names, construct_parts, construct_parts_offsets
+    ):
+        self.construct_names = construct_names
+        self.construct_indices = {name: i for i, name in enumerate(construct_names)}
+        self.part_names = part_names
+        self.construct_parts = construct_parts
+        self.construct_parts_offsets = construct_parts_offsets
+
+    def __getitem__(self, construct_id):
+        i = self.construct_indices[construct_id]
+        start, end = self.construct_parts_offsets[i : i + 2]
+        return [self.part_names[p] for p in self.construct_parts[start:end].tolist()]
+
+    def __iter__(self):
+        return iter(self.construct_names)
+
+    def __len__(self):
+        return len(self.construct_names)
+
+
+def _aligned(size, alignment=8):
+    return alignment * ((size + alignment - 1) // alignment)
@@ -0,0 +1,89 @@
+import dnaweaver as dw
+
+
+def find_part_boundaries(parts, part_sequences, sequence):
+    """Return the start positions of a construct's parts in its sequence.
+
+    The sequence of a construct is the concatenation of its parts' sequences
+    in the order of the parts names (see ``get_assembly_plan_from_sbol``).
+    This is checked here, so the boundaries returned are always exact.
+
+    :param parts: The list of the construct's part ids
+    :param part_sequences: A dict {part_id: "ATGC..."} of the parts sequences
+    :param sequence: The construct's sequence (a string or a ``ConstructSequence``)
+
+    :type parts: list
+    :type part_sequences: dict
+    :type sequence: str
+
+    :rtype: list
+    :return: The list of the positions of the parts' starts (the first one is
+      0), or None if the sequence is not the concatenation of the parts.
+    """
+    sequence = str(sequence)
+    boundaries, position = [], 0
+    for part in sorted(parts):
+        part_sequence = str(part_sequences[part])
+        if not sequence.startswith(part_sequence, position):
+            return None
+        boundaries.append(position)
+        position += len(part_sequence)
+    if position != len(sequence):
+        return None
+    return boundaries
+
+
+def rotate_part_boundaries(boundaries, shift, sequence_length):
+    """Return the part boundaries in the sequence rotated by ``shift``."""
+    return sorted(set((b - shift) % sequence_length for b in boundaries))
+
+
+class PartBoundaryAssemblyStation(dw.DnaAssemblyStation):
+    """DnaAssemblyStation cutting only near the known part boundaries.
+
+    When the sequence to assemble is a ``SequenceString`` whose metadata
+    gives its ``part_boundaries`` (a list of positions), the cuts are only
+    searched at these boundaries, within ``boundary_window`` nucleotides,
+    and at the cuts suggested by the suppliers (such as the ends of reused
+    fragments): the regular grid of cuts every ``coarse_grain`` nucleotides
+    is not used. Other sequences are assembled as by
+    ``dnaweaver.DnaAssemblyStation``.
+
+    :param boundary_window: Distance from the part boundaries up to which cuts are searched (Default: 0)
+
+    :type boundary_window: int
+
+    Other parameters are those of ``dnaweaver.DnaAssemblyStation``.
+    """
+
+    def __init__(self, *args, boundary_window=0, **kwargs):
+        dw.DnaAssemblyStation.__init__(self, *args, **kwargs)
+        self.boundary_window = boundary_window
+
+    def compute_suggested_cuts(self, sequence):
+        suggested_cuts = dw.DnaAssemblyStation.compute_suggested_cuts(self, sequence)
+        boundaries = get_part_boundaries(sequence)
+        if boundaries is None:
+            return suggested_cuts
+        L = len(sequence)
+        window = range(-self.boundary_window, self.boundary_window + 1)
+        boundary_cuts = set(
+            boundary + offset
+            for boundary in boundaries
+            for offset in window
+            if 0 <= boundary + offset <= L
+        )
+        return sorted(boundary_cuts.union(suggested_cuts))
+
+    def get_assembly_plan_for_sequence(self, sequence, coarse_grain=1, **kwargs):
+        if get_part_boundaries(sequence) is not None:
+            # A grain longer than the sequence leaves only the suggested cuts
+            coarse_grain = len(sequence) + 1
+        return dw.DnaAssemblyStation.get_assembly_plan_for_sequence(
+            self, sequence, coarse_grain=coarse_grain, **kwargs
+        )
+
+
+def get_part_boundaries(sequence):
+    """Return the part boundaries in a sequence's metadata, or None."""
+    return getattr(sequence, "metadata", {}).get("part_boundaries")
@@ -0,0 +1,102 @@
+from collections import defaultdict
+import dnaweaver as dw
+from dnaweaver.biotools import largest_common_substring
+from .kmer_index import KmerIndex
+
+
+class IndexedPcrExtractionStation(dw.PcrExtractionStation):
+    """PcrExtractionStation finding the parts of a fragment with an index.
+
+    DNA Weaver's station compares each fragment with every part of the
+    collection. This station builds a ``KmerIndex`` of the parts (both
+    strands) once, so only the parts sharing a k-mer with the fragment are
+    compared. The hits are the same as with ``dnaweaver.PcrExtractionStation``,
+    plus the parts in which the fragment is found on the reverse strand.
+
+    Fragments too short to use the index are compared with all the parts.
+
+    :param sequences: A dictionary {part_id: "ATGCGC..."} of the parts
+    :param kmer_size: Size of the indexed k-mers (Default: 16)
+    :param kmer_step: Distance between two indexed k-mers of a part (Default: 8)
+
+    :type sequences: dict
+    :type kmer_size: int
+    :type kmer_step: int
+
+    Other parameters are those of ``dnaweaver.PcrExtractionStation``.
+    """
+
+    def __init__(self, name, sequences, kmer_size=16, kmer_step=8, **kwargs):
+        dw.PcrExtractionStation.__init__(
+            self, name=name, sequences=sequences, **kwargs
+        )
+        self.strands_sequences = {}
+        for part_id, sequence in sequences.items():
+            sequence = str(sequence)
+            self.strands_sequences[(part_id, 1)] = sequence
+            self.strands_sequences[(part_id, -1)] = dw.reverse_complement(sequence)
+        self.kmer_index = KmerIndex(
+            self.strands_sequences, k=kmer_size, step=kmer_step
+        )
+        self.parts_by_prefix = defaultdict(list)
+        self.short_parts = []
+        for part_id, sequence in sequences.items():
+            if len(sequence) >= kmer_size:
+                self.parts_by_prefix[sequence[:kmer_size]].append(part_id)
+            else:
+                self.short_parts.append(part_id)
+
+    def _get_hits(self, sequence):
+        """Return the hits of the sequence in the parts, on both strands.
+
+        The format is [(part_id, (start, end), None)] as in DNA Weaver, with
+        (start, end) the location of the match in the sequence. A part gives
+        at most one hit, on its reverse strand only when there is no match on
+        its forward strand.
+        """
+        sequence = str(sequence)
+        # largest_common_substring requires the center of the sequence to
+        # be fully contained in the part.
+        overhang = min(self.max_overhang_length, int(len(sequence) / 2))
+        center = sequence[overhang : len(sequence) - overhang]
+        candidates = self.kmer_index.find_candidates(center)
+        if candidates is None:
+            candidates = list(self.strands_sequences)
+        result = []
+        found_parts = set()
+        for part_id, strand in candidates:
+            if part_id in found_parts:
+                continue
+            match_coords = largest_common_substring(
+                sequence,
+                self.strands_sequences[(part_id, strand)],
+                self.max_overhang_length,
+            )
+            if match_coords:
+                found_parts.add(part_id)
+                result.append((part_id, match_coords, None))
+        return result
+
+    def suggest_cuts(self, sequence):
+        """Return the locations of the parts' ends in the sequence.
+
+        As in DNA Weaver, only the first occurrence of each part is used.
+        """
+        sequence = str(sequence)
+        k = self.kmer_index.k
+        suggested_cuts = set()
+        found_parts = set()
+        for index in range(len(sequence) - k + 1):
+            for part_id in self.parts_by_prefix.get(sequence[index : index + k], ()):
+                if part_id in found_parts:
+                    continue
+                part_sequence = self.sequences[part_id]
+                if sequence.startswith(part_sequence, index):
+                    found_parts.add(part_id)
+                    suggested_cuts.update([index, index + len(part_sequence)])
+        for part_id in self.short_parts:
+            part_sequence = self.sequences[part_id]
+            index = sequence.find(part_sequence)
+            if index >= 0:
+                suggested_cuts.update([index, index + len(part_sequence)])
+        return sorted(suggested_cuts)
@@ -0,0 +1,107 @@
+import dnaweaver as dw
+from .golden_gate_enzymes import GOLDEN_GATE_ENZYMES
+
+# Sites closer than this to the ends of a linear sequence may have their cut
+# outside of the sequence, in which case DNA Weaver does not report them.
+SITE_END_MARGIN = 10
+
+
+def plan_origin_shifts(
+    sequence, assembly_method, n_shifts=5, enzymes=GOLDEN_GATE_ENZYMES
+):
+    """Return the origin shifts of a circular construct worth a full quote.
+
+    In DNA Weaver the position 0 of a circular sequence is always a cut, so
+    the constructs are rotated by a few nucleotides when no plan is found.
+    This screens each candidate origin once, before any quote:
+
+    - Gibson assembly accepts any origin.
+    - Golden Gate assembly with a given enzyme is impossible if the 4bp
+      overhang around the origin is palindromic, or if the rotated sequence
+      contains the enzyme's site (away from the sequence ends, where DNA
+      Weaver may not report it).
+
+    An origin is kept if at least one of the assembly methods passes the
+    screening, so the shifts skipped are always shifts which would have been
+    rejected by a full quote.
+
+    :param sequence: The circular sequence of the construct
+    :param assembly_method: Either "gibson", "golden_gate", or "any_method"
+    :param n_shifts: Number of origin positions considered (Default: 5)
+    :param enzymes: The Golden Gate enzymes of the supply network (Default: BsmBI, BsaI and BbsI)
+
+    :type sequence: str
+    :type assembly_method: str
+    :type n_shifts: int
+    :type enzymes: list
+
+    :rtype: list
+    :return: The list of the shifts (between 0 and n_shifts - 1) to quote, in
+      the order in which they should be tried.
+    """
+    shifts = list(range(min(n_shifts, len(sequence))))
+    if assembly_method in ["gibson", "any_method"]:
+        return shifts
+    sequence = str(sequence).upper()
+    L = len(sequence)
+
+    # LOCATE ALL ENZYME SITES (BOTH STRANDS) IN THE CIRCULAR SEQUENCE, ONCE
+
+    circular_sequence = sequence + sequence[: max(n_shifts, 10) + 10]
+    enzymes_sites = {}
+    for enzyme in enzymes:
+        site = dw.GoldenGateAssemblyMethod.enzymes_dict[enzyme]
+        enzymes_sites[enzyme] = [
+            (start, start + len(site))
+            for pattern in set([site, dw.reverse_complement(site)])
+            for start in _find_all(circular_sequence, pattern)
+            if start < L
+        ]
+
+    # KEEP THE SHIFTS FOR WHICH AT LEAST ONE ENZYME PASSES THE SCREENING
+
+    planned_shifts = []
+    for shift in shifts:
+        overhang = (sequence[-2:] + sequence + sequence[:2])[shift : shift + 4]
+        if overhang == dw.reverse_complement(overhang):
+            continue
+        if all(
+            site_in_linear_sequence(sites, shift, L)
+            for sites in enzymes_sites.values()
+        ):
+            continue
+        planned_shifts.append(shift)
+    return planned_shifts
+
+
+def site_in_linear_sequence(sites, shift, sequence_length):
+    """Return True if a site is in the circular sequence rotated by ``shift``.
+
+    :param sites: A list of the (start, end) of the sites in the circular sequence, with 0 <= start < sequence_length
+    :param shift: The origin of the linear sequence
+    :param sequence_length: Length of the circular sequence
+
+    :type sites: list
+    :type shift: int
+    :type sequence_length: int
+
+    :rtype: bool
+    :return: True if a site is fully in the linear sequence, at least
+      ``SITE_END_MARGIN`` nucleotides away from its ends.
+    """
+    for start, end in sites:
+        if start < shift:
+            start, end = start + sequence_length, end + sequence_length
+        if (start >= shift + SITE_END_MARGIN) and (
+            end <= shift + sequence_length - SITE_END_MARGIN
+        ):
+            return True
+    return False
+
+
+def _find_all(sequence, pattern):
+    """Return all start positions of a pattern in a sequence."""
+    start = sequence.find(pattern)
+    while start != -1:
+        yield start
+        start = sequence.find(pattern, start + 1)
@@ -0,0 +1,179 @@
+from functools import lru_cache
+import hashlib
+import importlib
+import inspect
+import os
+import pickle
+import sqlite3
+import time
+import dnaweaver
+from ._version import __version__
+
+# Version of the format of the cached plans, to increase when the plans change
+# for a reason not seen in the source code of the plan modules below (e.g. a
+# change in the data cached or in the way the keys are computed)
+CACHE_FORMAT = 1
+
+# The modules building the plans, and the functions of
+# compute_all_construct_quotes finding a plan: the keys depend on their source
+PLAN_MODULES = [
+    "generate_supply_network",
+    "reuse_library",
+    "segment_selectors",
+    "pcr_extraction_station",
+    "part_boundary_assembly_station",
+    "plan_origin_shifts",
+    "sequence_store",
+    "detach_quote",
+]
+PLAN_FUNCTIONS = ["find_construct_plan"]
+
+
+class QuoteCache:
+    """On-disk cache of construct plans, shared between runs.
+
+    The plans are stored in an SQLite database in the cache directory, under
+    a key computed with ``compute_key``. When the total size of the stored
+    plans exceeds ``max_size``, the least recently used plans are evicted.
+
+    A plan names its primers and fragments after the construct's position in
+    the run, and reuses the primers and fragments of the constructs quoted
+    before it: its key covers this position and all the products available
+    for reuse. A construct's plan is therefore found again only when the run
+    is the same up to this construct (same constructs, in the same order,
+    with the same plans). Once a construct is added, removed or changed, the
+    plans of all the constructs after it are quoted again.
+
+    :param cache_dir: Path to the cache directory, created if needed
+    :param max_size: Maximal size of the stored plans, in bytes (Default: 1GB)
+
+    :type cache_dir: str
+    :type max_size: int
+    """
+
+    filename = "quotes.sqlite"
+
+    def __init__(self, cache_dir, max_size=2 ** 30):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, self.filename)
+        self.max_size = max_size
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS plans ("
+            "key TEXT PRIMARY KEY, value BLOB, size INTEGER, last_access REAL)"
+        )
+        self.connection.commit()
+
+    @staticmethod
+    def compute_key(
+        sequence, assembly_method, id_prefix, reuse_state, network_options=()
+    ):
+        """Return the key of a construct plan.
+
+        :param sequence: The construct's sequence
+        :param assembly_method: Either "gibson", "golden_gate", or "any_method"
+        :param id_prefix: Prefix of the ids given to the plan's primers and fragments, which depends on the construct's position in the run
+        :param reuse_state: A digest of all the primers and fragments available for reuse (see ``update_reuse_state``)
+        :param network_options: The names of the options enabled in the supply network (Default: none)
+
+        :type sequence: str
+        :type assembly_method: str
+        :type id_prefix: str
+        :type reuse_state: str
+        :type network_options: list
+
+        :rtype: str
+        :return: A hexadecimal SHA-256 digest, which also depends on the
+          versions of this package and DNA Weaver, on ``CACHE_FORMAT`` and
+          on the source code building the plans (see ``PLAN_MODULES``).
+        """
+        fields = [
+            __version__,
+            dnaweaver.__version__,
+            str(CACHE_FORMAT),
+            _plan_signature(),
+            assembly_method,
+            id_prefix,
+            reuse_state,
+            ",".join(sorted(network_options)),
+            str(sequence),
+        ]
+        return hashlib.sha256("\n".join(fields).encode()).hexdigest()
+
+    def get(self, key):
+        """Return the plan stored under the key, or None."""
+        row = self.connection.execute(
+            "SELECT value FROM plans WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self.connection.execute(
+            "UPDATE plans SET last_access = ? WHERE key = ?", (time.time(), key)
+        )
+        self.connection.commit()
+        return pickle.loads(row[0])
+
+    def put(self, key, value):
+        """Store a (picklable) plan under the key, evict old plans if needed."""
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO plans VALUES (?, ?, ?, ?)",
+            (key, sqlite3.Binary(data), len(data), time.time()),
+        )
+        self.connection.commit()
+        self.evict()
+
+    def evict(self):
+        """Delete the least recently used plans until under ``max_size``."""
+        (total_size,) = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM plans"
+        ).fetchone()
+        if total_size <= self.max_size:
+            return
+        rows = self.connection.execute(
+            "SELECT key, size FROM plans ORDER BY last_access"
+        ).fetchall()
+        evicted = []
+        for key, size in rows:
+            if total_size <= self.max_size:
+                break
+            evicted.append((key,))
+            total_size -= size
+        self.connection.executemany("DELETE FROM plans WHERE key = ?", evicted)
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+def update_reuse_state(reuse_state, new_products):
+    """Return the digest of the reuse state after new products are added.
+
+    :param reuse_state: The current digest ("" for an empty state)
+    :param new_products: A list of (library_name, product_id, sequence)
+
+    :type reuse_state: str
+    :type new_products: list
+
+    :rtype: str
+    """
+    if not new_products:
+        return reuse_state
+    digest = hashlib.sha256(reuse_state.encode())
+    for library_name, product_id, sequence in new_products:
+        digest.update(("\n%s:%s:%s" % (library_name, product_id, sequence)).encode())
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _plan_signature():
+    """Return a digest of the source code of the modules building the plans."""
+    digest = hashlib.sha256()
+    for module_name in PLAN_MODULES:
+        module = importlib.import_module("." + module_name, __package__)
+        digest.update(inspect.getsource(module).encode())
+    # Imported here: compute_all_construct_quotes imports this module
+    module = importlib.import_module(".compute_all_construct_quotes", __package__)
+    for function_name in PLAN_FUNCTIONS:
+        digest.update(inspect.getsource(getattr(module, function_name)).encode())
+    return digest.hexdigest()
@@ -0,0 +1,351 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import datetime
+import multiprocessing
+import os
+import tempfile
+import threading
+import uuid
+import proglog
+from flask import Flask, request, send_file
+from flask_restful import Api, Resource
+
+ASSEMBLY_METHODS = ["gibson", "golden_gate", "any_method"]
+
+
+class JobQueue:
+    """Queue of assembly planning jobs run on a pool of warm processes.
+
+    The worker processes are started with the queue, and import the
+    planner's dependencies (pandas, sbol2, dnaweaver...) right away, so that
+    the jobs do not pay for it. Each job quotes all the constructs of an
+    uploaded SBOL file in one worker, and writes the output spreadsheet in
+    its own directory of ``jobs_dir``. The workers report the number of
+    constructs quoted through a queue, read by a thread of the service.
+
+    :param jobs_dir: Directory where the inputs and outputs of the jobs are written (Default: None, a temporary directory)
+    :param n_workers: Number of worker processes, i.e. of jobs run at the same time (Default: 2)
+
+    :type jobs_dir: str
+    :type n_workers: int
+    """
+
+    def __init__(self, jobs_dir=None, n_workers=2):
+        if jobs_dir is None:
+            jobs_dir = tempfile.mkdtemp(prefix="dnaweaver_jobs_")
+        os.makedirs(jobs_dir, exist_ok=True)
+        self.jobs_dir = jobs_dir
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+        # Forking a process with threads is unsafe, the workers are spawned
+        context = multiprocessing.get_context("spawn")
+        self.progress_queue = context.Queue()
+        self.executor = ProcessPoolExecutor(
+            n_workers,
+            mp_context=context,
+            initializer=_init_job_worker,
+            initargs=(self.progress_queue,),
+        )
+        for _ in range(n_workers):
+            self.executor.submit(_warm_up_worker)
+        self.progress_thread = threading.Thread(
+            target=self._read_progress, daemon=True
+        )
+        self.progress_thread.start()
+
+    def submit(
+        self, sbol_data, assembly_method, max_constructs=None, construct_timeout=None
+    ):
+        """Queue a job, return its ID.
+
+        :param sbol_data: Content of the SBOL file of the designs
+        :param assembly_method: Either "gibson", "golden_gate", or "any_method"
+        :param max_constructs: Maximal number of constructs (Default: None)
+        :param construct_timeout: Time budget for each construct, in seconds (Default: None)
+
+        :type sbol_data: bytes
+        :type assembly_method: str
+        :type max_constructs: int
+        :type construct_timeout: float
+
+        :rtype: str
+        """
+        if assembly_method not in ASSEMBLY_METHODS:
+            raise ValueError(
+                "Unknown assembly method %s, use one of %s"
+                % (assembly_method, ASSEMBLY_METHODS)
+            )
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self.jobs_dir, job_id)
+        os.makedirs(job_dir)
+        input_path = os.path.join(job_dir, "input.xml")
+        with open(input_path, "wb") as f:
+            f.write(sbol_data)
+        output_path = os.path.join(job_dir, "output.xlsx")
+        with self.lock:
+            self.jobs[job_id] = OrderedDict(
+                [
+                    ("id", job_id),
+                    ("status", "queued"),
+                    ("assembly_method", assembly_method),
+                    ("submitted", datetime.datetime.now().isoformat()),
+                    ("constructs_done", 0),
+                    ("constructs", None),
+                    ("stats", None),
+                    ("error", None),
+                ]
+            )
+        future = self.executor.submit(
+            _run_job,
+            job_id,
+            input_path,
+            output_path,
+            assembly_method,
+            max_constructs,
+            construct_timeout,
+        )
+        future.add_done_callback(
+            lambda future: self._finish_job(job_id, output_path, future)
+        )
+        return job_id
+
+    def get(self, job_id):
+        """Return a copy of the record of a job, or None if it is unknown."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return None if job is None else OrderedDict(job)
+
+    def list(self):
+        """Return a copy of the records of all jobs, oldest first."""
+        with self.lock:
+            return [OrderedDict(job) for job in self.jobs.values()]
+
+    def result_path(self, job_id):
+        """Return the path of the output spreadsheet of a finished job, or None."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if (job is None) or (job["status"] != "done"):
+                return None
+            return job["output_path"]
+
+    def _finish_job(self, job_id, output_path, future):
+        with self.lock:
+            job = self.jobs[job_id]
+            error = future.exception()
+            if error is None:
+                job["status"] = "done"
+                job["stats"] = future.result()
+                job["output_path"] = output_path
+                if job["constructs"] is not None:
+                    job["constructs_done"] = job["constructs"]
+            else:
+                job["status"] = "failed"
+                job["error"] = "%s: %s" % (type(error).__name__, error)
+
+    def _read_progress(self):
+        while True:
+            message = self.progress_queue.get()
+            if message is None:
+                return
+            job_id, constructs_done, constructs = message
+            with self.lock:
+                job = self.jobs.get(job_id)
+                if (job is None) or (job["status"] in ["done", "failed"]):
+                    continue
+                job["status"] = "running"
+                job["constructs_done"] = constructs_done
+                if constructs is not None:
+                    job["constructs"] = constructs
+
+    def shutdown(self):
+        """Stop the workers once the running jobs are finished."""
+        self.executor.shutdown(wait=True)
+        self.progress_queue.put(None)
+        self.progress_thread.join()
+
+
+def create_app(job_queue):
+    """Return the Flask application of the REST service.
+
+    Endpoints:
+
+    - ``POST /jobs``: queue a job. The SBOL file is uploaded as the ``sbol``
+      file field, with the ``assembly_method`` form field and the optional
+      ``max_constructs`` and ``construct_timeout``. Returns the job record
+      (with its ``id``), status 202.
+    - ``GET /jobs``: the records of all jobs.
+    - ``GET /jobs/<id>``: the record of a job, with its ``status`` (queued,
+      running, done or failed), ``constructs_done`` out of ``constructs``,
+      and the ``stats`` of the run or the ``error``.
+    - ``GET /jobs/<id>/result``: the output spreadsheet of a finished job.
+
+    :param job_queue: The queue where the jobs are run
+    :type job_queue: JobQueue
+
+    :rtype: flask.Flask
+    """
+    app = Flask(__name__)
+    api = Api(app)
+
+    def public_record(job):
+        job.pop("output_path", None)
+        return job
+
+    class Jobs(Resource):
+        def get(self):
+            return [public_record(job) for job in job_queue.list()]
+
+        def post(self):
+            if "sbol" not in request.files:
+                return {"message": "Missing SBOL file upload 'sbol'"}, 400
+            form = request.form
+            try:
+                job_id = job_queue.submit(
+                    request.files["sbol"].read(),
+                    assembly_method=form.get("assembly_method", "any_method"),
+                    max_constructs=form.get("max_constructs", None, type=int),
+                    construct_timeout=form.get("construct_timeout", None, type=float),
+                )
+            except ValueError as err:
+                return {"message": str(err)}, 400
+            return public_record(job_queue.get(job_id)), 202
+
+    class Job(Resource):
+        def get(self, job_id):
+            job = job_queue.get(job_id)
+            if job is None:
+                return {"message": "Unknown job %s" % job_id}, 404
+            return public_record(job)
+
+    class JobResult(Resource):
+        def get(self, job_id):
+            job = job_queue.get(job_id)
+            if job is None:
+                return {"message": "Unknown job %s" % job_id}, 404
+            path = job_queue.result_path(job_id)
+            if path is None:
+                return {"message": "Job %s is %s" % (job_id, job["status"])}, 409
+            return send_file(
+                path,
+                as_attachment=True,
+                download_name="%s.xlsx" % job_id,
+            )
+
+    api.add_resource(Jobs, "/jobs")
+    api.add_resource(Job, "/jobs/<string:job_id>")
+    api.add_resource(JobResult, "/jobs/<string:job_id>/result")
+    return app
+
+
+# WORKER PROCESSES
+
+_worker_progress_queue = None
+
+
+class _JobProgressLogger(proglog.ProgressBarLogger):
+    """Send the index of the constructs bar to the service."""
+
+    def __init__(self, job_id):
+        proglog.ProgressBarLogger.__init__(self)
+        self.job_id = job_id
+
+    def bars_callback(self, bar, attr, value, old_value=None):
+        if (bar == "construct") and (attr == "index"):
+            total = self.bars[bar]["total"]
+            _worker_progress_queue.put((self.job_id, value, total))
+
+
+def _init_job_worker(progress_queue):
+    global _worker_progress_queue
+    _worker_progress_queue = progress_queue
+    # Import the heavy dependencies (pandas, sbol2...) once for all the jobs:
+    # the package and its parser only import them when they are used
+    import dnaweaver  # noqa: F401
+    import pandas  # noqa: F401
+    import sbol2  # noqa: F401
+    from . import (  # noqa: F401
+        compute_all_construct_quotes,
+        get_assembly_plan_from_sbol,
+        screen_golden_gate_enzymes,
+        write_output_spreadsheet,
+    )
+
+
+def _warm_up_worker():
+    """Task making the pool start a worker (which imports the planner)."""
+    return os.getpid()
+
+
+def _run_job(
+    job_id, input_path, output_path, assembly_method, max_constructs, construct_timeout
+):
+    """Plan the assembly of all constructs of a SBOL file, return the stats."""
+    from . import (
+        get_assembly_plan_from_sbol,
+        screen_golden_gate_enzymes,
+        compute_all_construct_quotes,
+        write_output_spreadsheet,
+    )
+
+    _worker_progress_queue.put((job_id, 0, None))
+    part_sequences, construct_parts, construct_sequences = (
+        get_assembly_plan_from_sbol(path=input_path)
+    )
+    enzymes_compatibility = None
+    if assembly_method in ["golden_gate", "any_method"]:
+        enzymes_compatibility = screen_golden_gate_enzymes(
+            construct_sequences, names=list(construct_sequences)[:max_constructs]
+        )
+    stats = OrderedDict()
+    quotes, primer_sequences, fragment_quotes, errors = compute_all_construct_quotes(
+        construct_sequences=construct_sequences,
+        part_sequences=part_sequences,
+        assembly_method=assembly_method,
+        logger=_JobProgressLogger(job_id),
+        max_constructs=max_constructs,
+        stats=stats,
+        construct_timeout=construct_timeout,
+        enzymes_compatibility=enzymes_compatibility,
+    )
+    write_output_spreadsheet(
+        quotes=quotes,
+        primer_sequences=primer_sequences,
+        part_sequences=part_sequences,
+        fragment_quotes=fragment_quotes,
+        construct_parts=construct_parts,
+        construct_sequences=construct_sequences,
+        errors=errors,
+        target=output_path,
+        enzymes_compatibility=enzymes_compatibility,
+    )
+    stats["valid_plans"] = len(quotes)
+    return dict(stats)
+
+
+def serve(host="127.0.0.1", port=8080, jobs_dir=None, n_workers=2):
+    """Run the REST service until interrupted (see ``create_app``)."""
+    job_queue = JobQueue(jobs_dir=jobs_dir, n_workers=n_workers)
+    app = create_app(job_queue)
+    try:
+        app.run(host=host, port=port, threaded=True)
+    finally:
+        job_queue.shutdown()
+
+
+if __name__ == "__main__":
+    # The workers must find the jobs functions in the package's module, not
+    # in __main__
+    from dnaweaver_synbiocad.Args import build_service_args_parser
+    from dnaweaver_synbiocad import rest_service
+
+    parser = build_service_args_parser(
+        prog="python -m dnaweaver_synbiocad.rest_service",
+        description="Serve the assembly planner as a local REST service",
+    )
+    args = parser.parse_args()
+    rest_service.serve(
+        host=args.host,
+        port=args.port,
+        jobs_dir=args.jobs_dir,
+        n_workers=args.workers,
+    )
@@ -0,0 +1,154 @@
+import hashlib
+import dnaweaver as dw
+from dnaweaver.DnaQuote import DnaQuote
+
+# Length of the 3' end of the primers indexed for the near matches
+PRIMER_SEED_LENGTH = 15
+
+
+class ReuseLibrary(dw.PartsLibrary):
+    """Parts library which can be extended with new parts after creation.
+
+    Used for the primers and fragments of previous assemblies, which are
+    added one construct after the other. The ``state`` attribute is a digest
+    of the parts added so far, in order: libraries which received the same
+    parts have the same state.
+    """
+
+    def __init__(self, name, parts_dict=None):
+        dw.PartsLibrary.__init__(self, name=name, parts_dict=dict(parts_dict or {}))
+        self.state = ""
+        for part_id, sequence in self.parts_dict.items():
+            self._update_state(part_id, sequence)
+
+    def add_part(self, part_id, sequence):
+        """Add a new part to the library, available for the next quotes."""
+        self.parts_dict[part_id] = sequence
+        self.inverted_parts_dict[sequence] = part_id
+        self.sequences_set.add(sequence)
+        self._update_state(part_id, sequence)
+
+    def _update_state(self, part_id, sequence):
+        new_part = "%s\n%s:%s" % (self.state, part_id, sequence)
+        self.state = hashlib.sha1(new_part.encode()).hexdigest()
+
+
+class IndexedReuseLibrary(ReuseLibrary):
+    """Reuse library indexed by sequence, reverse complement and 3' seed.
+
+    A quote is a hash lookup of the requested sequence, whatever the number
+    of parts in the library:
+
+    - With ``reverse_complement=True`` (for double-stranded parts such as
+      PCR fragments), a part is also found by its reverse complement.
+    - With ``near_matches=True`` (for primers), a part is also found if it
+      ends with the requested sequence and is at most ``max_extension``
+      nucleotides longer: the 3' end, which anneals, is the same and the
+      5' end is extended. The parts are indexed by their last
+      ``PRIMER_SEED_LENGTH`` nucleotides, so only the few parts sharing the
+      seed of the requested sequence are compared with it.
+
+    When several parts match, the exact match is preferred, then the
+    reverse complement, then the shortest near match (the earliest part in
+    case of a tie).
+
+    If ``lookups`` is set to a dict, the ``find_part`` result of each
+    sequence quoted is recorded in it.
+
+    :param name: Name of the library
+    :param parts_dict: A dict {part_id: "ATGC..."} of the initial parts (Default: None)
+    :param reverse_complement: If True, find the parts by their reverse complement too (Default: False)
+    :param near_matches: If True, find the parts ending with the requested sequence (Default: False)
+    :param max_extension: Maximal number of extra 5' nucleotides of a near match (Default: 20)
+
+    :type name: str
+    :type parts_dict: dict
+    :type reverse_complement: bool
+    :type near_matches: bool
+    :type max_extension: int
+    """
+
+    def __init__(
+        self,
+        name,
+        parts_dict=None,
+        reverse_complement=False,
+        near_matches=False,
+        max_extension=20,
+    ):
+        self.reverse_complement = reverse_complement
+        self.near_matches = near_matches
+        self.max_extension = max_extension
+        self.seeds_index = {}
+        self.lookups = None
+        ReuseLibrary.__init__(self, name=name, parts_dict=parts_dict)
+        # The first part of a sequence is the one reused (as with add_part)
+        self.inverted_parts_dict = {}
+        for part_id, sequence in self.parts_dict.items():
+            self._index_part(part_id, sequence)
+
+    def add_part(self, part_id, sequence):
+        """Add a new part to the library, available for the next quotes."""
+        self.parts_dict[part_id] = sequence
+        self._index_part(part_id, sequence)
+        self._update_state(part_id, sequence)
+
+    def _index_part(self, part_id, sequence):
+        sequence = str(sequence)
+        self.inverted_parts_dict.setdefault(sequence, part_id)
+        self.sequences_set.add(sequence)
+        if self.near_matches and (len(sequence) >= PRIMER_SEED_LENGTH):
+            seed = sequence[-PRIMER_SEED_LENGTH:]
+            self.seeds_index.setdefault(seed, []).append(part_id)
+
+    def find_part(self, sequence):
+        """Return the (part_id, match) of the part to reuse for a sequence.
+
+        ``match`` is either "exact", "reverse_complement" or "near_match".
+        If no part matches, ``(None, None)`` is returned.
+        """
+        sequence = str(sequence)
+        part_id = self.inverted_parts_dict.get(sequence)
+        if part_id is not None:
+            return part_id, "exact"
+        if self.reverse_complement:
+            part_id = self.inverted_parts_dict.get(dw.reverse_complement(sequence))
+            if part_id is not None:
+                return part_id, "reverse_complement"
+        if self.near_matches and (len(sequence) >= PRIMER_SEED_LENGTH):
+            candidates = [
+                (len(self.parts_dict[part_id]), i, part_id)
+                for i, part_id in enumerate(
+                    self.seeds_index.get(sequence[-PRIMER_SEED_LENGTH:], [])
+                )
+                if str(self.parts_dict[part_id]).endswith(sequence)
+                and len(self.parts_dict[part_id]) - len(sequence)
+                <= self.max_extension
+            ]
+            if candidates:
+                return min(candidates)[2], "near_match"
+        return None, None
+
+    def get_best_price(self, sequence, max_lead_time=None, with_assembly_plan=False):
+        """Return a free quote if a part matches the sequence (see ``find_part``)."""
+        part_id, match = self.find_part(sequence)
+        if self.lookups is not None:
+            self.lookups[str(sequence)] = (part_id, match)
+        if part_id is None:
+            return DnaQuote(
+                self, sequence, accepted=False, message="Sequence not in the library"
+            )
+        metadata = {"part_name": part_id}
+        message = "Part: " + part_id
+        if match != "exact":
+            metadata["match"] = match
+            message += " (%s)" % match.replace("_", " ")
+        return DnaQuote(
+            self,
+            sequence,
+            accepted=True,
+            price=self.price_per_part,
+            lead_time=self.lead_time,
+            message=message,
+            metadata=metadata,
+        )
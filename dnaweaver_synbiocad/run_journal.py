@@ -0,0 +1,104 @@
+import hashlib
+import os
+import pickle
+
+
+class RunJournal:
+    """Append-only journal of the constructs merged during a run.
+
+    The journal starts with a header describing the run's parameters, then
+    holds one entry per merged wave of constructs (a single construct when
+    quoting serially). Each entry is a list of ``(construct, quote, error)``
+    where the quote is the detached quote of the plan as merged. An entry is
+    flushed to the disk before the next wave starts, so a killed run loses at
+    most the wave in progress. A truncated last entry is ignored.
+
+    :param path: Path to the journal file
+    :type path: str
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def open(self, header, resume=False):
+        """Start writing the journal, return the previous run's entries.
+
+        :param header: A picklable description of the run's parameters
+        :param resume: If True and the journal exists, keep its entries and
+          append to it, else start a new journal (Default: False)
+
+        :type header: dict
+        :type resume: bool
+
+        :rtype: list
+        :return: The list of the ``(construct, quote, error)`` already
+          journaled (empty unless resuming).
+        """
+        if resume and os.path.exists(self.path):
+            previous_header, records, end = self.read()
+            if previous_header != header:
+                previous_header = previous_header or {}
+                differences = sorted(
+                    key
+                    for key in set(header) | set(previous_header)
+                    if header.get(key) != previous_header.get(key)
+                )
+                raise ValueError(
+                    "Cannot resume from %s, which was written for different "
+                    "constructs or parameters (%s)"
+                    % (self.path, ", ".join(differences))
+                )
+            self.file = open(self.path, "r+b")
+            self.file.truncate(end)
+            self.file.seek(end)
+            return records
+        self.file = open(self.path, "wb")
+        self.write_entry(header)
+        return []
+
+    def read(self):
+        """Return the header, records and end offset of the valid entries."""
+        records = []
+        header, end = None, 0
+        with open(self.path, "rb") as journal_file:
+            while True:
+                try:
+                    entry = pickle.load(journal_file)
+                except Exception:
+                    # End of the file, or entry truncated by a killed run
+                    break
+                if header is None:
+                    header = entry
+                else:
+                    records.extend(entry)
+                end = journal_file.tell()
+        return header, records, end
+
+    def write_entry(self, entry):
+        """Append an entry and make sure it is on the disk."""
+        pickle.dump(entry, self.file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+def compute_constructs_digest(constructs, construct_sequences):
+    """Return a digest of the ordered constructs of a run and their sequences.
+
+    :param constructs: The construct ids, in the quoting order
+    :param construct_sequences: A dict (or mapping) {construct_id: "ATGC..."}
+
+    :type constructs: list
+    :type construct_sequences: dict
+
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+    for construct in constructs:
+        sequence = str(construct_sequences[construct])
+        digest.update(("%s\t%s\n" % (construct, sequence)).encode())
+    return digest.hexdigest()
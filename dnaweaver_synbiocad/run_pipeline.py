@@ -0,0 +1,141 @@
+import queue
+import threading
+from .get_assembly_plan_from_sbol_stream import stream_sbol_constructs
+from .compute_all_construct_quotes import compute_all_construct_quotes
+from .streaming_output_writer import BackgroundOutputWriter, StreamingOutputWriter
+
+
+def run_pipeline(
+    path,
+    target,
+    assembly_method,
+    output_format="xlsx",
+    constructs=None,
+    max_constructs=None,
+    part_boundary_cuts=False,
+    prefetched_constructs=100,
+    **quote_options
+):
+    """Parse, quote and write the plans of a SBOL design in a pipeline.
+
+    The three stages of a run overlap instead of running one after the
+    other:
+
+    - The parts sequences are read first (see ``stream_sbol_constructs``),
+      then the constructs are read from the file in a background thread,
+      up to ``prefetched_constructs`` ahead of the quoting.
+    - Each construct is quoted as soon as it is read (see the iterator
+      ``constructs_order`` of ``compute_all_construct_quotes``).
+    - The rows of the output (see ``StreamingOutputWriter``) are written by
+      another background thread (see ``BackgroundOutputWriter``) as soon as
+      each construct is read, then quoted.
+
+    The first plans are therefore quoted and written while the rest of the
+    file is still being read. With ``n_jobs`` more than 1 the quoting runs in
+    worker processes, and the three stages run in parallel. The plans are
+    the same as with a regular run of ``compute_all_construct_quotes`` in
+    the document's order, the primers are not sorted.
+
+    :param path: A path to a SBOL .xml file
+    :param target: Path to the output spreadsheet or directory
+    :param assembly_method: Either "gibson", "golden_gate", or "any_method"
+    :param output_format: One of "xlsx", "csv", "jsonl", "parquet" (Default: "xlsx")
+    :param constructs: The ids of the constructs to quote, e.g. of a shard (Default: None, for all)
+    :param max_constructs: Maximal number of constructs quoted (Default: None)
+    :param part_boundary_cuts: If True, search the cuts at the part boundaries first (Default: False)
+    :param prefetched_constructs: Maximal number of constructs read ahead of the quoting (Default: 100)
+
+    :type path: str
+    :type target: str
+    :type assembly_method: str
+    :type output_format: str
+    :type constructs: list
+    :type max_constructs: int
+    :type part_boundary_cuts: bool
+    :type prefetched_constructs: int
+
+    Other parameters are those of ``compute_all_construct_quotes``, except
+    ``deduplicate`` and ``resume``.
+
+    :rtype: tuple
+    :return: The result of ``compute_all_construct_quotes``
+    """
+    output_writer = BackgroundOutputWriter(
+        StreamingOutputWriter(target, output_format=output_format)
+    )
+
+    # READ THE PARTS, WRITE THEM
+
+    parsed = stream_sbol_constructs(path)
+    part_sequences, construct_parts, construct_sequences, read_constructs = parsed
+    for name, sequence in sorted(part_sequences.items()):
+        output_writer.write_row("part_sequences", [name, sequence])
+
+    # READ THE CONSTRUCTS AHEAD OF THE QUOTING, WRITE THEM AS THEY COME
+
+    if constructs is not None:
+        kept_constructs = set(constructs)
+        read_constructs = (c for c in read_constructs if c in kept_constructs)
+
+    def written_constructs():
+        for name in prefetch(read_constructs, prefetched_constructs):
+            parts = construct_parts[name]
+            output_writer.write_row("construct_parts", [name, " + ".join(parts)])
+            output_writer.write_row(
+                "construct_sequences", [name, construct_sequences[name]]
+            )
+            yield name
+
+    constructs_order = written_constructs()
+
+    # QUOTE THE CONSTRUCTS AS THEY ARE READ
+
+    enzymes_compatibility = None
+    if assembly_method in ["golden_gate", "any_method"]:
+        enzymes_compatibility = {}
+    result = compute_all_construct_quotes(
+        construct_sequences=construct_sequences,
+        part_sequences=part_sequences,
+        assembly_method=assembly_method,
+        max_constructs=max_constructs,
+        constructs_order=constructs_order,
+        output_writer=output_writer,
+        enzymes_compatibility=enzymes_compatibility,
+        construct_parts=construct_parts if part_boundary_cuts else None,
+        **quote_options
+    )
+
+    # WRITE THE CONSTRUCTS NOT QUOTED AND THE ENZYMES, CLOSE THE OUTPUT
+
+    for _ in constructs_order:
+        pass
+    if enzymes_compatibility is not None:
+        output_writer.write_enzymes_compatibility(enzymes_compatibility)
+    output_writer.close()
+    return result
+
+
+def prefetch(iterable, max_items):
+    """Yield the items of an iterable, read in a background thread.
+
+    Up to ``max_items`` items are read ahead. An error raised while reading
+    is raised again here.
+    """
+    items = queue.Queue(maxsize=max_items)
+    end = object()
+
+    def read_items():
+        try:
+            for item in iterable:
+                items.put((item, None))
+            items.put((end, None))
+        except Exception as error:
+            items.put((end, error))
+
+    threading.Thread(target=read_items, daemon=True).start()
+    for item, error in iter(items.get, None):
+        if error is not None:
+            raise error
+        if item is end:
+            return
+        yield item
@@ -0,0 +1,191 @@
+from collections import OrderedDict
+import contextlib
+import json
+import os
+import time
+
+
+class RunProfiler:
+    """Record the time spent on each construct and in each station of a run.
+
+    Spans are recorded with ``span`` (e.g. one per construct, one per origin
+    shift tried) and ``instrument_network`` wraps the ``get_quote`` method of
+    every station of a supply network, so that each call is recorded as a
+    span with the station name. For each span name, the number of calls, the
+    total time, the self time (without the nested spans) and the number of
+    accepted quotes (for the libraries, the library hits) are accumulated.
+
+    The spans can be exported as a Chrome trace (the JSON format read by
+    chrome://tracing and https://ui.perfetto.dev) with ``write_trace``, and
+    the totals as a text table with ``summary_table``. The spans of worker
+    processes are merged with ``merge`` and appear as separate processes in
+    the trace.
+
+    :param min_event_duration: Station calls shorter than this (in seconds)
+      are counted in the totals but not written in the trace, which would be
+      too large otherwise (Default: 1e-4)
+    :type min_event_duration: float
+    """
+
+    def __init__(self, min_event_duration=1e-4):
+        self.min_event_duration = min_event_duration
+        self.events = []
+        self.totals = OrderedDict()
+        self._children_durations = []
+
+    @contextlib.contextmanager
+    def span(self, name, category="run", **args):
+        """Record the duration of a ``with`` block.
+
+        The block receives the span's ``args`` dict, where details can be
+        added (they appear in the trace).
+        """
+        start = time.perf_counter()
+        self._children_durations.append(0.0)
+        try:
+            yield args
+        finally:
+            duration = time.perf_counter() - start
+            self_duration = duration - self._children_durations.pop()
+            if self._children_durations:
+                self._children_durations[-1] += duration
+            self._record(name, category, start, duration, self_duration, args)
+
+    def _record(self, name, category, start, duration, self_duration, args):
+        totals = self.totals.get((category, name))
+        if totals is None:
+            totals = self.totals[(category, name)] = OrderedDict(
+                [("calls", 0), ("accepted", 0), ("total", 0.0), ("self", 0.0)]
+            )
+        totals["calls"] += 1
+        totals["accepted"] += int(bool(args.get("accepted", False)))
+        totals["total"] += duration
+        totals["self"] += self_duration
+        if (category == "station") and (duration < self.min_event_duration):
+            return
+        self.events.append(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start * 1e6,
+                "dur": duration * 1e6,
+                "pid": os.getpid(),
+                "tid": 0,
+                "args": args,
+            }
+        )
+
+    def instrument_network(self, main_station):
+        """Record the calls to the stations of a supply network.
+
+        :param main_station: The entry point of the supply network
+        :type main_station: dnaweaver.DnaSupplier
+        """
+        edges, levels = main_station.compute_supply_graph()
+        for level in levels:
+            for station in level:
+                if "get_quote" not in station.__dict__:
+                    self._instrument_station(station)
+
+    def _instrument_station(self, station):
+        get_quote = station.get_quote
+
+        def profiled_get_quote(sequence, *args, **kwargs):
+            with self.span(station.name, "station", length=len(sequence)) as info:
+                quote = get_quote(sequence, *args, **kwargs)
+                info["accepted"] = quote.accepted
+            return quote
+
+        station.get_quote = profiled_get_quote
+
+    def pop_records(self):
+        """Return and forget the (events, totals) recorded so far."""
+        records = (self.events, self.totals)
+        self.events, self.totals = [], OrderedDict()
+        return records
+
+    def merge(self, records):
+        """Add the (events, totals) recorded by another profiler."""
+        events, totals = records
+        self.events.extend(events)
+        for key, other_totals in totals.items():
+            if key not in self.totals:
+                self.totals[key] = OrderedDict(other_totals)
+            else:
+                for field, value in other_totals.items():
+                    self.totals[key][field] += value
+
+    def summary(self):
+        """Return the totals as a list of dicts, the slowest spans first."""
+        rows = [
+            OrderedDict([("category", category), ("name", name)] + list(totals.items()))
+            for (category, name), totals in self.totals.items()
+        ]
+        return sorted(rows, key=lambda row: (row["category"], -row["total"]))
+
+    def summary_table(self, max_rows_per_category=15):
+        """Return the totals as a text table, per category of spans."""
+        header = "%-12s %-40s %8s %9s %10s %10s" % (
+            "category", "name", "calls", "accepted", "total (s)", "self (s)"
+        )
+        lines = [header, "-" * len(header)]
+        rows_per_category = OrderedDict()
+        for row in self.summary():
+            rows_per_category.setdefault(row["category"], []).append(row)
+        for category, rows in rows_per_category.items():
+            for row in rows[:max_rows_per_category]:
+                lines.append(
+                    "%-12s %-40s %8d %9d %10.3f %10.3f"
+                    % (
+                        category,
+                        row["name"][:40],
+                        row["calls"],
+                        row["accepted"],
+                        row["total"],
+                        row["self"],
+                    )
+                )
+            if len(rows) > max_rows_per_category:
+                lines.append(
+                    "%-12s (%d more)" % (category, len(rows) - max_rows_per_category)
+                )
+        return "\n".join(lines)
+
+    def write_trace(self, path):
+        """Write the spans as a Chrome trace JSON file, with the summary."""
+        main_pid = os.getpid()
+        pids = sorted(set(event["pid"] for event in self.events) | {main_pid})
+        metadata = [
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": 0,
+                "args": {
+                    "name": "main" if pid == main_pid else "worker %d" % pid
+                },
+            }
+            for pid in pids
+        ]
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "traceEvents": metadata + self.events,
+                    "displayTimeUnit": "ms",
+                    "otherData": {"summary": self.summary()},
+                },
+                f,
+                default=str,
+            )
+
+
+def profile_span(profiler, name, category="run", **args):
+    """Return ``profiler.span(...)``, or a context doing nothing if no profiler.
+
+    In both cases the ``with`` block receives a dict where details can be
+    added.
+    """
+    if profiler is None:
+        return contextlib.nullcontext(args)
+    return profiler.span(name, category, **args)
@@ -0,0 +1,111 @@
+from collections import OrderedDict
+import numpy as np
+import dnaweaver as dw
+from .golden_gate_enzymes import GOLDEN_GATE_ENZYMES
+from .plan_origin_shifts import site_in_linear_sequence
+from .sequence_store import NUCLEOTIDES_CODES
+
+
+def screen_golden_gate_enzymes(
+    sequences, names=None, n_shifts=5, enzymes=GOLDEN_GATE_ENZYMES, batch_size=1000
+):
+    """Return the Golden Gate enzymes which may assemble each circular sequence.
+
+    An enzyme cannot assemble a circular construct when the construct has a
+    site of the enzyme (on either strand) inside the linear sequence for each
+    of the origin shifts tried (see ``plan_origin_shifts``): its assembly
+    station would reject all of them. The sites are located in batches of
+    sequences at once: the sequences are concatenated in one array, the code
+    of the k-mer at each position is computed with NumPy, and compared with
+    the codes of all the enzymes' sites.
+
+    :param sequences: A dict {name: "ATGC..."} of circular sequences (or a mapping computing them on demand)
+    :param names: The names of the sequences to screen (Default: None, all sequences)
+    :param n_shifts: Number of origin positions tried for each sequence (Default: 5)
+    :param enzymes: The Golden Gate enzymes (Default: BsmBI, BsaI and BbsI)
+    :param batch_size: Number of sequences scanned at once (Default: 1000)
+
+    :type sequences: dict
+    :type names: list
+    :type n_shifts: int
+    :type enzymes: list
+    :type batch_size: int
+
+    :rtype: dict
+    :return: A dict {name: {enzyme: compatible}} where compatible is True if
+      the enzyme may assemble the sequence.
+    """
+    sites_codes = {}
+    for enzyme in enzymes:
+        site = dw.GoldenGateAssemblyMethod.enzymes_dict[enzyme]
+        for pattern in set([site, dw.reverse_complement(site)]):
+            sites_codes.setdefault(len(pattern), {})[_kmer_code(pattern)] = enzyme
+    if names is None:
+        names = list(sequences)
+    compatibility = OrderedDict()
+    for batch_start in range(0, len(names), batch_size):
+        batch = names[batch_start : batch_start + batch_size]
+        batch_sequences = [str(sequences[name]) for name in batch]
+        batch_sites = _locate_sites(batch_sequences, sites_codes, n_shifts)
+        for name, sequence, enzymes_sites in zip(
+            batch, batch_sequences, batch_sites
+        ):
+            L = len(sequence)
+            shifts = range(min(n_shifts, L))
+            compatibility[name] = OrderedDict(
+                (
+                    enzyme,
+                    not all(
+                        site_in_linear_sequence(enzymes_sites[enzyme], shift, L)
+                        for shift in shifts
+                    ),
+                )
+                for enzyme in enzymes
+            )
+    return compatibility
+
+
+def _kmer_code(kmer):
+    code = 0
+    for nucleotide in kmer.upper():
+        code = 4 * code + int(NUCLEOTIDES_CODES[ord(nucleotide)])
+    return code
+
+
+def _locate_sites(sequences, sites_codes, n_shifts):
+    """Return, for each circular sequence, a dict {enzyme: [(start, end)]}.
+
+    The sequences are extended with their start, to find the sites across
+    the origin, and separated by a N.
+    """
+    extension = max(n_shifts, 10) + 10
+    extended = [s + s[:extension] + "N" for s in sequences]
+    offsets = np.cumsum([0] + [len(s) for s in extended])
+    codes = NUCLEOTIDES_CODES[
+        np.frombuffer("".join(extended).encode("ascii"), dtype=np.uint8)
+    ]
+    sites = [
+        {enzyme: [] for enzymes in sites_codes.values() for enzyme in enzymes.values()}
+        for _ in sequences
+    ]
+    for k, enzymes_by_code in sites_codes.items():
+        n_kmers = len(codes) - k + 1
+        if n_kmers <= 0:
+            continue
+        kmer_codes = np.zeros(n_kmers, dtype=np.int64)
+        invalid = np.zeros(n_kmers, dtype=bool)
+        for i in range(k):
+            window = codes[i : i + n_kmers]
+            kmer_codes = 4 * kmer_codes + window
+            invalid |= window == 4
+        is_site_code = np.zeros(4 ** k, dtype=bool)
+        is_site_code[list(enzymes_by_code)] = True
+        kmer_codes[invalid] = 0
+        positions = np.nonzero(is_site_code[kmer_codes] & ~invalid)[0]
+        sequence_indices = np.searchsorted(offsets, positions, side="right") - 1
+        for position, index in zip(positions, sequence_indices):
+            start = position - offsets[index]
+            if start < len(sequences[index]):
+                enzyme = enzymes_by_code[int(kmer_codes[position])]
+                sites[index][enzyme].append((int(start), int(start + k)))
+    return sites
@@ -0,0 +1,148 @@
+from collections import OrderedDict
+import dnaweaver as dw
+
+
+class LruCache:
+    """Bounded dictionary which forgets the least recently used entries.
+
+    The numbers of ``hits`` and ``misses`` of ``get`` are counted.
+
+    :param maxsize: Maximal number of entries kept
+
+    :type maxsize: int
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        self.misses += 1
+        return default
+
+    def set(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+# Shared by all selectors of a process, so it lives for the whole run.
+TM_SEGMENTS_CACHE = LruCache(maxsize=200000)
+
+
+class CachedTmSegmentSelector(dw.TmSegmentSelector):
+    """TmSegmentSelector memoizing the segment selected at each location.
+
+    DNA Weaver's selector computes the segments for all the locations of the
+    sequence it receives, with a cache of only 3 sequences. The PCR station
+    calls it on many different subsequences of the same fragments, and the
+    same part junctions come back in many constructs of a library.
+
+    The segment selected at a location only depends on the sequence within
+    about ``max_size`` nucleotides of that location, so this selector computes it
+    from that window alone and memoizes the result in an ``LruCache`` keyed
+    by the window. Short sequences, on which the PCR station tries many
+    primer positions, are memoized whole. The selected segments are the same as with
+    ``dnaweaver.TmSegmentSelector``.
+
+    :param cache: The LruCache used (Default: None, for the shared TM_SEGMENTS_CACHE)
+
+    :type cache: LruCache
+    """
+
+    def __init__(self, cache=None, **kwargs):
+        dw.TmSegmentSelector.__init__(self, **kwargs)
+        self.cache = TM_SEGMENTS_CACHE if cache is None else cache
+
+    def filter_location(self, sequence, index):
+        """Return whether the sequence has a valid segment at this index."""
+        if not self.is_memoizable():
+            return dw.TmSegmentSelector.filter_location(self, sequence, index)
+        return self.compute_segment_location(sequence, index) is not None
+
+    def compute_segment_location(self, sequence, index):
+        """Return the location (start, stop) of the selected segment."""
+        if (index < 0) or (sequence == ""):
+            return None
+        if not self.is_memoizable():
+            return dw.TmSegmentSelector.compute_segment_location(
+                self, sequence, index
+            )
+        if index == len(sequence):
+            index = index - 1
+        if len(sequence) <= self.max_size + 1:
+            # DNA Weaver does not try all sizes on short sequences, the
+            # whole sequence is the key.
+            key = self.cache_key(str(sequence), index, short_sequence=True)
+            location = self.cache.get(key, False)
+            if location is False:
+                location = dw.TmSegmentSelector.compute_segment_location(
+                    self, sequence, index
+                )
+                if location is not None:
+                    location = tuple(int(coordinate) for coordinate in location)
+                self.cache.set(key, location)
+            return location
+        window_start = max(0, index - self.max_size)
+        window = str(sequence[window_start : index + self.max_size + 2])
+        key = self.cache_key(window, index - window_start)
+        location = self.cache.get(key, False)
+        if location is False:
+            location = self.compute_window_segment_location(
+                window, index - window_start
+            )
+            self.cache.set(key, location)
+        if location is None:
+            return None
+        start, end = location
+        return (window_start + start, window_start + end)
+
+    def compute_window_segment_location(self, window, index):
+        """Select the segment at a location, using the window's sequence only.
+
+        Reproduces the choices of ``TmSegmentSelector.compute_all_segments``:
+        for each segment size, a melting temperature is computed around the
+        location, and the size giving the best
+        ``-(tm - min_tm) * (tm - max_tm)`` score is selected. Like in DNA
+        Weaver, the temperature of a segment starting at ``start`` is computed
+        on the nucleotides ``start + 1`` to ``start + size``.
+        """
+        window = window.upper()
+        cumulated_tm = [0]
+        for nucleotide in window:
+            cumulated_tm.append(cumulated_tm[-1] + (4 if nucleotide in "GC" else 2))
+        best_score, best_size = None, None
+        for size in range(self.min_size, self.max_size + 1):
+            start = max(0, min(index - int(size / 2), len(window) - size - 1))
+            tm = cumulated_tm[start + size + 1] - cumulated_tm[start + 1]
+            score = -(tm - self.min_tm) * (tm - self.max_tm)
+            if (best_score is None) or (score > best_score):
+                best_score, best_size = score, size
+        if best_score < 0:
+            return None
+        return self.get_segment_coordinates(index, best_size, len(window))
+
+    def cache_key(self, sequence, index, short_sequence=False):
+        return (
+            self.min_size,
+            self.max_size,
+            self.min_tm,
+            self.max_tm,
+            short_sequence,
+            sequence,
+            index,
+        )
+
+    def is_memoizable(self):
+        """Return False when Primer3 melting temperatures are used."""
+        return self.precompute_segments and (self.primer3_params == {})
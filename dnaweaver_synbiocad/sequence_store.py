@@ -0,0 +1,205 @@
+import numpy as np
+from .get_assembly_plan_from_sbol_stream import LazyConstructSequences
+
+# Nucleotides codes, any other character (e.g. N) gets the code 4
+NUCLEOTIDES_CODES = np.full(256, 4, dtype=np.int64)
+for _code, _nucleotide in enumerate("ACGT"):
+    NUCLEOTIDES_CODES[ord(_nucleotide)] = _code
+    NUCLEOTIDES_CODES[ord(_nucleotide.lower())] = _code
+
+NUCLEOTIDES_LETTERS = np.frombuffer(b"ACGT", dtype=np.uint8)
+
+
+class PackedSequence:
+    """A DNA sequence stored with 2 bits per nucleotide.
+
+    Four nucleotides are packed in each byte of a NumPy array. The rare
+    characters other than A, T, G, C (e.g. N) are kept apart, with their
+    position, so that the sequence is decoded exactly.
+
+    :param sequence: The sequence to encode
+    :type sequence: str
+    """
+
+    __slots__ = ["length", "packed", "exceptions"]
+
+    def __init__(self, sequence):
+        sequence = str(sequence)
+        self.length = len(sequence)
+        characters = np.frombuffer(sequence.encode("ascii"), dtype=np.uint8)
+        codes = NUCLEOTIDES_CODES[characters]
+        others = np.nonzero(codes == 4)[0]
+        self.exceptions = {int(i): sequence[i] for i in others}
+        codes[others] = 0
+        padded = np.zeros(4 * ((self.length + 3) // 4), dtype=np.uint8)
+        padded[: self.length] = codes
+        quads = padded.reshape(-1, 4)
+        self.packed = (
+            (quads[:, 0] << 6) | (quads[:, 1] << 4) | (quads[:, 2] << 2) | quads[:, 3]
+        ).astype(np.uint8)
+
+    def __len__(self):
+        return self.length
+
+    def __str__(self):
+        return self.decode(0, self.length)
+
+    def decode(self, start, end):
+        """Return the subsequence between ``start`` and ``end`` as a string."""
+        if end <= start:
+            return ""
+        packed = self.packed[start // 4 : (end + 3) // 4]
+        codes = np.empty((len(packed), 4), dtype=np.uint8)
+        for i, shift in enumerate([6, 4, 2, 0]):
+            codes[:, i] = (packed >> shift) & 3
+        offset = start - 4 * (start // 4)
+        codes = codes.ravel()[offset : offset + end - start]
+        decoded = NUCLEOTIDES_LETTERS[codes].tobytes().decode("ascii")
+        if self.exceptions:
+            exceptions = [
+                (i - start, character)
+                for i, character in self.exceptions.items()
+                if start <= i < end
+            ]
+            if exceptions:
+                decoded = list(decoded)
+                for i, character in exceptions:
+                    decoded[i] = character
+                decoded = "".join(decoded)
+        return decoded
+
+
+class ConstructSequence:
+    """A circular construct sequence, viewed as its packed parts.
+
+    The nucleotides are not copied: the construct only refers to the
+    ``PackedSequence`` of its parts, and the rotations of the construct (see
+    ``rotate``) are views sharing the same parts. The sequence is only
+    decoded to a string with ``str()``, or for a slice.
+
+    :param parts: The ``PackedSequence`` of the parts, in the construct's order
+    :param origin: Position of the construct's origin in the parts' concatenation (Default: 0)
+
+    :type parts: tuple
+    :type origin: int
+    """
+
+    __slots__ = ["parts", "starts", "length", "origin"]
+
+    def __init__(self, parts, origin=0, _starts=None):
+        self.parts = tuple(parts)
+        if _starts is None:
+            _starts = [0]
+            for part in self.parts:
+                _starts.append(_starts[-1] + len(part))
+            _starts = tuple(_starts)
+        self.starts = _starts
+        self.length = _starts[-1]
+        self.origin = origin % self.length if self.length else 0
+
+    def __len__(self):
+        return self.length
+
+    def __str__(self):
+        return self._decode(0, self.length)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, end, step = index.indices(self.length)
+            if step != 1:
+                return str(self)[index]
+            return self._decode(start, end)
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("ConstructSequence index out of range")
+        return self._decode(index, index + 1)
+
+    def rotate(self, shift):
+        """Return the construct rotated by ``shift``, without copying it.
+
+        :param shift: Position of the new origin in the sequence
+        :type shift: int
+
+        :rtype: ConstructSequence
+        """
+        return ConstructSequence(
+            self.parts, origin=self.origin + shift, _starts=self.starts
+        )
+
+    def _decode(self, start, end):
+        """Decode the sequence between positions ``start`` and ``end``."""
+        if end <= start:
+            return ""
+        start, end = self.origin + start, self.origin + end
+        if start >= self.length:
+            start, end = start - self.length, end - self.length
+        if end > self.length:
+            return self._decode_linear(start, self.length) + self._decode_linear(
+                0, end - self.length
+            )
+        return self._decode_linear(start, end)
+
+    def _decode_linear(self, start, end):
+        """Decode the parts' concatenation between ``start`` and ``end``."""
+        decoded = []
+        for part, part_start, part_end in zip(
+            self.parts, self.starts, self.starts[1:]
+        ):
+            if part_end <= start:
+                continue
+            if part_start >= end:
+                break
+            decoded.append(
+                part.decode(
+                    max(start, part_start) - part_start,
+                    min(end, part_end) - part_start,
+                )
+            )
+        return "".join(decoded)
+
+
+class CompactConstructSequences(LazyConstructSequences):
+    """Read-only mapping {construct_id: ConstructSequence} of the constructs.
+
+    Each part sequence is encoded once as a ``PackedSequence``, and each
+    construct is given, on demand, as a ``ConstructSequence`` referring to
+    the packed sequences of its parts. Use ``str()`` to get a construct's
+    sequence as a string.
+
+    :param parts_per_construct: A dict {construct_id: [part_id_1,...]}
+    :param parts_sequences: A dict {part_id: "ATTTGTGTGC..."}
+
+    :type parts_per_construct: dict
+    :type parts_sequences: dict
+    """
+
+    def __init__(self, parts_per_construct, parts_sequences):
+        LazyConstructSequences.__init__(self, parts_per_construct, parts_sequences)
+        self.packed_parts = {
+            part: PackedSequence(sequence)
+            for part, sequence in parts_sequences.items()
+        }
+
+    def __getitem__(self, construct_id):
+        parts = self.parts_per_construct[construct_id]
+        return ConstructSequence([self.packed_parts[part] for part in sorted(parts)])
+
+
+def rotate_sequence(sequence, shift):
+    """Return a circular sequence rotated by ``shift``.
+
+    A ``ConstructSequence`` is rotated without copy, a string is rotated as
+    a new string.
+
+    :param sequence: The circular sequence
+    :param shift: Position of the new origin in the sequence
+
+    :type sequence: str or ConstructSequence
+    :type shift: int
+
+    :rtype: str or ConstructSequence
+    """
+    if isinstance(sequence, ConstructSequence):
+        return sequence.rotate(shift)
+    return sequence[shift:] + sequence[:shift]
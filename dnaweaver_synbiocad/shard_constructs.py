@@ -0,0 +1,57 @@
+import json
+
+# Prefix of the primers and fragments ids of a shard, from the shard number
+SHARD_ID_PREFIX = "ID_S%d"
+
+
+def shard_constructs(constructs, n_shards):
+    """Split the constructs of a design into shards quoted independently.
+
+    The constructs are split, in their order, into ``n_shards`` consecutive
+    blocks of (nearly) the same size: constructs which are neighbours in the
+    order (for instance with ``order_constructs``) share more primers and
+    fragments, and are kept in the same shard. Each shard gets its own prefix
+    for the ids of its primers and fragments (``ID_S1``, ``ID_S2``...), so
+    that the outputs of the shards can be merged (see
+    ``merge_shard_outputs``).
+
+    :param constructs: The list of construct ids, in the quoting order
+    :param n_shards: The number of shards
+
+    :type constructs: list
+    :type n_shards: int
+
+    :rtype: list
+    :return: A list of dicts {"shard": shard_number, "n_shards": n_shards,
+      "id_prefix": "ID_S1", "constructs": [construct_id, ...]}, one per
+      shard (shard numbers start at 1)
+    """
+    if n_shards < 1:
+        raise ValueError("The number of shards must be at least 1.")
+    constructs = list(constructs)
+    shard_size, n_larger_shards = divmod(len(constructs), n_shards)
+    shards, start = [], 0
+    for i in range(n_shards):
+        end = start + shard_size + (1 if i < n_larger_shards else 0)
+        shards.append(
+            dict(
+                shard=i + 1,
+                n_shards=n_shards,
+                id_prefix=SHARD_ID_PREFIX % (i + 1),
+                constructs=constructs[start:end],
+            )
+        )
+        start = end
+    return shards
+
+
+def write_shard(shard, path):
+    """Write a shard (see ``shard_constructs``) as a JSON file."""
+    with open(path, "w") as f:
+        json.dump(shard, f, indent=1)
+
+
+def read_shard(path):
+    """Return the shard (see ``shard_constructs``) of a JSON file."""
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,282 @@
+from collections import OrderedDict
+import csv
+import json
+import os
+import queue
+import threading
+from .golden_gate_enzymes import GOLDEN_GATE_ENZYMES
+
+# Sheets of the output, in the order of write_output_spreadsheet
+SHEETS_COLUMNS = OrderedDict(
+    [
+        ("construct_parts", ["construct", "parts"]),
+        ("construct_sequences", ["construct", "sequence"]),
+        ("primer_sequences", ["primer", "sequence"]),
+        ("part_sequences", ["part", "sequence"]),
+        (
+            "fragment_extensions",
+            ["fragment_id", "part", "primers", "fragment_sequence"],
+        ),
+        ("assembly_plan", ["construct", "method", "fragments"]),
+        ("errors", ["construct", "error"]),
+        ("golden_gate_enzymes", ["construct"] + GOLDEN_GATE_ENZYMES),
+    ]
+)
+
+# Sheets only written when their data is provided, as by
+# write_output_spreadsheet (the enzymes sheet, for the Golden Gate methods)
+OPTIONAL_SHEETS = ["golden_gate_enzymes"]
+
+OUTPUT_FORMATS = ["xlsx", "csv", "jsonl", "parquet"]
+
+
+def quote_components_ids(quote):
+    """Return the list of ids of all fragments or primers in a quote."""
+
+    def _subquote_to_id(subquote):
+        "Return the ID of either the quote or the re-used sequence"
+        if subquote.source.operation_type == "library":
+            return subquote.metadata["part_name"]
+        else:
+            return subquote.id
+
+    return [
+        _subquote_to_id(subquote) for loc, subquote in quote.assembly_plan.items()
+    ]
+
+
+def fragment_sequence(quote):
+    """Return the sequence of a PCR fragment as amplified.
+
+    It differs from the quote's sequence when near matches of the primers
+    were reused (see ``register_quote_products``).
+    """
+    return str(quote.metadata.get("amplicon", quote.sequence))
+
+
+class StreamingOutputWriter:
+    """Write the output sheets row by row, as the constructs are quoted.
+
+    Unlike ``write_output_spreadsheet``, which needs all the plans at the end
+    of the run, each row is written as soon as it is known and nothing is
+    kept in memory. The sheets are the same, but the primers are listed in
+    the order in which they are ordered instead of being sorted. As with
+    ``write_output_spreadsheet``, the ``golden_gate_enzymes`` sheet is only
+    written if ``write_enzymes_compatibility`` is called.
+
+    Formats:
+
+    - "xlsx": a single spreadsheet at ``target``, written with openpyxl in
+      write-only mode.
+    - "csv", "jsonl", "parquet": one file per sheet, e.g.
+      ``target/assembly_plan.csv``, in the ``target`` directory. Parquet
+      requires pyarrow.
+
+    :param target: Path to the output spreadsheet or directory
+    :param output_format: One of "xlsx", "csv", "jsonl", "parquet" (Default: "xlsx")
+    :param parquet_batch_size: Number of rows per Parquet row group (Default: 1000)
+
+    :type target: str
+    :type output_format: str
+    :type parquet_batch_size: int
+    """
+
+    def __init__(self, target, output_format="xlsx", parquet_batch_size=1000):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(
+                "Unknown output format %s, use one of %s"
+                % (output_format, OUTPUT_FORMATS)
+            )
+        self.target = target
+        self.output_format = output_format
+        self.parquet_batch_size = parquet_batch_size
+        self.files = OrderedDict()
+        self.sheets = OrderedDict()
+        if output_format == "xlsx":
+            from openpyxl import Workbook
+
+            self.workbook = Workbook(write_only=True)
+        else:
+            os.makedirs(target, exist_ok=True)
+        for name in SHEETS_COLUMNS:
+            if name not in OPTIONAL_SHEETS:
+                self._open_sheet(name)
+
+    def _open_sheet(self, name):
+        """Create a sheet (or its file) and write its columns."""
+        columns = SHEETS_COLUMNS[name]
+        if self.output_format == "xlsx":
+            self.sheets[name] = self.workbook.create_sheet(name)
+            self.sheets[name].append(columns)
+            return
+        path = os.path.join(self.target, "%s.%s" % (name, self.output_format))
+        if self.output_format == "csv":
+            self.files[name] = open(path, "w", newline="")
+            self.sheets[name] = csv.writer(self.files[name])
+            self.sheets[name].writerow(columns)
+        elif self.output_format == "jsonl":
+            self.files[name] = self.sheets[name] = open(path, "w")
+        else:
+            import pyarrow
+            import pyarrow.parquet
+
+            schema = pyarrow.schema([(c, pyarrow.string()) for c in columns])
+            self.files[name] = pyarrow.parquet.ParquetWriter(path, schema)
+            self.sheets[name] = []
+
+    def write_row(self, sheet_name, row):
+        """Write a row (list of values, in the sheet's columns order)."""
+        if sheet_name not in self.sheets:
+            self._open_sheet(sheet_name)
+        sheet = self.sheets[sheet_name]
+        if self.output_format == "xlsx":
+            sheet.append(list(row))
+        elif self.output_format == "csv":
+            sheet.writerow(row)
+        elif self.output_format == "jsonl":
+            record = dict(zip(SHEETS_COLUMNS[sheet_name], row))
+            sheet.write(json.dumps(record) + "\n")
+        else:
+            sheet.append([None if value is None else str(value) for value in row])
+            if len(sheet) >= self.parquet_batch_size:
+                self._flush_parquet_rows(sheet_name)
+
+    def write_inputs(self, part_sequences, construct_parts, construct_sequences):
+        """Write the parts and constructs sheets, one construct at a time.
+
+        :param part_sequences: A dict {part_id: "ATGC..."}
+        :param construct_parts: A dict {construct_id: [part_id_1,...]}
+        :param construct_sequences: A dict (or lazy mapping) {construct_id: "ATGC..."}
+
+        :type part_sequences: dict
+        :type construct_parts: dict
+        :type construct_sequences: dict
+        """
+        for name, parts in construct_parts.items():
+            self.write_row("construct_parts", [name, " + ".join(parts)])
+        for name, sequence in construct_sequences.items():
+            self.write_row("construct_sequences", [name, str(sequence)])
+        for name, sequence in sorted(part_sequences.items()):
+            self.write_row("part_sequences", [name, str(sequence)])
+
+    def write_enzymes_compatibility(self, enzymes_compatibility):
+        """Write which Golden Gate enzymes may assemble each construct.
+
+        :param enzymes_compatibility: A dict {construct: {enzyme: compatible}} (see ``screen_golden_gate_enzymes``)
+        :type enzymes_compatibility: dict
+        """
+        if "golden_gate_enzymes" not in self.sheets:
+            self._open_sheet("golden_gate_enzymes")
+        for construct, compatibility in enzymes_compatibility.items():
+            self.write_row(
+                "golden_gate_enzymes",
+                [construct] + [compatibility[e] for e in GOLDEN_GATE_ENZYMES],
+            )
+
+    def write_primer(self, primer_id, sequence):
+        self.write_row("primer_sequences", [primer_id, str(sequence)])
+
+    def write_fragment(self, fragment_id, quote):
+        """Write the PCR extension of a fragment, from its quote."""
+        self.write_row(
+            "fragment_extensions",
+            [
+                fragment_id,
+                quote.metadata["subject"],
+                " + ".join(quote_components_ids(quote)),
+                fragment_sequence(quote),
+            ],
+        )
+
+    def write_construct(self, construct, quote=None, error=None):
+        """Write the assembly plan of a construct, or its error."""
+        if error is not None:
+            self.write_row("errors", [construct, error])
+        else:
+            self.write_row(
+                "assembly_plan",
+                [
+                    construct,
+                    quote.source.name,
+                    " + ".join(quote_components_ids(quote)),
+                ],
+            )
+
+    def close(self):
+        """Write the end of the files (for xlsx, the whole file) and close them."""
+        if self.output_format == "xlsx":
+            self.workbook.save(self.target)
+            return
+        for name, output_file in self.files.items():
+            if self.output_format == "parquet":
+                self._flush_parquet_rows(name)
+            output_file.close()
+
+    def _flush_parquet_rows(self, sheet_name):
+        import pyarrow
+
+        rows = self.sheets[sheet_name]
+        if not rows:
+            return
+        columns = SHEETS_COLUMNS[sheet_name]
+        table = pyarrow.table(
+            {
+                column: pyarrow.array([row[i] for row in rows], type=pyarrow.string())
+                for i, column in enumerate(columns)
+            }
+        )
+        self.files[sheet_name].write_table(table)
+        del rows[:]
+
+
+class BackgroundOutputWriter:
+    """Run the calls to an output writer in a background thread.
+
+    The calls (``write_row``, ``write_construct``...) are queued and the
+    writer runs them in order in its own thread, so formatting the rows and
+    writing the files overlap with the quoting. The arguments must not be
+    modified after the call. A call which fails stops the writing, and its
+    error is raised by the next call or by ``close``.
+
+    :param writer: The writer, e.g. a ``StreamingOutputWriter``
+    :param max_queued_calls: Maximal number of calls waiting to run, after which the callers wait (Default: 1000)
+
+    :type writer: StreamingOutputWriter
+    :type max_queued_calls: int
+    """
+
+    def __init__(self, writer, max_queued_calls=1000):
+        self.writer = writer
+        self.calls = queue.Queue(maxsize=max_queued_calls)
+        self.error = None
+        self.thread = threading.Thread(target=self._run_calls, daemon=True)
+        self.thread.start()
+
+    def __getattr__(self, name):
+        method = getattr(self.writer, name)
+
+        def queue_call(*args, **kwargs):
+            self._raise_error()
+            self.calls.put((method, args, kwargs))
+
+        return queue_call
+
+    def close(self):
+        """Run the queued calls, then close the writer."""
+        self.calls.put((self.writer.close, (), {}))
+        self.calls.put(None)
+        self.thread.join()
+        self._raise_error()
+
+    def _run_calls(self):
+        for call in iter(self.calls.get, None):
+            if self.error is None:
+                method, args, kwargs = call
+                try:
+                    method(*args, **kwargs)
+                except Exception as error:
+                    self.error = error
+
+    def _raise_error(self):
+        if self.error is not None:
+            raise self.error
@@ -0,0 +1,130 @@
+import copy
+from .segment_selectors import LruCache
+
+
+class SubQuoteCache:
+    """Primers and fragments quotes shared between supply networks.
+
+    The networks of the different assembly methods (see ``SupplyNetwork``)
+    have the same primers and fragments sub-network: the PCR extension of the
+    parts, the oligo supplier and the reuse libraries. ``share_network``
+    memoizes the quotes of the ``primers_comparator`` and
+    ``fragments_comparator`` stations of a network in this cache, under a key
+    made of the station and the sequence.
+
+    The quote of a primer only depends on its sequence and on the part of the
+    primers library reused for it, if any. The quote of a fragment depends on
+    its sequence, on the part of the fragments library reused for it and on
+    the quotes of the primers which the PCR station asked for. Each cached
+    quote keeps these library lookups (``find_part`` results), and is only
+    used by a network whose libraries give the same results: the networks
+    of runs with different methods share the quotes of all the sequences for
+    which they reuse the same parts (or none), whatever the other parts
+    already made in each run.
+
+    The cached quotes are copied and bound to the stations of the network
+    asking for them. Only quotes without assembly plan (those compared
+    during the assembly stations' search) are cached. The cache only works
+    in the process of the networks: it cannot be used by parallel workers.
+
+    :param maxsize: Maximal number of quotes kept (Default: 100000)
+    :type maxsize: int
+    """
+
+    station_names = ["primers_comparator", "fragments_comparator"]
+
+    def __init__(self, maxsize=100000):
+        self.quotes = LruCache(maxsize)
+        self.hits = 0
+        self.misses = 0
+        # The library lookups of the quotes being computed (nested quotes)
+        self._lookups_stack = []
+
+    def share_network(self, network):
+        """Make the primers and fragments stations of a network use the cache.
+
+        :param network: The supply network
+        :type network: SupplyNetwork
+        """
+        edges, levels = network.main_station.compute_supply_graph()
+        stations = {station.name: station for level in levels for station in level}
+        libraries = {
+            "primers_comparator": network.already_ordered_primers_library,
+            "fragments_comparator": network.already_amplified_fragments_library,
+        }
+        for name in self.station_names:
+            self._share_station(stations[name], stations, libraries)
+
+    def _share_station(self, station, stations, libraries):
+        get_quote = station.get_quote
+        library = libraries[station.name]
+
+        def get_quote_with_lookups(sequence, **parameters):
+            """Return the quote and all the library lookups it depends on."""
+            lookups = [(station.name, str(sequence), library.find_part(sequence))]
+            self._lookups_stack.append(lookups)
+            try:
+                quote = get_quote(sequence, **parameters)
+            finally:
+                self._lookups_stack.pop()
+            # The quotes of the primers are part of the fragment's quote
+            if self._lookups_stack:
+                self._lookups_stack[-1].extend(lookups)
+            return quote, lookups
+
+        def shared_get_quote(
+            sequence,
+            max_lead_time=None,
+            max_price=None,
+            with_assembly_plan=False,
+            time_resolution=1.0,
+        ):
+            if with_assembly_plan or (max_price is not None):
+                quote, _ = get_quote_with_lookups(
+                    sequence,
+                    max_lead_time=max_lead_time,
+                    max_price=max_price,
+                    with_assembly_plan=with_assembly_plan,
+                    time_resolution=time_resolution,
+                )
+                return quote
+            key = (station.name, str(sequence), max_lead_time)
+            cached = self.quotes.get(key)
+            if (cached is not None) and all(
+                libraries[name].find_part(looked_up) == found
+                for name, looked_up, found in cached[1]
+            ):
+                self.hits += 1
+                quote, lookups = cached
+                if self._lookups_stack:
+                    self._lookups_stack[-1].extend(lookups)
+            else:
+                self.misses += 1
+                quote, lookups = get_quote_with_lookups(
+                    sequence, max_lead_time=max_lead_time
+                )
+                self.quotes.set(key, (quote, lookups))
+            return _copy_quote(quote, stations)
+
+        station.get_quote = shared_get_quote
+
+
+def _copy_quote(quote, stations):
+    """Copy a quote without assembly plan, bound to the given stations.
+
+    :param quote: The quote
+    :param stations: A dict {station_name: station} of the network's stations
+
+    :type quote: dnaweaver.DnaQuote
+    :type stations: dict
+
+    :rtype: dnaweaver.DnaQuote
+    """
+    copied = copy.copy(quote)
+    copied.source = stations[quote.source.name]
+    copied.metadata = dict(quote.metadata)
+    if "via" in copied.metadata:
+        copied.metadata["via"] = [
+            stations[station.name] for station in quote.metadata["via"]
+        ]
+    return copied
@@ -0,0 +1,50 @@
+import contextlib
+import signal
+import threading
+
+
+class ConstructTimeout(Exception):
+    """Raised when the quoting of a construct goes over its time budget."""
+
+
+@contextlib.contextmanager
+def time_budget(seconds):
+    """Raise ConstructTimeout if the ``with`` block runs for too long.
+
+    The block is interrupted with a SIGALRM timer, wherever it is in the
+    DnaWeaver search. Timers are only available on Unix and in the main
+    thread of a process (which is where the constructs are quoted, also in
+    the worker processes): elsewhere, or if ``seconds`` is None, the block
+    is not limited. The timer is repeated until the block ends, so that a
+    ConstructTimeout ignored where it was raised (for instance in a
+    ``__del__`` run by the garbage collector) is raised again. The timer is
+    disarmed as soon as the block ends, but an alarm may still interrupt
+    the block right after its last statement: callers keep the result of a
+    block which completed (see ``find_construct_plan_in_time``).
+
+    :param seconds: The time budget, in seconds
+    :type seconds: float
+    """
+    if (
+        (seconds is None)
+        or not hasattr(signal, "SIGALRM")
+        or (threading.current_thread() is not threading.main_thread())
+    ):
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise ConstructTimeout("over the time budget of %s seconds" % seconds)
+
+    previous_handler = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds, min(seconds, 0.1))
+    try:
+        try:
+            yield
+        except BaseException:
+            # Disarmed first, so no alarm interrupts the handling of the error
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            raise
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
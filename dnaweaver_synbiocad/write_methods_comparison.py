@@ -0,0 +1,84 @@
+import pandas
+
+
+def write_methods_comparison(
+    methods_results, constructs=None, target="comparison.xlsx"
+):
+    """Write a spreadsheet comparing the plans of several assembly methods.
+
+    The ``construct_costs`` sheet gives the price of each construct's plan
+    with each method (empty if the method failed), and the cheapest method.
+    The ``method_totals`` sheet gives, for each method, the numbers of valid
+    plans and errors, the total price of the plans, and the numbers of
+    primers ordered and fragments amplified.
+
+    :param methods_results: A dict {assembly_method: (quotes, primer_sequences, fragment_quotes, errors)} as returned by ``compute_all_methods_quotes``
+    :param constructs: The construct ids, in the order of the rows (Default: None, in the order of the results)
+    :param target: The path to the output file
+
+    :type methods_results: dict
+    :type constructs: list
+    :type target: str
+
+    :rtype: None
+    :return: None
+    """
+    methods = list(methods_results)
+    if constructs is None:
+        constructs = []
+        for quotes, _, _, errors in methods_results.values():
+            for construct in list(quotes) + list(errors):
+                if construct not in constructs:
+                    constructs.append(construct)
+
+    # WRITE THE COSTS OF EACH CONSTRUCT
+
+    records = []
+    for construct in constructs:
+        record = {"construct": construct}
+        for method, (quotes, _, _, errors) in methods_results.items():
+            quote = quotes.get(construct)
+            record[method] = None if quote is None else quote.price
+        prices = [
+            (record[method], method)
+            for method in methods
+            if record[method] is not None
+        ]
+        # In case of a tie, the first method is the cheapest
+        cheapest = min(prices, key=lambda price: price[0]) if prices else None
+        record["cheapest_method"] = None if cheapest is None else cheapest[1]
+        records.append(record)
+    costs = pandas.DataFrame.from_records(
+        records,
+        index="construct",
+        columns=["construct"] + methods + ["cheapest_method"],
+    )
+
+    # WRITE THE TOTALS OF EACH METHOD
+
+    totals = pandas.DataFrame.from_records(
+        [
+            {
+                "method": method,
+                "valid_plans": len(quotes),
+                "errors": len(errors),
+                "total_price": sum(
+                    quote.price for quote in quotes.values() if quote is not None
+                ),
+                "ordered_primers": len(primer_sequences),
+                "amplified_fragments": len(fragment_quotes),
+            }
+            for method, (
+                quotes,
+                primer_sequences,
+                fragment_quotes,
+                errors,
+            ) in methods_results.items()
+        ],
+        index="method",
+    )
+
+    writer = pandas.ExcelWriter(target)
+    costs.to_excel(writer, sheet_name="construct_costs")
+    totals.to_excel(writer, sheet_name="method_totals")
+    writer.close()
@@ -1,4 +1,6 @@
 import pandas
+from .golden_gate_enzymes import GOLDEN_GATE_ENZYMES
+from .streaming_output_writer import fragment_sequence, quote_components_ids
 
 filepath = "output.xlsx"
 
@@ -12,6 +14,7 @@ def write_output_spreadsheet(
     construct_parts,
     construct_sequences,
     target="output.xlsx",
+    enzymes_compatibility=None,
 ):
     """Write the result of DNA construction plan computations as a spreadsheet.
     
@@ -23,7 +26,7 @@ def write_output_spreadsheet(
     :param construct_parts: The assembled parts sequences
     :param construct_sequences: The assembled sequence
     :param target: The path to the output file
-
+    :param enzymes_compatibility: A dict {construct: {enzyme: compatible}} written in a ``golden_gate_enzymes`` sheet (Default: None, no sheet)
 
     :type quotes: dict 
     :type primer_sequences: dict
@@ -33,6 +36,7 @@ def write_output_spreadsheet(
     :type construct_parts: dict
     :type construct_sequences: dict
     :type target: str
+    :type enzymes_compatibility: dict
 
     :rtype: None
     :return: None
@@ -49,21 +53,6 @@ def write_output_spreadsheet(
         )
         dataframe.to_excel(writer, sheet_name=spreadsheet_name)
 
-    def quote_components_ids(quote):
-        """Return the list of ids of all fragments or primers in a quote."""
-
-        def _subquote_to_id(subquote):
-            "Return the ID of either the quote or the re-used sequence"
-            if subquote.source.operation_type == "library":
-                return subquote.metadata["part_name"]
-            else:
-                return subquote.id
-
-        return [
-            _subquote_to_id(subquote)
-            for loc, subquote in quote.assembly_plan.items()
-        ]
-
     # WRITE THE CONSTRUCTS PARTS SPREADSHEET
 
     writer = pandas.ExcelWriter(target)
@@ -80,7 +69,7 @@ def write_output_spreadsheet(
     list_to_spreadsheet(
         "construct_sequences",
         ["construct", "sequence"],
-        construct_sequences.items(),
+        [(name, str(sequence)) for name, sequence in construct_sequences.items()],
     )
 
     # WRITE THE PRIMERS SEQUENCES SPREADSHEET
@@ -104,7 +93,7 @@ def write_output_spreadsheet(
             fragment,
             quote.metadata["subject"],
             " + ".join(quote_components_ids(quote)),
-            quote.sequence,
+            fragment_sequence(quote),
         )
         for fragment, quote in fragment_quotes.items()
     ]
@@ -128,4 +117,16 @@ def write_output_spreadsheet(
 
     list_to_spreadsheet("errors", ["construct", "error"], list(errors.items()))
 
+    # WRITE THE GOLDEN GATE ENZYMES COMPATIBILITY SPREADSHEET
+
+    if enzymes_compatibility is not None:
+        list_to_spreadsheet(
+            "golden_gate_enzymes",
+            ["construct"] + GOLDEN_GATE_ENZYMES,
+            [
+                [construct] + [compatibility[e] for e in GOLDEN_GATE_ENZYMES]
+                for construct, compatibility in enzymes_compatibility.items()
+            ],
+        )
+
     writer.close()
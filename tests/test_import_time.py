@@ -0,0 +1,62 @@
+import subprocess
+import sys
+import types
+
+# Dependencies which take most of the startup time, only imported by the
+# stages of a run which need them
+HEAVY_MODULES = ["pandas", "sbol2", "dnaweaver", "proglog", "docopt"]
+
+
+def run_with_import_times(arguments):
+    """Run python with -X importtime, return the process and import times.
+
+    The import times are given as a dict {module: cumulative_microseconds}.
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime"] + arguments,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    import_times = {}
+    for line in process.stderr.decode().splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:") :].split("|")
+        import_times[module.strip()] = int(cumulative)
+    return process, import_times
+
+
+def assert_no_heavy_imports(import_times):
+    heavy = [m for m in import_times if m.split(".")[0] in HEAVY_MODULES]
+    assert heavy == []
+
+
+def test_package_import_time():
+    process, import_times = run_with_import_times(["-c", "import dnaweaver_synbiocad"])
+    assert process.returncode == 0
+    assert_no_heavy_imports(import_times)
+    assert import_times["dnaweaver_synbiocad"] < 500000
+
+
+def test_command_line_startup_time():
+    process, import_times = run_with_import_times(
+        ["-m", "dnaweaver_synbiocad", "--version"]
+    )
+    assert process.returncode == 0
+    assert_no_heavy_imports(import_times)
+    # An argument error is also reported without the heavy imports
+    process, import_times = run_with_import_times(
+        ["-m", "dnaweaver_synbiocad", "input.xml"]
+    )
+    assert process.returncode == 2
+    assert_no_heavy_imports(import_times)
+
+
+def test_lazy_functions():
+    from dnaweaver_synbiocad.compute_all_construct_quotes import find_construct_plan
+    from dnaweaver_synbiocad import compute_all_construct_quotes, order_constructs
+
+    # The functions keep the precedence over the modules of the same name
+    assert callable(find_construct_plan)
+    assert not isinstance(compute_all_construct_quotes, types.ModuleType)
+    assert not isinstance(order_constructs, types.ModuleType)
@@ -1,5 +1,6 @@
 import os
 import subprocess
+import time
 import pandas
 
 this_directory = os.path.dirname(os.path.realpath(__file__))
@@ -15,7 +16,9 @@ def get_sheet_length(filepath, sheet_name):
     )
 
 
-def run_test_with_assembly_method(output_path, assembly_method):
+def run_test_with_assembly_method(
+    output_path, assembly_method, extra_parameters=()
+):
     script_path = "python3 -m dnaweaver_synbiocad"
     input_path = os.path.join(
         this_directory,
@@ -28,7 +31,7 @@ def run_test_with_assembly_method(output_path, assembly_method):
         output_path,
         assembly_method,
         "--nb_constructs=6",
-    ]
+    ] + list(extra_parameters)
     process = subprocess.run(
         script_path.split() + parameters,
         stdout=subprocess.PIPE,
@@ -64,3 +67,822 @@ def test_with_golden_gate_assembly(tmpdir):
     expected = dict(primer_sequences=37, fragment_extensions=24, errors=2)
     for sheet_name, expected_size in expected.items():
         assert get_sheet_length(output_path, sheet_name) == expected_size
+    enzymes = pandas.read_excel(output_path, sheet_name="golden_gate_enzymes")
+    assert len(enzymes) == 6
+
+
+def test_with_parallel_workers(tmpdir):
+    # The plans quoted in parallel waves are the same as the serial plans
+    sheet_names = ["assembly_plan", "primer_sequences", "fragment_extensions"]
+    sheets = {}
+    for workers in [1, 2]:
+        output_path = os.path.join(str(tmpdir), "output_%d.xlsx" % workers)
+        run_test_with_assembly_method(
+            output_path,
+            assembly_method="any_method",
+            extra_parameters=["--workers=%d" % workers],
+        )
+        sheets[workers] = pandas.read_excel(
+            output_path, sheet_name=sheet_names, engine='openpyxl'
+        )
+    for sheet_name in sheet_names:
+        assert len(sheets[1][sheet_name]) > 0
+        assert sheets[2][sheet_name].equals(sheets[1][sheet_name])
+
+
+def test_parallel_plans():
+    from dnaweaver_synbiocad import (
+        compute_all_construct_quotes,
+        get_assembly_plan_from_sbol,
+    )
+
+    input_path = os.path.join(this_directory, "data", "input", "test.xml")
+    part_sequences, _, construct_sequences = get_assembly_plan_from_sbol(
+        path=input_path
+    )
+    results = {}
+    for n_jobs in [1, 2]:
+        stats = {}
+        quotes, primers, fragment_quotes, errors = compute_all_construct_quotes(
+            construct_sequences=construct_sequences,
+            part_sequences=part_sequences,
+            assembly_method="gibson",
+            logger=None,
+            max_constructs=8,
+            n_jobs=n_jobs,
+            stats=stats,
+        )
+        results[n_jobs] = (
+            [(construct, quote.price) for construct, quote in quotes.items()],
+            primers,
+            sorted(fragment_quotes),
+            errors,
+        )
+    assert results[2] == results[1]
+    # Only the constructs whose quotes are changed by the products of the
+    # earlier constructs of their wave are quoted again
+    assert 0 < stats["requoted_constructs"] < 4
+
+
+def test_plan_origin_shifts():
+    from dnaweaver_synbiocad.plan_origin_shifts import plan_origin_shifts
+
+    # The 4bp overhang around the origin (GATC) is palyndromic
+    sequence = "TC" + 200 * "A" + "GA"
+    assert plan_origin_shifts(sequence, "golden_gate") == [1, 2, 3, 4]
+    assert plan_origin_shifts(sequence, "gibson") == [0, 1, 2, 3, 4]
+    # The sequence has sites for all Golden Gate enzymes
+    sequence = 50 * "A" + "CGTCTC" + "GGTCTC" + "GAAGAC" + 50 * "A"
+    assert plan_origin_shifts(sequence, "golden_gate") == []
+
+
+def test_screen_golden_gate_enzymes():
+    import random
+    from dnaweaver_synbiocad.screen_golden_gate_enzymes import (
+        screen_golden_gate_enzymes,
+    )
+
+    random.seed(123)
+    sites = ["CGTCTC", "GAGACG", "GGTCTC", "GAAGAC"]
+    sequences = {}
+    for i in range(200):
+        sequence = "".join(random.choice("ATGC") for _ in range(300))
+        for site in random.sample(sites, random.randint(0, 3)):
+            position = random.randint(0, 300)
+            sequence = sequence[:position] + site + sequence[position:]
+        sequences["construct_%d" % i] = sequence
+    sequences["BsmBI_site"] = 100 * "A" + "CGTCTC" + 100 * "A"
+    compatibility = screen_golden_gate_enzymes(sequences, batch_size=64)
+    assert list(compatibility) == list(sequences)
+    assert not compatibility["BsmBI_site"]["BsmBI"]
+    assert compatibility["BsmBI_site"]["BsaI"]
+    # An enzyme is incompatible if all the rotated sequences have its site
+    enzymes_sites = dict(BsmBI=["CGTCTC", "GAGACG"], BsaI=["GGTCTC", "GAGACC"])
+    enzymes_sites["BbsI"] = ["GAAGAC", "GTCTTC"]
+    for name, sequence in sequences.items():
+        for enzyme, compatible in compatibility[name].items():
+            rotations = [sequence[s:] + sequence[:s] for s in range(5)]
+            assert compatible == any(
+                all(site not in rotated[10:-10] for site in enzymes_sites[enzyme])
+                for rotated in rotations
+            )
+
+
+def test_cached_tm_segment_selector():
+    import dnaweaver as dw
+    from dnaweaver_synbiocad.segment_selectors import (
+        CachedTmSegmentSelector,
+        LruCache,
+    )
+
+    parameters = dict(min_size=19, max_size=25, min_tm=50, max_tm=70)
+    selector = dw.TmSegmentSelector(**parameters)
+    cached_selector = CachedTmSegmentSelector(cache=LruCache(1000), **parameters)
+    sequence = dw.random_dna_sequence(300, seed=123)
+    for subsequence in [sequence, sequence[:20], sequence[100:112]]:
+        for repeat in range(2):
+            for index in range(len(subsequence) + 1):
+                expected = selector.compute_segment_location(subsequence, index)
+                location = cached_selector.compute_segment_location(
+                    subsequence, index
+                )
+                if expected is not None:
+                    expected = tuple(int(coordinate) for coordinate in expected)
+                assert location == expected
+    assert cached_selector.cache.hits > 0
+
+
+def test_indexed_pcr_extraction_station():
+    import dnaweaver as dw
+    from dnaweaver_synbiocad.pcr_extraction_station import (
+        IndexedPcrExtractionStation,
+    )
+
+    parts = {
+        "part_%d" % i: dw.random_dna_sequence(500, seed=i) for i in range(20)
+    }
+    parameters = dict(
+        primers_supplier=dw.CommercialDnaOffer(
+            name="oligos", pricing=dw.FixedCostPricing(1)
+        ),
+        homology_selector=dw.TmSegmentSelector(),
+        max_overhang_length=30,
+    )
+    station = dw.PcrExtractionStation("pcr", sequences=parts, **parameters)
+    indexed_station = IndexedPcrExtractionStation(
+        "indexed_pcr", sequences=parts, **parameters
+    )
+    construct = parts["part_3"] + parts["part_7"] + parts["part_12"]
+    assert indexed_station.suggest_cuts(construct) == station.suggest_cuts(
+        construct
+    )
+    for start, end in [(0, 530), (480, 1020), (10, 40), (700, 1400)]:
+        fragment = construct[start:end]
+        assert indexed_station._get_hits(fragment) == station._get_hits(fragment)
+    # Fragments are also found on the reverse strand of the parts
+    fragment = parts["part_5"][100:400]
+    reverse_fragment = dw.reverse_complement(fragment)
+    assert station._get_hits(reverse_fragment) == []
+    hits = indexed_station._get_hits(reverse_fragment)
+    assert hits == station._get_hits(fragment)
+
+
+def test_indexed_reuse_library():
+    import dnaweaver as dw
+    from dnaweaver_synbiocad.reuse_library import IndexedReuseLibrary
+
+    fragments = IndexedReuseLibrary(
+        "fragments", {"F1": "ATGCATGCCCGTAGGT"}, reverse_complement=True
+    )
+    fragments.add_part("F2", "TTTTGGGGCCCCAAAATG")
+    quote = fragments.get_quote("TTTTGGGGCCCCAAAATG")
+    assert quote.accepted and quote.metadata == {"part_name": "F2"}
+    quote = fragments.get_quote(dw.reverse_complement("ATGCATGCCCGTAGGT"))
+    assert quote.accepted and quote.metadata["part_name"] == "F1"
+    assert quote.metadata["match"] == "reverse_complement"
+    assert not fragments.get_quote("ATGCATGCCCGTAGG").accepted
+
+    # Primers are not reused for their reverse complement, but a primer with
+    # a longer 5' end can be reused if near matches are allowed
+    homology = dw.random_dna_sequence(22, seed=1)
+    primers = {"P1": "A" * 30 + homology, "P2": "C" * 8 + homology}
+    for near_matches in [False, True]:
+        library = IndexedReuseLibrary("primers", primers, near_matches=near_matches)
+        assert not library.get_quote(dw.reverse_complement(primers["P2"])).accepted
+        quote = library.get_quote("CC" + homology)
+        assert quote.accepted == near_matches
+        if near_matches:
+            # The shortest primer is preferred, P1 is too long
+            assert quote.metadata["part_name"] == "P2"
+            assert not library.get_quote(homology[:-1]).accepted
+            assert not library.get_quote(homology + "A").accepted
+
+
+def test_near_match_primers_amplicon():
+    import dnaweaver as dw
+    from dnaweaver.DnaQuote import DnaQuote
+    from dnaweaver_synbiocad.compute_all_construct_quotes import (
+        register_quote_products,
+    )
+    from dnaweaver_synbiocad.detach_quote import SupplierStub
+    from dnaweaver_synbiocad.streaming_output_writer import fragment_sequence
+
+    fragment = dw.random_dna_sequence(100, seed=2)
+    left_primer, right_primer = fragment[:22], dw.reverse_complement(fragment[-22:])
+    # The left primer is reused from a primer with 5 extra 5' nucleotides
+    ordered_primers = {"P1": "GGGGG" + left_primer}
+    primer_quotes = [
+        DnaQuote(
+            SupplierStub("already_ordered_primers", "library"),
+            left_primer,
+            price=0,
+            metadata={"part_name": "P1", "match": "near_match"},
+        ),
+        DnaQuote(
+            SupplierStub("oligo_supplier", "order"), right_primer, price=1, id="ID_2"
+        ),
+    ]
+    quote = DnaQuote(
+        SupplierStub("pcr_part_extension_station", "PCR"),
+        fragment,
+        price=3,
+        assembly_plan={(0, 22): primer_quotes[0], (78, 100): primer_quotes[1]},
+        metadata={"subject": "part_1"},
+        id="ID_1",
+    )
+    amplified_fragments = {}
+    register_quote_products(
+        quote,
+        network=None,
+        ordered_primers=ordered_primers,
+        amplified_fragments=amplified_fragments,
+        amplified_fragments_quotes={},
+    )
+    # The amplicon made, not the requested fragment, is offered for reuse
+    assert amplified_fragments == {"ID_1": "GGGGG" + fragment}
+    assert fragment_sequence(quote) == "GGGGG" + fragment
+    assert ordered_primers["ID_2"] == right_primer
+
+
+def test_supply_network(monkeypatch):
+    import sys
+    import dnaweaver as dw
+    from dnaweaver_synbiocad.compute_all_construct_quotes import (
+        find_construct_plan,
+        register_quote_products,
+    )
+    from dnaweaver_synbiocad.generate_supply_network import SupplyNetwork
+
+    parts = {"part_%d" % i: dw.random_dna_sequence(600, seed=i) for i in range(4)}
+    construct_1 = parts["part_0"] + parts["part_1"] + parts["part_2"]
+    construct_2 = parts["part_0"] + parts["part_1"] + parts["part_3"]
+
+    # The network is built once for all the constructs of a run
+    networks = []
+
+    class CountedSupplyNetwork(SupplyNetwork):
+        def __init__(self, *args, **kwargs):
+            SupplyNetwork.__init__(self, *args, **kwargs)
+            networks.append(self)
+
+    module = sys.modules["dnaweaver_synbiocad.compute_all_construct_quotes"]
+    monkeypatch.setattr(module, "SupplyNetwork", CountedSupplyNetwork)
+    quotes, _, _, _ = module.compute_all_construct_quotes(
+        construct_sequences={"c1": construct_1, "c2": construct_2},
+        part_sequences=parts,
+        assembly_method="gibson",
+        logger=None,
+    )
+    assert len(quotes) == 2
+    assert len(networks) == 1
+
+    # The primers and fragments registered in place are reused for free by
+    # the next constructs: construct_2 shares the primers of the junction
+    # between part_0 and part_1, construct_1 all its fragments
+    fresh_quote, _ = find_construct_plan(
+        SupplyNetwork(parts, "gibson").main_station, construct_2, "gibson", "C2_"
+    )
+    network = SupplyNetwork(parts, "gibson")
+    quote, _ = find_construct_plan(
+        network.main_station, construct_1, "gibson", "C1_"
+    )
+    ordered_primers, amplified_fragments = {}, {}
+    register_quote_products(
+        quote,
+        network=network,
+        ordered_primers=ordered_primers,
+        amplified_fragments=amplified_fragments,
+        amplified_fragments_quotes={},
+    )
+    primers = network.already_ordered_primers_library.parts_dict
+    fragments = network.already_amplified_fragments_library.parts_dict
+    assert primers == ordered_primers and fragments == amplified_fragments
+    quote_2, _ = find_construct_plan(
+        network.main_station, construct_2, "gibson", "C2_"
+    )
+    assert quote_2.price < fresh_quote.price
+    quote_1, _ = find_construct_plan(
+        network.main_station, construct_1, "gibson", "C1B_"
+    )
+    # Only the Gibson assembly is paid for
+    assert quote_1.price == 50
+
+    # The degraded network is built once and its libraries follow the ones
+    # of the network
+    degraded_network = network.get_degraded_network()
+    network.add_ordered_primer("P_NEW", "ATGC" * 6)
+    network.update_reuse_libraries({}, {"F_NEW": parts["part_3"]})
+    assert network.get_degraded_network() is degraded_network
+    for name in ["already_ordered_primers", "already_amplified_fragments"]:
+        library = getattr(network, name + "_library")
+        degraded_library = getattr(degraded_network, name + "_library")
+        assert degraded_library.parts_dict == library.parts_dict
+    quote_1, _ = find_construct_plan(
+        degraded_network.main_station, construct_1, "gibson", "C1D_"
+    )
+    assert quote_1.price == 50
+
+
+def test_streaming_sbol_parser():
+    from dnaweaver_synbiocad import get_assembly_plan_from_sbol
+
+    path = os.path.join(this_directory, "data", "input", "lycopene.xml")
+    design_data = get_assembly_plan_from_sbol(path=path)
+    streamed_data = get_assembly_plan_from_sbol(path=path, streaming=True)
+    for data, streamed in zip(design_data, streamed_data):
+        assert list(data.items()) == list(streamed.items())
+
+
+def test_parse_cache(tmpdir):
+    from dnaweaver_synbiocad import get_assembly_plan_from_sbol
+    from dnaweaver_synbiocad.parse_cache import (
+        ParseCache,
+        SnapshotPartsPerConstruct,
+    )
+
+    path = os.path.join(this_directory, "data", "input", "lycopene.xml")
+    cache_dir = os.path.join(str(tmpdir), "cache")
+    design_data = get_assembly_plan_from_sbol(path=path)
+    for run in ["parsed", "cached"]:
+        cached_data = get_assembly_plan_from_sbol(path=path, cache_dir=cache_dir)
+        for data, cached in zip(design_data, cached_data):
+            assert list(data.items()) == list(cached.items())
+    assert isinstance(cached_data[1], SnapshotPartsPerConstruct)
+
+    # An invalid snapshot is parsed again
+    snapshot_path = ParseCache(cache_dir).snapshot_path(ParseCache.compute_key(path))
+    with open(snapshot_path, "rb") as f:
+        snapshot = f.read()
+    truncated_snapshots = [
+        snapshot[: len(snapshot) // 2],  # Truncated array sections
+        snapshot[:20],  # Truncated JSON header
+        b"not a snapshot",
+    ]
+    for invalid_snapshot in truncated_snapshots:
+        with open(snapshot_path, "wb") as f:
+            f.write(invalid_snapshot)
+        assert ParseCache(cache_dir).get(ParseCache.compute_key(path)) is None
+    parsed_data = get_assembly_plan_from_sbol(path=path, cache_dir=cache_dir)
+    assert list(parsed_data[1].items()) == list(design_data[1].items())
+    with open(snapshot_path, "wb") as f:
+        f.write(b"not a snapshot")
+    parts_sequences, _, _ = get_assembly_plan_from_sbol(
+        path=path, cache_dir=cache_dir, compact=True
+    )
+    assert parts_sequences == design_data[0]
+
+
+def test_compact_sequences():
+    import pickle
+    from dnaweaver_synbiocad import get_assembly_plan_from_sbol
+    from dnaweaver_synbiocad.sequence_store import PackedSequence
+
+    path = os.path.join(this_directory, "data", "input", "lycopene.xml")
+    _, _, sequences = get_assembly_plan_from_sbol(path=path)
+    for streaming in [False, True]:
+        _, _, compact = get_assembly_plan_from_sbol(
+            path=path, streaming=streaming, compact=True
+        )
+        assert list(compact) == list(sequences)
+        for name, sequence in sequences.items():
+            assert str(compact[name]) == sequence
+    sequence = sequences[list(sequences)[0]]
+    construct = compact[list(sequences)[0]]
+    L = len(sequence)
+    for shift in [0, 1, 7, L // 2, L - 1]:
+        rotated = construct.rotate(shift)
+        assert str(rotated) == sequence[shift:] + sequence[:shift]
+        assert rotated[3:17] == (sequence[shift:] + sequence[:shift])[3:17]
+        assert rotated.parts is construct.parts
+    assert str(pickle.loads(pickle.dumps(construct.rotate(5)))) == (
+        sequence[5:] + sequence[:5]
+    )
+    # Characters other than A, T, G, C are kept
+    packed = PackedSequence("ATGNNCGTAnAGC")
+    assert str(packed) == "ATGNNCGTAnAGC"
+    assert packed.decode(2, 10) == "GNNCGTAn"
+
+
+def test_order_constructs():
+    from dnaweaver_synbiocad import order_constructs
+
+    parts_per_construct = {
+        "c1": ["A", "B", "C"],
+        "c2": ["A", "B", "D"],
+        "c3": ["E", "F"],
+        "c4": ["A", "B", "C", "D"],
+    }
+    # c3 shares nothing so it comes first, then c1 (before c2 in the document)
+    # is followed by c4, which has two of its adjacencies (c2 has only one)
+    assert order_constructs(parts_per_construct) == ["c3", "c1", "c4", "c2"]
+
+    # Chained, the constructs reuse more primers than in the document order
+    from dnaweaver_synbiocad import (
+        compute_all_construct_quotes,
+        get_assembly_plan_from_sbol,
+    )
+
+    input_path = os.path.join(this_directory, "data", "input", "test.xml")
+    part_sequences, construct_parts, construct_sequences = (
+        get_assembly_plan_from_sbol(path=input_path)
+    )
+    constructs = list(construct_sequences)[:6]
+    construct_sequences = {c: construct_sequences[c] for c in constructs}
+    constructs_order = order_constructs(
+        {c: sorted(construct_parts[c]) for c in constructs}
+    )
+    assert constructs_order != constructs
+    n_primers = []
+    for order in [None, constructs_order]:
+        _, primers, _, errors = compute_all_construct_quotes(
+            construct_sequences=construct_sequences,
+            part_sequences=part_sequences,
+            assembly_method="golden_gate",
+            logger=None,
+            constructs_order=order,
+        )
+        assert len(errors) == 2
+        n_primers.append(len(primers))
+    assert n_primers == [37, 35]
+
+
+def test_deduplicate_constructs(tmpdir):
+    import dnaweaver as dw
+    from dnaweaver_synbiocad import (
+        compute_all_construct_quotes,
+        get_assembly_plan_from_sbol,
+        write_output_spreadsheet,
+    )
+
+    input_path = os.path.join(this_directory, "data", "input", "test.xml")
+    part_sequences, construct_parts, sequences = get_assembly_plan_from_sbol(
+        path=input_path, streaming=True
+    )
+    construct_sequences = {
+        name: sequences[name] for name in ["plasmid01", "plasmid02"]
+    }
+    sequence = construct_sequences["plasmid01"]
+    construct_sequences["rotated_copy"] = dw.reverse_complement(
+        sequence[100:] + sequence[:100]
+    )
+    stats = {}
+    quotes, primers, fragment_quotes, errors = compute_all_construct_quotes(
+        construct_sequences=construct_sequences,
+        part_sequences=part_sequences,
+        assembly_method="gibson",
+        logger=None,
+        stats=stats,
+        deduplicate=True,
+    )
+    assert stats["duplicate_constructs"] == 1
+    assert stats["full_quotes"] == 2
+    assert list(quotes) == ["plasmid01", "plasmid02", "rotated_copy"]
+    assert quotes["rotated_copy"] is quotes["plasmid01"]
+    construct_parts = dict(construct_parts)
+    construct_parts["rotated_copy"] = construct_parts["plasmid01"]
+    output_path = os.path.join(str(tmpdir), "test_output.xlsx")
+    write_output_spreadsheet(
+        quotes=quotes,
+        primer_sequences=primers,
+        part_sequences=part_sequences,
+        fragment_quotes=fragment_quotes,
+        construct_parts={name: construct_parts[name] for name in quotes},
+        construct_sequences=construct_sequences,
+        errors=errors,
+        target=output_path,
+    )
+    assert get_sheet_length(output_path, "assembly_plan") == 3
+
+
+def test_streamed_output(tmpdir):
+    output_path = os.path.join(str(tmpdir), "test_output")
+    run_test_with_assembly_method(
+        output_path,
+        assembly_method="golden_gate",
+        extra_parameters=["--output-format=csv"],
+    )
+    expected = dict(primer_sequences=37, fragment_extensions=24, errors=2)
+    for sheet_name, expected_size in expected.items():
+        path = os.path.join(output_path, sheet_name + ".csv")
+        assert len(pandas.read_csv(path)) == expected_size
+    assert os.path.exists(os.path.join(output_path, "golden_gate_enzymes.csv"))
+
+    # As in write_output_spreadsheet, no enzymes sheet without enzymes data
+    from dnaweaver_synbiocad.streaming_output_writer import StreamingOutputWriter
+
+    gibson_output_path = os.path.join(str(tmpdir), "gibson_output")
+    StreamingOutputWriter(gibson_output_path, output_format="csv").close()
+    assert "golden_gate_enzymes.csv" not in os.listdir(gibson_output_path)
+
+
+def test_profile(tmpdir):
+    import json
+
+    output_path = os.path.join(str(tmpdir), "test_output.xlsx")
+    profile_path = os.path.join(str(tmpdir), "profile.json")
+    stdout = run_test_with_assembly_method(
+        output_path,
+        assembly_method="gibson",
+        extra_parameters=["--profile=%s" % profile_path],
+    )
+    assert "pcr_part_extension_station" in stdout.decode()
+    with open(profile_path) as f:
+        trace = json.load(f)
+    spans = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    constructs = [e for e in spans if e["cat"] == "construct"]
+    assert len(constructs) == 6
+    assert all(e["args"]["accepted"] for e in constructs)
+    summary = {row["name"]: row for row in trace["otherData"]["summary"]}
+    assert summary["main"]["calls"] == summary["shift 0"]["calls"] == 6
+    assert summary["already_ordered_primers"]["accepted"] > 0
+
+
+def test_part_boundary_cuts():
+    from dnaweaver_synbiocad import get_assembly_plan_from_sbol
+    from dnaweaver_synbiocad.generate_supply_network import SupplyNetwork
+    from dnaweaver_synbiocad.compute_all_construct_quotes import find_construct_plan
+    from dnaweaver_synbiocad.part_boundary_assembly_station import (
+        find_part_boundaries,
+    )
+
+    input_path = os.path.join(this_directory, "data", "input", "test.xml")
+    part_sequences, construct_parts, construct_sequences = (
+        get_assembly_plan_from_sbol(path=input_path)
+    )
+    sequence = construct_sequences["plasmid03"]
+    boundaries = find_part_boundaries(
+        construct_parts["plasmid03"], part_sequences, sequence
+    )
+    assert len(boundaries) == len(construct_parts["plasmid03"])
+    assert find_part_boundaries(
+        construct_parts["plasmid03"], part_sequences, sequence[1:]
+    ) is None
+
+    network = SupplyNetwork(part_sequences, assembly_method="gibson")
+    stats = {}
+    quote, error = find_construct_plan(
+        network.main_station,
+        sequence,
+        "gibson",
+        "ID_1",
+        stats=stats,
+        part_boundaries=boundaries,
+    )
+    assert quote.accepted and stats["part_boundary_fallbacks"] == 0
+    cuts = set(cut for segment in quote.assembly_plan for cut in segment)
+    assert cuts <= set(boundaries + [len(sequence)])
+
+
+def test_construct_timeout():
+    from dnaweaver_synbiocad import get_assembly_plan_from_sbol
+    from dnaweaver_synbiocad.generate_supply_network import SupplyNetwork
+    from dnaweaver_synbiocad.compute_all_construct_quotes import (
+        find_construct_plan_in_time,
+    )
+    from dnaweaver_synbiocad.time_budget import time_budget
+
+    # The timer is disarmed when the block ends, also with an error
+    for error in [None, ValueError]:
+        try:
+            with time_budget(0.05):
+                if error is not None:
+                    raise error()
+        except ValueError:
+            pass
+        time.sleep(0.2)
+
+    input_path = os.path.join(this_directory, "data", "input", "test.xml")
+    part_sequences, construct_parts, construct_sequences = (
+        get_assembly_plan_from_sbol(path=input_path, streaming=True)
+    )
+    network = SupplyNetwork(part_sequences, assembly_method="golden_gate")
+    stats = {}
+    quote, error, degraded = find_construct_plan_in_time(
+        network, construct_sequences["plasmid01"], "ID_1", timeout=0.01, stats=stats
+    )
+    assert quote is None and error.startswith("timeout")
+    assert degraded
+    assert stats["degraded_constructs"] == stats["timed_out_constructs"] == 1
+    quote, error, degraded = find_construct_plan_in_time(
+        network, construct_sequences["plasmid02"], "ID_2", timeout=None
+    )
+    assert quote.accepted and not degraded
+
+
+def test_all_assembly_methods(tmpdir):
+    from dnaweaver_synbiocad import (
+        compute_all_construct_quotes,
+        compute_all_methods_quotes,
+        get_assembly_plan_from_sbol,
+        write_methods_comparison,
+    )
+
+    input_path = os.path.join(this_directory, "data", "input", "test.xml")
+    part_sequences, construct_parts, construct_sequences = (
+        get_assembly_plan_from_sbol(path=input_path, streaming=True)
+    )
+    methods = ["gibson", "any_method"]
+    stats = {}
+    methods_results = compute_all_methods_quotes(
+        construct_sequences=construct_sequences,
+        part_sequences=part_sequences,
+        assembly_methods=methods,
+        stats=stats,
+        logger=None,
+        max_constructs=3,
+    )
+    assert stats["sub_quote_cache_hits"] > 0
+    for method in methods:
+        quotes, primers, fragment_quotes, errors = compute_all_construct_quotes(
+            construct_sequences=construct_sequences,
+            part_sequences=part_sequences,
+            assembly_method=method,
+            logger=None,
+            max_constructs=3,
+        )
+        shared_quotes, shared_primers, _, _ = methods_results[method]
+        assert shared_primers == primers
+        assert [q.price for q in shared_quotes.values()] == [
+            q.price for q in quotes.values()
+        ]
+    output_path = os.path.join(str(tmpdir), "comparison.xlsx")
+    write_methods_comparison(methods_results, target=output_path)
+    costs = pandas.read_excel(output_path, sheet_name="construct_costs")
+    assert list(costs.columns) == ["construct"] + methods + ["cheapest_method"]
+    assert len(costs) == 3
+
+
+def test_sub_quote_cache():
+    import dnaweaver as dw
+    import pytest
+    from dnaweaver_synbiocad import compute_all_construct_quotes
+    from dnaweaver_synbiocad.compute_all_construct_quotes import (
+        find_construct_plan,
+        register_quote_products,
+    )
+    from dnaweaver_synbiocad.generate_supply_network import SupplyNetwork
+    from dnaweaver_synbiocad.sub_quote_cache import SubQuoteCache
+
+    parts = {"part_%d" % i: dw.random_dna_sequence(600, seed=i) for i in range(4)}
+    constructs = [
+        parts["part_0"] + parts["part_1"] + parts["part_2"],
+        parts["part_0"] + parts["part_1"] + parts["part_3"],
+    ]
+
+    def quote_constructs(assembly_method, other_primer, sub_quote_cache):
+        """Return the prices of the constructs and the cache misses."""
+        network = SupplyNetwork(parts, assembly_method)
+        # The libraries of the runs differ, but not for the constructs' parts
+        network.add_ordered_primer("P_OTHER", other_primer)
+        sub_quote_cache.share_network(network)
+        misses = sub_quote_cache.misses
+        prices = []
+        for i, construct in enumerate(constructs):
+            quote, _ = find_construct_plan(
+                network.main_station, construct, assembly_method, "C%d_" % i
+            )
+            register_quote_products(quote, network, {}, {}, {})
+            prices.append(quote.price)
+        return prices, sub_quote_cache.misses - misses
+
+    # The any_method run reuses the Golden Gate quotes of the other run, with
+    # the same prices as without cache
+    sub_quote_cache = SubQuoteCache()
+    quote_constructs("golden_gate", "ATGC" * 6, sub_quote_cache)
+    hits = sub_quote_cache.hits
+    prices, misses = quote_constructs("any_method", "TTGC" * 6, sub_quote_cache)
+    expected_prices, expected_misses = quote_constructs(
+        "any_method", "TTGC" * 6, SubQuoteCache()
+    )
+    assert prices == expected_prices
+    assert sub_quote_cache.hits > hits
+    assert misses < expected_misses / 2
+
+    with pytest.raises(ValueError):
+        compute_all_construct_quotes(
+            construct_sequences={"c1": constructs[0]},
+            part_sequences=parts,
+            assembly_method="gibson",
+            logger=None,
+            n_jobs=2,
+            sub_quote_cache=SubQuoteCache(),
+        )
+
+
+def test_compact_results():
+    from dnaweaver_synbiocad import (
+        compute_all_construct_quotes,
+        get_assembly_plan_from_sbol,
+    )
+    from dnaweaver_synbiocad.compact_quote import QuoteRecord
+    from dnaweaver_synbiocad.streaming_output_writer import quote_components_ids
+
+    input_path = os.path.join(this_directory, "data", "input", "test.xml")
+    part_sequences, construct_parts, construct_sequences = (
+        get_assembly_plan_from_sbol(path=input_path)
+    )
+    results = {}
+    for compact_results in [True, False]:
+        results[compact_results] = compute_all_construct_quotes(
+            construct_sequences=construct_sequences,
+            part_sequences=part_sequences,
+            assembly_method="any_method",
+            logger=None,
+            max_constructs=3,
+            compact_results=compact_results,
+        )
+    quotes, primers, fragment_quotes, errors = results[True]
+    full_quotes, full_primers, full_fragment_quotes, _ = results[False]
+    assert primers == full_primers
+    assert list(fragment_quotes) == list(full_fragment_quotes)
+    for construct, quote in quotes.items():
+        full_quote = full_quotes[construct]
+        assert isinstance(quote, QuoteRecord) and quote.sequence is None
+        assert quote.price == full_quote.price
+        assert quote_components_ids(quote) == quote_components_ids(full_quote)
+    for quote in fragment_quotes.values():
+        assert isinstance(quote, QuoteRecord) and quote.sequence
+
+
+def test_shard_and_merge(tmpdir):
+    from dnaweaver_synbiocad import shard_constructs
+
+    shards = shard_constructs(["c%d" % i for i in range(7)], 3)
+    assert [len(shard["constructs"]) for shard in shards] == [3, 2, 2]
+    assert [shard["id_prefix"] for shard in shards] == ["ID_S1", "ID_S2", "ID_S3"]
+
+    input_path = os.path.join(this_directory, "data", "input", "test.xml")
+    shards_dir = os.path.join(str(tmpdir), "shards")
+    process = subprocess.run(
+        ["python3", "-m", "dnaweaver_synbiocad", "shard", input_path, "2", shards_dir]
+    )
+    assert process.returncode == 0
+    shard_outputs = []
+    for shard in [1, 2]:
+        shard_output = os.path.join(str(tmpdir), "shard_%d.xlsx" % shard)
+        shard_path = os.path.join(shards_dir, "shard_%d.json" % shard)
+        run_test_with_assembly_method(
+            shard_output, "gibson", extra_parameters=["--shard", shard_path]
+        )
+        shard_outputs.append(shard_output)
+    output_path = os.path.join(str(tmpdir), "merged.xlsx")
+    process = subprocess.run(
+        ["python3", "-m", "dnaweaver_synbiocad", "merge", output_path]
+        + shard_outputs,
+        stdout=subprocess.PIPE,
+    )
+    assert process.returncode == 0
+    assert b"merged_primers" in process.stdout
+    sheets = pandas.read_excel(output_path, sheet_name=None)
+    assert len(sheets["assembly_plan"]) == 12
+    assert len(sheets["construct_parts"]) == 48
+    primers = sheets["primer_sequences"]
+    fragments = sheets["fragment_extensions"]
+    assert primers["sequence"].is_unique
+    assert fragments["fragment_sequence"].is_unique
+    assert primers["primer"].str.startswith("ID_S2_").any()
+    used_fragments = set(
+        fragment
+        for plan in sheets["assembly_plan"]["fragments"]
+        for fragment in plan.split(" + ")
+    )
+    assert used_fragments <= set(fragments["fragment_id"])
+    used_primers = set(
+        primer for ids in fragments["primers"] for primer in ids.split(" + ")
+    )
+    assert used_primers == set(primers["primer"])
+
+
+def test_pipeline(tmpdir):
+    from dnaweaver_synbiocad import get_assembly_plan_from_sbol
+    from dnaweaver_synbiocad.get_assembly_plan_from_sbol_stream import (
+        stream_sbol_constructs,
+    )
+
+    input_path = os.path.join(this_directory, "data", "input", "lycopene.xml")
+    design_data = get_assembly_plan_from_sbol(path=input_path)
+    parts_sequences, parts_per_construct, constructs_sequences, constructs = (
+        stream_sbol_constructs(input_path)
+    )
+    assert parts_sequences == design_data[0]
+    assert len(parts_per_construct) == 0
+    assert list(constructs) == list(design_data[1])
+    streamed_data = [parts_per_construct, constructs_sequences]
+    for data, streamed in zip(design_data[1:], streamed_data):
+        assert list(data.items()) == list(streamed.items())
+
+    # The pipelined run writes the same sheets as a streamed run
+    outputs = {}
+    for mode in ["--stream-output", "--pipeline"]:
+        outputs[mode] = os.path.join(str(tmpdir), "output%s.xlsx" % mode)
+        run_test_with_assembly_method(
+            outputs[mode],
+            "any_method",
+            extra_parameters=[mode, "--part-boundary-cuts", "--workers=2"],
+        )
+    sheets = pandas.read_excel(outputs["--stream-output"], sheet_name=None)
+    pipeline_sheets = pandas.read_excel(outputs["--pipeline"], sheet_name=None)
+    assert len(pipeline_sheets["assembly_plan"]) == 6
+    assert len(pipeline_sheets["golden_gate_enzymes"]) == 6
+    for sheet_name in sheets:
+        assert sheets[sheet_name].equals(pipeline_sheets[sheet_name])
@@ -0,0 +1,55 @@
+import os
+from dnaweaver_synbiocad import quote_cache
+from dnaweaver_synbiocad.quote_cache import QuoteCache
+from test_methods import get_sheet_length, run_test_with_assembly_method
+
+
+def test_quote_cache_eviction(tmpdir):
+    cache = QuoteCache(str(tmpdir), max_size=2500)
+    for i in range(3):
+        cache.put("key_%d" % i, "A" * 1000)
+    assert cache.get("key_0") is None
+    assert cache.get("key_2") == "A" * 1000
+    cache.close()
+    assert QuoteCache(str(tmpdir)).get("key_1") == "A" * 1000
+
+
+def test_quote_cache_key(monkeypatch):
+    arguments = ("ATGC" * 50, "gibson", "plasmid_1", "", ["part_boundary_cuts"])
+    key = QuoteCache.compute_key(*arguments)
+    monkeypatch.setattr(quote_cache, "CACHE_FORMAT", quote_cache.CACHE_FORMAT + 1)
+    assert QuoteCache.compute_key(*arguments) != key
+    monkeypatch.undo()
+
+    # The keys change with the source code of the functions finding the plans
+    getsource = quote_cache.inspect.getsource
+
+    def edited_getsource(obj):
+        source = getsource(obj)
+        if getattr(obj, "__name__", None) == "find_construct_plan":
+            source += "\n# edited"
+        return source
+
+    monkeypatch.setattr(quote_cache.inspect, "getsource", edited_getsource)
+    quote_cache._plan_signature.cache_clear()
+    try:
+        assert QuoteCache.compute_key(*arguments) != key
+    finally:
+        monkeypatch.undo()
+        quote_cache._plan_signature.cache_clear()
+    assert QuoteCache.compute_key(*arguments) == key
+
+
+def test_rerun_with_cache(tmpdir):
+    cache_dir = os.path.join(str(tmpdir), "cache")
+    for run in ["first", "second"]:
+        output_path = os.path.join(str(tmpdir), "%s_output.xlsx" % run)
+        stdout = run_test_with_assembly_method(
+            output_path,
+            assembly_method="gibson",
+            extra_parameters=["--cache-dir=%s" % cache_dir],
+        )
+        expected = dict(primer_sequences=50, fragment_extensions=37, errors=0)
+        for sheet_name, expected_size in expected.items():
+            assert get_sheet_length(output_path, sheet_name) == expected_size
+    assert "cache_hits: 6" in stdout.decode()
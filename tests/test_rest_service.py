@@ -0,0 +1,65 @@
+import io
+import os
+import sys
+import time
+import pandas
+from dnaweaver_synbiocad.rest_service import JobQueue, create_app
+
+this_directory = os.path.dirname(os.path.realpath(__file__))
+
+# Imported by the workers when they start (see _init_job_worker)
+WARM_MODULES = [
+    "dnaweaver",
+    "pandas",
+    "sbol2",
+    "dnaweaver_synbiocad.compute_all_construct_quotes",
+    "dnaweaver_synbiocad.write_output_spreadsheet",
+]
+
+
+def _loaded_modules(names):
+    return [name for name in names if name in sys.modules]
+
+
+def test_rest_service(tmpdir):
+    job_queue = JobQueue(jobs_dir=str(tmpdir), n_workers=1)
+    client = create_app(job_queue).test_client()
+    input_path = os.path.join(this_directory, "data", "input", "test.xml")
+    try:
+        worker_modules = job_queue.executor.submit(_loaded_modules, WARM_MODULES)
+        assert worker_modules.result() == WARM_MODULES
+
+        with open(input_path, "rb") as f:
+            response = client.post(
+                "/jobs",
+                data={
+                    "sbol": (f, "test.xml"),
+                    "assembly_method": "gibson",
+                    "max_constructs": "3",
+                },
+            )
+        assert response.status_code == 202
+        job_id = response.get_json()["id"]
+        assert client.get("/jobs/%s/result" % job_id).status_code == 409
+
+        start = time.time()
+        while time.time() - start < 300:
+            job = client.get("/jobs/%s" % job_id).get_json()
+            if job["status"] in ["done", "failed"]:
+                break
+            time.sleep(0.5)
+        assert job["status"] == "done", job["error"]
+        assert job["constructs_done"] == job["constructs"] == 3
+        assert job["stats"]["valid_plans"] == 3
+
+        response = client.get("/jobs/%s/result" % job_id)
+        assert response.status_code == 200
+        plan = pandas.read_excel(
+            io.BytesIO(response.data), sheet_name="assembly_plan", engine="openpyxl"
+        )
+        assert len(plan) == 3
+        assert client.get("/jobs/unknown").status_code == 404
+        response = client.post("/jobs", data={"assembly_method": "gibson"})
+        assert response.status_code == 400
+    finally:
+        job_queue.shutdown()
@@ -0,0 +1,61 @@
+import os
+import pickle
+import pytest
+from dnaweaver_synbiocad import (
+    compute_all_construct_quotes,
+    get_assembly_plan_from_sbol,
+)
+from dnaweaver_synbiocad.streaming_output_writer import quote_components_ids
+
+this_directory = os.path.dirname(os.path.realpath(__file__))
+
+
+def test_resume_from_journal(tmpdir):
+    input_path = os.path.join(this_directory, "data", "input", "test.xml")
+    part_sequences, _, construct_sequences = get_assembly_plan_from_sbol(
+        path=input_path
+    )
+    journal_path = os.path.join(str(tmpdir), "run.journal")
+
+    def compute_quotes(max_constructs, **parameters):
+        quotes, primers, fragment_quotes, errors = compute_all_construct_quotes(
+            construct_sequences=construct_sequences,
+            part_sequences=part_sequences,
+            assembly_method="gibson",
+            logger=None,
+            max_constructs=max_constructs,
+            **parameters
+        )
+        plans = [
+            (construct, quote_components_ids(quote))
+            for construct, quote in quotes.items()
+        ]
+        return plans, dict(primers), sorted(fragment_quotes), dict(errors)
+
+    uninterrupted_result = compute_quotes(6, journal_path=journal_path)
+    # Simulate a run killed after 3 constructs, in the middle of a write
+    with open(journal_path, "rb") as journal_file:
+        for entry in range(4):  # The header and 3 constructs
+            pickle.load(journal_file)
+        end = journal_file.tell()
+    with open(journal_path, "r+b") as journal_file:
+        journal_file.truncate(end)
+        journal_file.seek(end)
+        journal_file.write(b"\x80\x05truncated")
+    stats = {}
+    resumed_result = compute_quotes(
+        6, journal_path=journal_path, resume=True, stats=stats
+    )
+    assert stats["resumed_constructs"] == 3
+    assert stats["full_quotes"] == 3
+    assert resumed_result == uninterrupted_result
+
+    # A run with other constructs (or in another order) is not resumed
+    constructs_order = list(construct_sequences)[::-1]
+    with pytest.raises(ValueError, match="constructs_digest"):
+        compute_quotes(
+            6,
+            journal_path=journal_path,
+            resume=True,
+            constructs_order=constructs_order,
+        )